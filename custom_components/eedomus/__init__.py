@@ -4,7 +4,6 @@ from __future__ import annotations
 from datetime import timedelta
 
 import asyncio
-import json
 import logging
 import os
 
@@ -12,40 +11,50 @@ from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers import aiohttp_client
+from homeassistant.loader import async_get_integration
 import aiohttp
 
 from .api_proxy import EedomusApiProxyView
+from .prometheus import EedomusMetricsView
 from .webhook import EedomusWebhookView
 from .const import (
 
     CONF_API_HOST,
     CONF_API_PROXY_DISABLE_SECURITY,
-
+    CONF_API_PROXY_MAX_CONCURRENCY,
+    CONF_API_PROXY_ASYNC,
+    CONF_API_PROXY_ALLOWLIST,
     CONF_ENABLE_API_EEDOMUS,
     CONF_ENABLE_API_PROXY,
     CONF_ENABLE_HISTORY,
     CONF_ENABLE_WEBHOOK,
+    CONF_LOOP_LAG_MONITOR,
+    CONF_MAPPING_PROCESS_POOL_THRESHOLD,
     CONF_REMOVE_ENTITIES,
     CONF_SCAN_INTERVAL,
     COORDINATOR,
+    DATA_METRICS_VIEW,
     DEFAULT_API_PROXY_DISABLE_SECURITY,
+    DEFAULT_API_PROXY_MAX_CONCURRENCY,
+    DEFAULT_API_PROXY_ASYNC,
+    DEFAULT_API_PROXY_ALLOWLIST,
     DEFAULT_CONF_ENABLE_API_EEDOMUS,
     DEFAULT_CONF_ENABLE_API_PROXY,
     DEFAULT_ENABLE_HISTORY,
     DEFAULT_ENABLE_WEBHOOK,
+    DEFAULT_LOOP_LAG_MONITOR,
+    DEFAULT_MAPPING_PROCESS_POOL_THRESHOLD,
     DEFAULT_REMOVE_ENTITIES,
     DEFAULT_SCAN_INTERVAL,
     DOMAIN,
-    PLATFORMS,
+    MAPPING_OPTIONS,
+    SETUP_OPTIONS,
 )
-from .coordinator import EedomusDataUpdateCoordinator
-
-from .eedomus_client import EedomusClient
+from .metrics import StartupTimeline
 # Note: For HA 2026.02+, we use the modern frontend API (www/config_panel.js)
 # The Lovelace card import is kept for backward compatibility but may fail in newer HA versions
-from .sensor import EedomusHistoryProgressSensor, EedomusSensor
-from .text_sensor import EedomusTextSensor
-from .webhook import EedomusWebhookView
+# The client, coordinator and entity modules are imported by the API Eedomus
+# mode only: the proxy-only mode loads none of the entity/mapping machinery
 
 # Import service setup
 from .services import async_setup_services
@@ -62,24 +71,17 @@ except ImportError as e:
 except Exception as e:
     _LOGGER.warning("Unexpected error loading options flow handler: %s", e)
 
-# Get version from manifest.json
-try:
-    manifest_path = os.path.join(os.path.dirname(__file__), "manifest.json")
-    with open(manifest_path, "r") as f:
-        manifest_data = json.load(f)
-        VERSION = manifest_data.get("version", "unknown")
-except Exception as e:
-    VERSION = "unknown"
-    _LOGGER.warning("Failed to read version from manifest.json: %s", e)
-
-
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up eedomus from a config entry.
     
     This function initializes the eedomus integration by creating the API client,
     setting up the data coordinator, registering services, and forwarding setup to platforms.
     """
-    _LOGGER.info("🚀 Starting eedomus integration setup - Version %s", VERSION)
+    # Version from the manifest already loaded by HA (no file I/O at import)
+    integration = await async_get_integration(hass, DOMAIN)
+    _LOGGER.info("🚀 Starting eedomus integration setup - Version %s", integration.version)
+    # Per-phase setup timeline, exposed by diagnostics and the startup duration sensor
+    timeline = StartupTimeline()
     _LOGGER.debug("Setting up eedomus integration with entry_id: %s", entry.entry_id)
     
     # Perform migration if needed
@@ -124,8 +126,12 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     client = None
 
     if api_eedomus_enabled:
+        from .coordinator import EedomusDataUpdateCoordinator
+        from .eedomus_client import EedomusClient
+
         try:
-            client = EedomusClient(session=session, config_entry=entry)
+            with timeline.phase("client_creation"):
+                client = EedomusClient(session=session, config_entry=entry)
         except Exception as err:
             _LOGGER.error("Failed to create eedomus client: %s", err)
             return False
@@ -138,6 +144,17 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         )
         
         coordinator = EedomusDataUpdateCoordinator(hass, client, scan_interval)
+        coordinator._startup_timeline = timeline
+        if entry.options.get(
+            CONF_LOOP_LAG_MONITOR,
+            entry.data.get(CONF_LOOP_LAG_MONITOR, DEFAULT_LOOP_LAG_MONITOR)
+        ):
+            # Started before the first refresh to catch setup stalls too
+            coordinator.enable_loop_lag_monitor()
+        coordinator._mapping_process_pool_threshold = entry.options.get(
+            CONF_MAPPING_PROCESS_POOL_THRESHOLD,
+            entry.data.get(CONF_MAPPING_PROCESS_POOL_THRESHOLD, DEFAULT_MAPPING_PROCESS_POOL_THRESHOLD)
+        )
 
         # Create main eedomus box device for proper device hierarchy
         try:
@@ -159,7 +176,8 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 
         # Perform initial full refresh only for API Eedomus mode
         try:
-            await coordinator.async_config_entry_first_refresh()
+            with timeline.phase("first_refresh"):
+                await coordinator.async_config_entry_first_refresh()
             _LOGGER.info("API Eedomus mode initialized successfully")
             
             # Display device mapping table after first successful refresh
@@ -177,7 +195,8 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 
         # Setup services after coordinator is initialized
         try:
-            await async_setup_services(hass, coordinator)
+            with timeline.phase("services"):
+                await async_setup_services(hass, coordinator)
             _LOGGER.info("✅ Eedomus services registered successfully")
         except Exception as err:
             _LOGGER.error("Failed to setup eedomus services: %s", err)
@@ -215,10 +234,16 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
                 
                 # Create proper history sensor entities
                 from .history_sensor import async_setup_history_sensors
-                sensors = await async_setup_history_sensors(hass, coordinator, device_registry)
+                with timeline.phase("history_sensors") as phase:
+                    sensors = await async_setup_history_sensors(hass, coordinator, device_registry)
+                    phase["entities"] = len(sensors or [])
                 
                 # Store sensors for cleanup
                 coordinator._history_sensors = sensors
+
+                # Diagnostic sensors are added with the other sensors via PLATFORMS
+                from .history_sensor import async_setup_history_diagnostic_sensors
+                coordinator._history_diagnostic_sensors = async_setup_history_diagnostic_sensors(coordinator)
                 _LOGGER.info("✅ History sensors created and attached to eedomus box device")
             except Exception as err:
                 _LOGGER.error("Failed to create history sensors: %s", err)
@@ -249,38 +274,42 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         except Exception as err:
             _LOGGER.error("Failed to setup history sensors: %s", err)
 
-    # Always setup refresh timing sensors (they're lightweight and useful for monitoring)
-    try:
-        from .refresh_timing_sensor import async_setup_refresh_timing_sensors
-        from homeassistant.helpers.device_registry import async_get as async_get_device_registry
-        device_registry = async_get_device_registry(hass)
-        timing_sensors = await async_setup_refresh_timing_sensors(hass, coordinator, device_registry)
+    # Refresh timing and volume sensors (lightweight and useful for monitoring), API Eedomus mode only
+    if coordinator:
+        try:
+            from .refresh_timing_sensor import async_setup_refresh_timing_sensors
+            from homeassistant.helpers.device_registry import async_get as async_get_device_registry
+            device_registry = async_get_device_registry(hass)
+            with timeline.phase("timing_sensors") as phase:
+                timing_sensors = await async_setup_refresh_timing_sensors(hass, coordinator, device_registry)
+                phase["entities"] = len(timing_sensors or [])
         
-        # Note: Timing sensors will be registered with other sensors via PLATFORMS
-        # No need for separate registration to avoid double setup
-        if timing_sensors:
-            _LOGGER.info("✅ Refresh timing sensors ready (will be registered with other sensors)")
-    except Exception as err:
-        _LOGGER.error("Failed to setup refresh timing sensors: %s", err)
-
-    # Setup endpoint volume sensors (data volume monitoring)
-    try:
-        from .endpoint_volume_sensor import async_setup_endpoint_volume_sensors
-        volume_sensors = await async_setup_endpoint_volume_sensors(hass, coordinator, device_registry)
+            # Note: Timing sensors will be registered with other sensors via PLATFORMS
+            # No need for separate registration to avoid double setup
+            if timing_sensors:
+                _LOGGER.info("✅ Refresh timing sensors ready (will be registered with other sensors)")
+        except Exception as err:
+            _LOGGER.error("Failed to setup refresh timing sensors: %s", err)
+
+        # Setup endpoint volume sensors (data volume monitoring)
+        try:
+            from .endpoint_volume_sensor import async_setup_endpoint_volume_sensors
+            with timeline.phase("volume_sensors") as phase:
+                volume_sensors = await async_setup_endpoint_volume_sensors(hass, coordinator, device_registry)
+                phase["entities"] = len(volume_sensors or [])
         
-        # Debug: Log the number of volume sensors created
-        _LOGGER.info("📊 Created %d endpoint volume sensors", len(volume_sensors) if volume_sensors else 0)
+            # Debug: Log the number of volume sensors created
+            _LOGGER.info("📊 Created %d endpoint volume sensors", len(volume_sensors) if volume_sensors else 0)
         
-        # Note: Volume sensors will be registered with other sensors via PLATFORMS
-        # No need for separate registration to avoid double setup
-        if volume_sensors:
-            _LOGGER.info("✅ Endpoint volume sensors ready (will be registered with other sensors)")
-            # Store volume sensors in coordinator for access by sensor setup
-            if coordinator:
+            # Note: Volume sensors will be registered with other sensors via PLATFORMS
+            # No need for separate registration to avoid double setup
+            if volume_sensors:
+                _LOGGER.info("✅ Endpoint volume sensors ready (will be registered with other sensors)")
+                # Store volume sensors in coordinator for access by sensor setup
                 coordinator._volume_sensors = volume_sensors
                 _LOGGER.debug("📊 Stored %d volume sensors in coordinator", len(volume_sensors))
-    except Exception as err:
-        _LOGGER.error("Failed to setup endpoint volume sensors: %s", err)
+        except Exception as err:
+            _LOGGER.error("Failed to setup endpoint volume sensors: %s", err)
 
     # Store timing sensors in coordinator for access by sensor setup
     if coordinator and 'timing_sensors' in locals():
@@ -306,6 +335,7 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         )
     else:
         _LOGGER.info("No coordinator stored - running in proxy mode only")
+    entry_data[SETUP_OPTIONS] = dict(entry.options)
 
     hass.data[DOMAIN][entry.entry_id] = entry_data
 
@@ -358,14 +388,36 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
                 entry.entry_id,
                 allowed_ips=[entry.data.get(CONF_API_HOST)],
                 disable_security=disable_security,
+                max_concurrency=entry.options.get(
+                    CONF_API_PROXY_MAX_CONCURRENCY,
+                    entry.data.get(CONF_API_PROXY_MAX_CONCURRENCY, DEFAULT_API_PROXY_MAX_CONCURRENCY),
+                ),
+                async_mode=entry.options.get(
+                    CONF_API_PROXY_ASYNC,
+                    entry.data.get(CONF_API_PROXY_ASYNC, DEFAULT_API_PROXY_ASYNC),
+                ),
+                allowlist=entry.options.get(
+                    CONF_API_PROXY_ALLOWLIST,
+                    entry.data.get(CONF_API_PROXY_ALLOWLIST, DEFAULT_API_PROXY_ALLOWLIST),
+                ),
             )
         )
     else:
         _LOGGER.info("Api Proxy mode disabled")
 
+    # Prometheus metrics of every entry: one authenticated view shared by all entries
+    if not hass.data.get(DATA_METRICS_VIEW):
+        hass.http.register_view(EedomusMetricsView())
+        hass.data[DATA_METRICS_VIEW] = True
+
 
-    # Forward setup to platforms
-    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    # Forward setup to the platforms having devices (each one is timed as "platform.<name>")
+    if coordinator:
+        with timeline.phase("platforms"):
+            platforms = await coordinator.async_forward_platforms()
+        _LOGGER.info("Platforms set up: %s", ", ".join(platforms))
+    timeline.finish()
+    _LOGGER.info("⏱️ eedomus setup took %.3fs", timeline.total)
 
     # Note: Configuration manager has been removed - using YAML-based configuration only
     # using the modern frontend.async_register_built_in_panel() method
@@ -379,8 +431,21 @@ async def async_update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None
     """Handle options update.
     
     This function is called when configuration options are updated through the options flow.
-    It updates the coordinator scan interval and triggers a reload of the integration.
+    When only the custom mapping changed, the mappings are hot-reloaded; otherwise it
+    updates the coordinator scan interval and triggers a reload of the integration.
     """
+    entry_data = hass.data.get(DOMAIN, {}).get(entry.entry_id, {})
+    previous_options = entry_data.get(SETUP_OPTIONS)
+    if COORDINATOR in entry_data and previous_options is not None and _only_mapping_options_changed(
+        entry, previous_options
+    ):
+        entry_data[SETUP_OPTIONS] = dict(entry.options)
+        try:
+            await entry_data[COORDINATOR].async_reload_mappings()
+            return
+        except Exception as err:
+            _LOGGER.warning("⚠️ Mapping hot reload failed, reloading the integration: %s", err)
+
     _LOGGER.info("🔧 Eedomus configuration options updated - reloading integration")
     
     # Update coordinator scan interval if it exists and scan_interval option changed
@@ -394,6 +459,16 @@ async def async_update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None
     await hass.config_entries.async_reload(entry.entry_id)
 
 
+def _only_mapping_options_changed(entry: ConfigEntry, previous_options: dict) -> bool:
+    """True when the options differ from `previous_options` by the custom mapping only."""
+    for key in set(previous_options) | set(entry.options):
+        if key in MAPPING_OPTIONS:
+            continue
+        # An option written for the first time with its configured value is no change
+        if previous_options.get(key, entry.data.get(key)) != entry.options.get(key, entry.data.get(key)):
+            return False
+    return True
+
 
 async def async_migrate_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> bool:
     """Migrate old entry."""
@@ -459,7 +534,9 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     This function cleans up the integration by unloading platforms and removing
     the entry data from the Home Assistant data store.
     """
-    if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
+    coordinator = hass.data.get(DOMAIN, {}).get(entry.entry_id, {}).get(COORDINATOR)
+    platforms = coordinator.loaded_platforms if coordinator else []
+    if unload_ok := await hass.config_entries.async_unload_platforms(entry, platforms):
         if entry.entry_id in hass.data[DOMAIN]:
             hass.data[DOMAIN].pop(entry.entry_id)
             _LOGGER.debug("eedomus integration unloaded")
@@ -512,6 +589,7 @@ async def async_load_mapping(hass, config_dir):
     import yaml
     from homeassistant.helpers import config_validation as cv
     from .const import YAML_MAPPING_SCHEMA, CONF_CUSTOM_DEVICES
+    from .device_mapping import CUSTOM_MAPPING_CONFIG_FILE
     
     default_path = os.path.join(config_dir, "device_mapping.yaml")
     custom_path = os.path.join(config_dir, "custom_mapping.yaml")
@@ -536,7 +614,10 @@ async def async_load_mapping(hass, config_dir):
     # Load custom mapping using async executor to avoid blocking event loop
     custom_mapping = {}
     try:
-        custom_path = os.path.join(os.path.dirname(__file__), "config", "custom_mapping.yaml")
+        custom_path = os.path.join(config_dir, CUSTOM_MAPPING_CONFIG_FILE)
+        if not await hass.async_add_executor_job(os.path.exists, custom_path):
+            # Not saved from the options yet: the file of the integration
+            custom_path = os.path.join(os.path.dirname(__file__), "config", "custom_mapping.yaml")
         custom_mapping = await hass.async_add_executor_job(
             lambda: yaml.safe_load(open(custom_path, "r", encoding="utf-8")) or {}
         )
@@ -578,16 +659,21 @@ async def async_save_custom_mapping(hass, config_dir, mapping_data):
     storage across Home Assistant restarts.
     """
     import yaml
-    custom_path = os.path.join(config_dir, "custom_mapping.yaml")
+    from .device_mapping import CUSTOM_MAPPING_CONFIG_FILE
+    # In the config dir, kept on upgrade; the coordinator reads it when the
+    # options update hot-reloads the mappings
+    custom_path = os.path.join(config_dir, CUSTOM_MAPPING_CONFIG_FILE)
 
-    try:
+    def _save():
         # Ensure directory exists
         os.makedirs(os.path.dirname(custom_path), exist_ok=True)
-
         with open(custom_path, "w", encoding="utf-8") as f:
             yaml.dump(mapping_data, f, default_flow_style=False, sort_keys=False, allow_unicode=True)
-            _LOGGER.info("Custom mapping saved to %s", custom_path)
-            return True
+
+    try:
+        await hass.async_add_executor_job(_save)
+        _LOGGER.info("Custom mapping saved to %s", custom_path)
+        return True
     except Exception as e:
         _LOGGER.error("Failed to save custom mapping: %s", e)
         return False
@@ -0,0 +1,411 @@
+"""Aggregation and mapping of the eedomus peripherals data.
+
+Pure functions over plain dicts and lists (no hass, no coordinator): the
+coordinator runs them in the executor so that thousands of peripherals do
+not block the event loop, or in worker processes for very large boxes
+(see `map_in_processes`).
+"""
+
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from . import entity
+from .entity import map_device_to_ha_entity
+from .mapping_registry import clear_mapping_registry, get_mapping_registry, import_mapping_registry
+
+_LOGGER = logging.getLogger(__name__)
+
+# Worker processes used when the process pool is enabled
+MAX_MAPPING_PROCESSES = 4
+
+# Fields every mapping sets on the peripheral data
+MAPPING_FIELDS = frozenset(("ha_entity", "ha_subtype", "justification"))
+
+# Platform bucket of the peripherals reporting a battery level
+BATTERY_BUCKET = "battery"
+
+
+def aggregate_peripherals(peripherals: list, value_list: list, caract: list) -> Dict[str, dict]:
+    """Merge the three API lists into one dict per peripheral (no mapping yet).
+
+    Building every peripheral before mapping any of them lets the mapping
+    look at children that come later in the lists.
+    """
+    peripherals_dict = {str(periph["periph_id"]): periph for periph in peripherals}
+    peripherals_value_dict = {str(item["periph_id"]): item for item in value_list}
+    peripherals_caract_dict = {str(it["periph_id"]): it for it in caract}
+
+    aggregated_data = {}
+    all_periph_ids = (
+        set(peripherals_dict.keys())
+        | set(peripherals_value_dict.keys())
+        | set(peripherals_caract_dict.keys())
+    )
+    for periph_id in all_periph_ids:
+        aggregated_data[periph_id] = {}
+        if periph_id in peripherals_dict:
+            aggregated_data[periph_id].update(peripherals_dict[periph_id])
+        if periph_id in peripherals_value_dict:
+            aggregated_data[periph_id].update(peripherals_value_dict[periph_id])
+        if periph_id in peripherals_caract_dict:
+            aggregated_data[periph_id].update(peripherals_caract_dict[periph_id])
+    return aggregated_data
+
+
+def build_parent_child_relations(aggregated_data: Dict[str, dict]) -> Dict[str, List[str]]:
+    """{parent_periph_id: [child periph_id]} over the whole aggregated data."""
+    parent_child_relations = {}
+    for periph_id, device_data in aggregated_data.items():
+        parent_id = device_data.get("parent_periph_id")
+        if parent_id:
+            parent_child_relations.setdefault(parent_id, []).append(periph_id)
+    return parent_child_relations
+
+
+def map_peripherals(
+    aggregated_data: Dict[str, dict],
+    parent_child_relations: Dict[str, List[str]],
+    yaml_config: Optional[dict],
+    periph_ids: Optional[Iterable[str]] = None,
+) -> Dict[str, dict]:
+    """Return the HA mapping of `periph_ids` (default: all), without applying it.
+
+    Mappings only depend on the raw API data of the other peripherals, so
+    disjoint slices can be mapped independently.
+    """
+    if periph_ids is None:
+        periph_ids = aggregated_data.keys()
+    return {
+        periph_id: map_device_to_ha_entity(
+            aggregated_data[periph_id],
+            aggregated_data,
+            yaml_config=yaml_config,
+            parent_child_relations=parent_child_relations,
+        )
+        for periph_id in periph_ids
+    }
+
+
+def aggregate_and_map(
+    peripherals: list, value_list: list, caract: list, yaml_config: Optional[dict]
+) -> Tuple[Dict[str, dict], Dict[str, dict], float, float]:
+    """Aggregate and map in one go (executor job of the first refresh).
+
+    Returns (aggregated_data, mappings, aggregation_seconds, mapping_seconds).
+    """
+    start = time.monotonic()
+    aggregated_data = aggregate_peripherals(peripherals, value_list, caract)
+    parent_child_relations = build_parent_child_relations(aggregated_data)
+    mapping_start = time.monotonic()
+    mappings = map_peripherals(aggregated_data, parent_child_relations, yaml_config)
+    for periph_id, mapping in mappings.items():
+        aggregated_data[periph_id].update(mapping)
+    return aggregated_data, mappings, mapping_start - start, time.monotonic() - mapping_start
+
+
+def remap_peripherals(
+    data: Dict[str, dict],
+    previous_mappings: Dict[str, dict],
+    yaml_config: Optional[dict],
+    periph_ids: Optional[Iterable[str]] = None,
+) -> Dict[str, dict]:
+    """Map again `periph_ids` (default: all) of already mapped data.
+
+    `data` is a copy of the coordinator data: the fields set by the previous
+    mapping (and the platform overrides) are dropped first, so rules see the
+    same API data as on the first refresh.
+    """
+    raw_data = {}
+    for periph_id, device_data in data.items():
+        stale = set(previous_mappings.get(periph_id, ())) | MAPPING_FIELDS
+        raw_data[periph_id] = {key: value for key, value in device_data.items() if key not in stale}
+    mappable = [
+        periph_id for periph_id in (raw_data if periph_ids is None else periph_ids)
+        if "periph_id" in raw_data.get(periph_id, ()) and "name" in raw_data[periph_id]
+    ]
+    return map_peripherals(raw_data, build_parent_child_relations(raw_data), yaml_config, mappable)
+
+
+def _map_slice_in_worker(aggregated_data, parent_child_relations, yaml_config, periph_ids):
+    """Worker process side: map a slice, return it with the mapping registry entries."""
+    clear_mapping_registry()  # the worker outlives one refresh
+    if entity.DEVICE_MAPPINGS is not yaml_config:
+        # Spawned worker: no coordinator installed them in this process
+        entity.install_device_mappings(yaml_config)
+    mappings = map_peripherals(aggregated_data, parent_child_relations, yaml_config, periph_ids)
+    return mappings, get_mapping_registry()
+
+
+def _mapping_workers() -> int:
+    return min(MAX_MAPPING_PROCESSES, os.cpu_count() or 1)
+
+
+def create_mapping_process_pool() -> ProcessPoolExecutor:
+    """Pool for `map_in_processes` ("spawn": forking the HA process is unsafe)."""
+    return ProcessPoolExecutor(
+        max_workers=_mapping_workers(),
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+
+
+async def map_in_processes(loop, pool: ProcessPoolExecutor, aggregated_data, yaml_config) -> Dict[str, dict]:
+    """Map the aggregated data in slices, one per worker process.
+
+    Each worker gets the whole data (mapping rules look at children) and
+    maps its slice; the mapping registry filled in the workers is copied
+    back so the mapping table still lists every peripheral.
+    """
+    parent_child_relations = build_parent_child_relations(aggregated_data)
+    periph_ids = list(aggregated_data)
+    size = -(-len(periph_ids) // _mapping_workers()) or 1
+    futures = [
+        loop.run_in_executor(
+            pool,
+            _map_slice_in_worker,
+            aggregated_data,
+            parent_child_relations,
+            yaml_config,
+            periph_ids[i:i + size],
+        )
+        for i in range(0, len(periph_ids), size)
+    ]
+    mappings = {}
+    for future in futures:
+        slice_mappings, entries = await future
+        mappings.update(slice_mappings)
+        import_mapping_registry(entries)
+    return mappings
+
+
+def children_by_parent(data: Dict[str, dict]) -> Dict[str, List[dict]]:
+    """{parent_periph_id: [child peripheral data]} in data order."""
+    children = {}
+    for periph in data.values():
+        parent_id = periph.get("parent_periph_id")
+        if parent_id:
+            children.setdefault(parent_id, []).append(periph)
+    return children
+
+
+# Children usage_id handled by the entity of their parent
+_LIGHT_CHANNEL_USAGE_ID = "1"
+_SLATS_USAGE_ID = "48"
+_CONSUMPTION_METER_USAGE_ID = "26"
+_CONTROL_USAGE_IDS = ("1", "2", "4", "52")
+_CONSUMPTION_KEYWORDS = ("consommation", "conso", "compteur", "meter", "energy")
+_DEVICE_KEYWORDS = ("decoration", "lampe", "light", "prise", "switch", "interrupteur", "appliance", "noel", "sapin")
+_CONTROLLABLE_DEVICE_KEYWORDS = (
+    "decoration", "anti-moustique", "sapin", "noel", "guirlande", "appliance", "appareil", "prise", "module", "relay",
+)
+
+
+def _is_consumption_monitor(periph: dict, children: List[dict]) -> bool:
+    """A "switch" that only reports consumption (name and children patterns)."""
+    name = periph.get("name", "").lower()
+    should_be_sensor = False
+    # Pattern 1: only consumption children (no control capable child) and a consumption name
+    if children and not any(child.get("usage_id") in _CONTROL_USAGE_IDS for child in children):
+        if any(keyword in name for keyword in _CONSUMPTION_KEYWORDS):
+            should_be_sensor = True
+    # Pattern 2: name contains "consommation" but no other device type
+    if "consommation" in name and not any(keyword in name for keyword in _DEVICE_KEYWORDS):
+        should_be_sensor = True
+    # Pattern 3: controllable devices with consumption monitoring remain switches
+    if any(keyword in name for keyword in _CONTROLLABLE_DEVICE_KEYWORDS):
+        should_be_sensor = False
+    return should_be_sensor
+
+
+def apply_platform_overrides(data: Dict[str, dict], children: Dict[str, List[dict]]) -> int:
+    """Mapping decisions depending on the final mapping of the parent.
+
+    Light channels are handled by their lamp, slats by their cover, and
+    consumption meters become energy sensors whatever their parent; switches
+    only reporting consumption become sensors. Each platform setup used to
+    apply its own part of these rules in turn. Returns the overridden count.
+    """
+    overridden = 0
+    for periph in data.values():
+        parent_id = periph.get("parent_periph_id")
+        if not parent_id:
+            continue
+        parent_entity = data.get(parent_id, {}).get("ha_entity")
+        usage_id = periph.get("usage_id")
+        mapping = None
+        if usage_id == _CONSUMPTION_METER_USAGE_ID:
+            mapping = {
+                "ha_entity": "sensor",
+                "ha_subtype": "energy",
+                "justification": "Energy consumption meter (usage_id=26)",
+            }
+        elif parent_entity == "light" and usage_id == _LIGHT_CHANNEL_USAGE_ID:
+            mapping = {
+                "ha_entity": "light",
+                "ha_subtype": "brightness",
+                "justification": "Parent is a light",
+            }
+        elif parent_entity == "cover" and usage_id == _SLATS_USAGE_ID:
+            mapping = {
+                "ha_entity": "cover",
+                "ha_subtype": "shutter",
+                "justification": "Parent is a cover - slats",
+            }
+        if mapping is not None:
+            periph.update(mapping)
+            overridden += 1
+
+    for periph_id, periph in data.items():
+        if periph.get("ha_entity") == "switch" and _is_consumption_monitor(periph, children.get(periph_id, [])):
+            _LOGGER.debug("Remapping switch '%s' (%s) as sensor - detected as consumption monitor",
+                          periph.get("name"), periph_id)
+            periph.update({
+                "ha_entity": "sensor",
+                "ha_subtype": "energy",
+                "justification": "Detected as consumption monitor based on name pattern and children",
+            })
+            overridden += 1
+    return overridden
+
+
+def build_platform_buckets(
+    data: Dict[str, dict], children: Dict[str, List[dict]]
+) -> Dict[str, List[Tuple[str, dict, List[dict]]]]:
+    """{ha_entity: [(periph_id, periph, children)]} in data order, in one pass.
+
+    Peripherals reporting a battery level are also listed under BATTERY_BUCKET.
+    """
+    buckets = {}
+    for periph_id, periph in data.items():
+        item = (periph_id, periph, children.get(periph_id, []))
+        buckets.setdefault(periph.get("ha_entity"), []).append(item)
+        if periph.get("battery"):
+            buckets.setdefault(BATTERY_BUCKET, []).append(item)
+    return buckets
+
+
+def diff_topology(
+    known_parents: Dict[str, Optional[str]], peripherals: list
+) -> Tuple[Set[str], Set[str], Set[str]]:
+    """Compare the known peripherals ({periph_id: parent_periph_id}) with a periph.list body.
+
+    Returns the (added, removed, re-parented) periph_ids. An empty list
+    (failed call) removes nothing.
+    """
+    listed = {
+        str(periph["periph_id"]): periph.get("parent_periph_id") or None
+        for periph in peripherals
+        if isinstance(periph, dict) and "periph_id" in periph
+    }
+    if not listed:
+        return set(), set(), set()
+    added = listed.keys() - known_parents.keys()
+    removed = known_parents.keys() - listed.keys()
+    moved = {
+        periph_id for periph_id, parent_id in listed.items()
+        if periph_id in known_parents and (known_parents[periph_id] or None) != parent_id
+    }
+    return set(added), set(removed), moved
+
+
+def index_caract(peripherals_caract: list) -> Tuple[Dict[str, dict], int]:
+    """{periph_id: caract} from a get_periph_caract body, flattening nested lists.
+
+    Returns the index and the number of nested lists found.
+    """
+    peripherals_caract_dict = {}
+    nested_structure_count = 0
+    for it in peripherals_caract:
+        if isinstance(it, dict) and 'periph_id' in it:
+            # Normal case: flat list of dicts
+            peripherals_caract_dict[str(it["periph_id"])] = it
+        elif isinstance(it, list):
+            # Nested case: list of lists - flatten it
+            nested_structure_count += 1
+            for sub_item in it:
+                if isinstance(sub_item, dict) and 'periph_id' in sub_item:
+                    peripherals_caract_dict[str(sub_item["periph_id"])] = sub_item
+                else:
+                    _LOGGER.error("❌ Invalid sub-item in nested structure: %s (type: %s)", sub_item, type(sub_item))
+        else:
+            _LOGGER.error("❌ CRITICAL BUG FIXED: Invalid peripheral data format: %s (type: %s)", it, type(it))
+    return peripherals_caract_dict, nested_structure_count
+
+
+def log_mapping_table(aggregated_data: Dict[str, dict]) -> None:
+    """Log the device mapping summary and table (shown once, at startup)."""
+    # Count device types for summary
+    device_types = {}
+    rgbw_lamps = 0
+    rgbw_children = 0
+    children_count = {}
+
+    for periph_id, periph_data in aggregated_data.items():
+        ha_entity = periph_data.get('ha_entity', '?')
+        ha_subtype = periph_data.get('ha_subtype', '?')
+        device_type = f"{ha_entity}:{ha_subtype}"
+        device_types[device_type] = device_types.get(device_type, 0) + 1
+
+        parent_id = periph_data.get('parent_periph_id')
+        if parent_id:
+            children_count[parent_id] = children_count.get(parent_id, 0) + 1
+        # Count RGBW devices
+        if ha_entity == 'light' and ha_subtype == 'rgbw':
+            rgbw_lamps += 1
+        elif parent_id and aggregated_data.get(parent_id, {}).get('ha_subtype') == 'rgbw':
+            rgbw_children += 1
+
+    # Display summary at INFO level (always visible)
+    _LOGGER.info("🗺️ Device Mapping Summary: %d total devices, %d unique types",
+                len(aggregated_data), len(device_types))
+    if rgbw_lamps > 0:
+        _LOGGER.info("🎨 RGBW Devices: %d lamps with %d brightness channels",
+                   rgbw_lamps, rgbw_children)
+
+    # Display enhanced mapping table at INFO level for complete visibility
+    _LOGGER.info("🗺️ Enhanced Device Mapping Table:")
+    _LOGGER.info("=" * 150)
+    _LOGGER.info("| Periph ID   | Device Name                          | Parent ID     | Type       | Subtype         | usage_id | PRODUCT_TYPE_ID | Justification                                  |")
+    _LOGGER.info("=" * 150)
+
+    for periph_id in sorted(aggregated_data.keys(), key=lambda x: aggregated_data[x].get('name', '').lower()):
+        periph_data = aggregated_data[periph_id]
+        parent_id = periph_data.get('parent_periph_id', 'None')
+        ha_entity = periph_data.get('ha_entity', '?')
+        ha_subtype = periph_data.get('ha_subtype', '?')
+        usage_id = periph_data.get('usage_id', '?')
+        product_type_id = periph_data.get('PRODUCT_TYPE_ID', '?')
+        device_name = periph_data.get('name', '?')
+
+        # Determine justification
+        is_rgbw_parent = (ha_entity == 'light' and ha_subtype == 'rgbw')
+        is_rgbw_child = (parent_id != 'None' and
+                        aggregated_data.get(parent_id, {}).get('ha_subtype') == 'rgbw')
+
+        if is_rgbw_parent:
+            justification = f"🎨 RGBW lamp detected ({children_count.get(periph_id, 0)} children)"
+        elif is_rgbw_child:
+            justification = f"🎨 RGBW child brightness channel (parent: {parent_id})"
+        else:
+            justification = f"{ha_entity}:{ha_subtype} mapping"
+
+        # Format the table row at INFO level
+        _LOGGER.info("| %-12s | %-35s | %-12s | %-10s | %-14s | %-8s | %-15s | %-45s |",
+                    periph_id,
+                    f"{device_name}",
+                    parent_id,
+                    ha_entity,
+                    ha_subtype,
+                    usage_id,
+                    product_type_id,
+                    justification)
+
+    _LOGGER.info("=" * 150)
+    _LOGGER.info(f"Total devices mapped: {len(aggregated_data)}")
+    _LOGGER.info("⚠️  Note: This table shows all devices with complete coordinator data")
+    _LOGGER.info("")
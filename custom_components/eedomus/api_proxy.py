@@ -1,5 +1,8 @@
+import asyncio
 import json
 import logging
+import re
+import time
 
 from aiohttp import web
 from homeassistant.components.http import HomeAssistantView
@@ -8,12 +11,40 @@ from .const import (
     CONF_API_HOST,
     CONF_API_PROXY_DISABLE_SECURITY,
     COORDINATOR,
+    DEFAULT_API_PROXY_ALLOWLIST,
+    DEFAULT_API_PROXY_MAX_CONCURRENCY,
     DOMAIN,
     PLATFORMS,
 )
 
 _LOGGER = logging.getLogger(__name__)
 
+# "services/<domain>/<service>"
+SERVICE_PATH = re.compile(r"^services/([^/]+)/([^/]+)/?$")
+
+
+def compile_allowlist(spec):
+    """Compile a "light.*, cover.close_cover" allowlist into O(1) lookups.
+
+    Returns (allow_all, allowed_domains, allowed_services). "*" allows every
+    service, "<domain>.*" every service of a domain.
+    """
+    if isinstance(spec, str):
+        spec = spec.split(",")
+    allow_all = False
+    domains = set()
+    services = set()
+    for item in (i.strip() for i in spec or []):
+        if not item:
+            continue
+        if item == "*":
+            allow_all = True
+        elif item.endswith(".*"):
+            domains.add(item[:-2])
+        else:
+            services.add(item)
+    return allow_all, frozenset(domains), frozenset(services)
+
 
 class EedomusApiProxyView(HomeAssistantView):
     requires_auth = False
@@ -21,13 +52,37 @@ class EedomusApiProxyView(HomeAssistantView):
     name = "api:eedomus:apiproxy"
 
     def __init__(
-        self, entry_id: str, allowed_ips: list = None, disable_security: bool = False
+        self,
+        entry_id: str,
+        allowed_ips: list = None,
+        disable_security: bool = False,
+        max_concurrency: int = DEFAULT_API_PROXY_MAX_CONCURRENCY,
+        async_mode: bool = False,
+        allowlist=DEFAULT_API_PROXY_ALLOWLIST,
     ):
         self.entry_id = entry_id
         self.allowed_ips = allowed_ips or []
         self.disable_security = disable_security
-
-    async def post(self, request, path: str):  # Ajoutez le paramètre path ici
+        self.max_concurrency = max(1, int(max_concurrency))
+        # Fire-and-forget: calls are queued and answered with 202
+        self.async_mode = async_mode
+        self._allow_all, self._allowed_domains, self._allowed_services = compile_allowlist(allowlist)
+        self._queue = None
+        self._workers = []
+        self.metrics = {
+            "queue_depth": 0,
+            "queue_depth_max": 0,
+            "enqueued": 0,
+            "processed": 0,
+            "failed": 0,
+            "rejected": 0,
+            "last_latency": 0.0,
+            "avg_latency": 0.0,
+            "max_latency": 0.0,
+        }
+
+    def _check_ip(self, request):
+        """Return a 403 response if the caller is not the eedomus box."""
         client_ip = request.remote
         _LOGGER.debug(f"Request from {client_ip}")
 
@@ -41,19 +96,54 @@ class EedomusApiProxyView(HomeAssistantView):
             _LOGGER.warning(
                 f"SECURITY WARNING: IP validation disabled for debugging. Request from {client_ip}"
             )
+        return None
+
+    def is_allowed(self, domain: str, service: str) -> bool:
+        """Check a service against the precompiled allowlist."""
+        return (
+            self._allow_all
+            or domain in self._allowed_domains
+            or f"{domain}.{service}" in self._allowed_services
+        )
+
+    async def get(self, request, path: str):
+        """Expose the async dispatch queue metrics (GET .../apiproxy/metrics)."""
+        if (denied := self._check_ip(request)) is not None:
+            return denied
+        if path != "metrics":
+            return web.Response(text="Invalid path", status=400)
+        self.metrics["queue_depth"] = self._queue.qsize() if self._queue else 0
+        return web.json_response(self.metrics)
+
+    async def post(self, request, path: str):  # Ajoutez le paramètre path ici
+        if (denied := self._check_ip(request)) is not None:
+            return denied
 
         hass = request.app["hass"]
         try:
             # 1. Parse JSON
             data = await request.json()
 
+            # Batch: a JSON array of service calls in a single request
+            if path == "batch":
+                if self.async_mode:
+                    return self._enqueue_batch(hass, data)
+                return await self._handle_batch(hass, data)
+
             # 2. Extract domain and service from path (e.g., "services/light/turn_on")
-            parts = path.split("/")
-            if len(parts) < 3 or parts[0] != "services":
+            match = SERVICE_PATH.match(path)
+            if match is None:
                 return web.Response(text="Invalid path", status=400)
 
-            domain = parts[1]
-            service = parts[2]
+            domain, service = match.groups()
+            if not self.is_allowed(domain, service):
+                self.metrics["rejected"] += 1
+                _LOGGER.warning("Service %s.%s is not in the API proxy allowlist", domain, service)
+                return web.Response(text="Service not allowed", status=403)
+
+            if self.async_mode:
+                self._enqueue(hass, domain, service, data)
+                return web.Response(text="Accepted", status=202)
 
             # 3. Call the Home Assistant service
             await hass.services.async_call(domain, service, data)
@@ -67,3 +157,95 @@ class EedomusApiProxyView(HomeAssistantView):
         except Exception as e:
             _LOGGER.error("Webhook error: %s", str(e), exc_info=True)
             return web.Response(text="Internal error", status=500)
+
+    def _enqueue(self, hass, domain, service, data):
+        """Queue a service call for the workers, starting them on first use."""
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+            self._workers = [
+                hass.async_create_background_task(
+                    self._async_worker(hass), f"{DOMAIN}_api_proxy_worker_{i}"
+                )
+                for i in range(self.max_concurrency)
+            ]
+        self._queue.put_nowait((time.monotonic(), domain, service, data))
+        self.metrics["enqueued"] += 1
+        depth = self._queue.qsize()
+        self.metrics["queue_depth"] = depth
+        self.metrics["queue_depth_max"] = max(self.metrics["queue_depth_max"], depth)
+
+    def _enqueue_batch(self, hass, calls):
+        """Validate a batch then queue each call; answer 202 with the count."""
+        if not isinstance(calls, list):
+            return web.Response(text="Batch body must be a JSON array", status=400)
+        for call in calls:
+            if not isinstance(call, dict) or not call.get("domain") or not call.get("service"):
+                return web.Response(text="Missing domain or service", status=400)
+            if not self.is_allowed(call["domain"], call["service"]):
+                self.metrics["rejected"] += 1
+                return web.Response(text="Service not allowed", status=403)
+        for call in calls:
+            self._enqueue(hass, call["domain"], call["service"], call.get("data") or {})
+        return web.json_response({"queued": len(calls)}, status=202)
+
+    async def _async_worker(self, hass):
+        """Run queued service calls and record their latency."""
+        while True:
+            queued_at, domain, service, data = await self._queue.get()
+            try:
+                await hass.services.async_call(domain, service, data, blocking=True)
+                self.metrics["processed"] += 1
+                _LOGGER.info(f"Service {domain}.{service} called with data: {data}")
+            except Exception as e:
+                self.metrics["failed"] += 1
+                _LOGGER.warning("Queued service %s.%s failed: %s", domain, service, e)
+            finally:
+                latency = time.monotonic() - queued_at
+                done = self.metrics["processed"] + self.metrics["failed"]
+                self.metrics["last_latency"] = latency
+                self.metrics["avg_latency"] += (latency - self.metrics["avg_latency"]) / done
+                self.metrics["max_latency"] = max(self.metrics["max_latency"], latency)
+                self.metrics["queue_depth"] = self._queue.qsize()
+                self._queue.task_done()
+
+    async def _handle_batch(self, hass, calls):
+        """Run a list of {"domain", "service", "data"} calls concurrently.
+
+        At most max_concurrency calls run at the same time. The response holds
+        one result per call, in the order of the request.
+        """
+        if not isinstance(calls, list):
+            return web.Response(text="Batch body must be a JSON array", status=400)
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def run_call(index, call):
+            result = {"index": index}
+            if not isinstance(call, dict) or not call.get("domain") or not call.get("service"):
+                result.update(success=False, error="Missing domain or service")
+                return result
+            domain = call["domain"]
+            service = call["service"]
+            result.update(domain=domain, service=service)
+            if not self.is_allowed(domain, service):
+                self.metrics["rejected"] += 1
+                result.update(success=False, error="Service not allowed")
+                return result
+            async with semaphore:
+                try:
+                    await hass.services.async_call(domain, service, call.get("data") or {}, blocking=True)
+                    result["success"] = True
+                except Exception as e:
+                    _LOGGER.warning("Batch call %s.%s failed: %s", domain, service, e)
+                    result.update(success=False, error=str(e))
+            return result
+
+        results = await asyncio.gather(
+            *(run_call(index, call) for index, call in enumerate(calls))
+        )
+        _LOGGER.info(
+            "Batch of %d service calls executed (%d failed)",
+            len(results),
+            sum(1 for r in results if not r["success"]),
+        )
+        return web.json_response({"results": results})
@@ -0,0 +1,176 @@
+"""Record eedomus API responses and replay them offline.
+
+The recorder captures what EedomusClient.fetch_data receives (credentials are
+redacted with the same helpers used for logging) into a JSON fixture. The
+replay session is a drop-in for the aiohttp session given to EedomusClient:
+it answers from a fixture with the recorded status, body and latency, so a
+production payload can be fed through the coordinator locally.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+_LOGGER = logging.getLogger(__name__)
+
+RECORDING_VERSION = 1
+# Entries kept in memory before the recorder stops on its own
+DEFAULT_MAX_ENTRIES = 5000
+# Parameters that change on every call and must not prevent a replay match
+VOLATILE_PARAMS = {"api_user", "api_secret", "start", "end"}
+
+
+def request_endpoint(url: str, params: Optional[Dict[str, Any]] = None) -> str:
+    """Return the API action of a request (from the URL first, then the params)."""
+    query = parse_qs(urlsplit(url).query)
+    if "action" in query:
+        return query["action"][0]
+    return str((params or {}).get("action", ""))
+
+
+def request_key(endpoint: str, params: Optional[Dict[str, Any]] = None) -> str:
+    """Stable key of a request, ignoring credentials and time bounds."""
+    stable = {
+        str(k): str(v) for k, v in (params or {}).items() if k not in VOLATILE_PARAMS
+    }
+    return f"{endpoint}?{json.dumps(stable, sort_keys=True)}"
+
+
+class ApiRecorder:
+    """Collect API exchanges in memory; save() writes the fixture file."""
+
+    def __init__(self, path: str, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.entries: List[Dict[str, Any]] = []
+        self.started_at = datetime.now().isoformat()
+        self._start = time.monotonic()
+        self.full = False
+
+    def record(
+        self,
+        endpoint: str,
+        url: str,
+        params: Dict[str, Any],
+        status: int,
+        body: str,
+        elapsed: float,
+    ) -> None:
+        """Store one exchange. `url` and `params` must already be redacted."""
+        if len(self.entries) >= self.max_entries:
+            if not self.full:
+                self.full = True
+                _LOGGER.warning(
+                    "⏺️ API recording limit reached (%d entries), further calls are not recorded",
+                    self.max_entries,
+                )
+            return
+        self.entries.append(
+            {
+                "endpoint": endpoint,
+                # Path only: the box address is not needed to replay
+                "path": urlsplit(url).path,
+                "params": params,
+                "status": status,
+                "offset": round(time.monotonic() - self._start - elapsed, 4),
+                "elapsed": round(elapsed, 4),
+                "body": body,
+            }
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "version": RECORDING_VERSION,
+            "started_at": self.started_at,
+            "entries": self.entries,
+        }
+
+    def save(self) -> str:
+        """Write the fixture (blocking I/O, run it in an executor)."""
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=1)
+        _LOGGER.info("⏺️ %d API responses recorded to %s", len(self.entries), self.path)
+        return self.path
+
+
+def load_recording(path: str) -> Dict[str, Any]:
+    """Read a fixture written by ApiRecorder.save() (blocking I/O)."""
+    with open(path, "r", encoding="utf-8") as f:
+        recording = json.load(f)
+    if recording.get("version") != RECORDING_VERSION:
+        raise ValueError(f"Unsupported recording version: {recording.get('version')}")
+    return recording
+
+
+class _ReplayResponse:
+    """Minimal aiohttp response: status and read()."""
+
+    def __init__(self, entry: Optional[Dict[str, Any]], delay: float):
+        self._entry = entry
+        self._delay = delay
+        self.status = entry["status"] if entry else 404
+
+    async def __aenter__(self):
+        if self._delay > 0:
+            await asyncio.sleep(self._delay)
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def read(self) -> bytes:
+        if self._entry is None:
+            return b"No recorded response"
+        return self._entry["body"].encode("utf-8")
+
+
+class ReplaySession:
+    """Stand-in for aiohttp.ClientSession answering from a recording.
+
+    Requests are matched on action and parameters (credentials and history
+    time bounds ignored), in recording order. When every matching entry has
+    been used, the last one is served again so refresh loops can run longer
+    than the recording. `speed` divides the recorded latencies (0 = no delay).
+    """
+
+    def __init__(self, recording: Dict[str, Any], speed: float = 1.0):
+        self.speed = speed
+        self.closed = False
+        self.requests = 0
+        self._by_key: Dict[str, List[Dict[str, Any]]] = {}
+        self._by_endpoint: Dict[str, List[Dict[str, Any]]] = {}
+        self._used: Dict[int, bool] = {}
+        for entry in recording.get("entries", []):
+            self._by_key.setdefault(request_key(entry["endpoint"], entry["params"]), []).append(entry)
+            self._by_endpoint.setdefault(entry["endpoint"], []).append(entry)
+
+    @classmethod
+    def from_file(cls, path: str, speed: float = 1.0) -> "ReplaySession":
+        return cls(load_recording(path), speed)
+
+    def _next(self, candidates: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        for entry in candidates:
+            if not self._used.get(id(entry)):
+                self._used[id(entry)] = True
+                return entry
+        return candidates[-1] if candidates else None
+
+    def get(self, url: str, params: Optional[Dict[str, Any]] = None) -> _ReplayResponse:
+        self.requests += 1
+        endpoint = request_endpoint(url, params)
+        entry = self._next(self._by_key.get(request_key(endpoint, params), []))
+        if entry is None:
+            entry = self._next(self._by_endpoint.get(endpoint, []))
+        if entry is None:
+            _LOGGER.warning("No recorded response for %s", endpoint)
+        delay = entry["elapsed"] / self.speed if entry and self.speed else 0
+        return _ReplayResponse(entry, delay)
+
+    async def close(self) -> None:
+        self.closed = True
@@ -14,6 +14,8 @@ from homeassistant.core import HomeAssistant
 
 from .const import DOMAIN, COORDINATOR
 from .entity import EedomusEntity
+from .metrics import timed_platform_setup
+from .platform_entities import build_entities, tracked_platform_setup
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -33,93 +35,25 @@ EEDOMUS_TO_HA_DEVICE_CLASS = {
 }
 
 
+def _binary_sensor_entities(coordinator, periph_id, periph, children):
+    """Create the binary sensor entity of a peripheral."""
+    _LOGGER.debug(
+        "Creating binary sensor entity for %s (%s)", periph["name"], periph_id
+    )
+    return [EedomusBinarySensor(coordinator, periph_id)]
+
+
+ENTITY_FACTORIES = {"binary_sensor": _binary_sensor_entities}
+
+
+@timed_platform_setup("binary_sensor")
+@tracked_platform_setup("binary_sensor", ENTITY_FACTORIES)
 async def async_setup_entry(
     hass: HomeAssistant, entry: ConfigEntry, async_add_entities
 ):
     """Set up eedomus binary sensor entities."""
-    from .entity import map_device_to_ha_entity
-
     coordinator = hass.data[DOMAIN][entry.entry_id][COORDINATOR]
-    binary_sensors = []
-
-    all_peripherals = coordinator.get_all_peripherals()
-
-    # First pass: ensure all peripherals have proper mapping
-    for periph_id, periph in all_peripherals.items():
-        if "ha_entity" not in coordinator.data[periph_id]:
-            eedomus_mapping = map_device_to_ha_entity(periph, coordinator.data, coordinator=coordinator)
-            coordinator.data[periph_id].update(eedomus_mapping)
-            # S'assurer que le mapping est enregistré dans le registre global
-            from .entity import _register_device_mapping
-            # Log pour confirmer que le device a été mappé
-            _LOGGER.debug("✅ Device mapped: %s (%s) → %s:%s", 
-                        periph["name"], periph_id, eedomus_mapping["ha_entity"], eedomus_mapping["ha_subtype"])
-            _register_device_mapping(eedomus_mapping, periph["name"], periph_id, periph)
-
-    # Handle parent-child relationships for motion sensors
-    parent_to_children = {}
-    for periph_id, periph in all_peripherals.items():
-        parent_id = periph.get("parent_periph_id")
-        if parent_id:
-            if parent_id not in parent_to_children:
-                parent_to_children[parent_id] = []
-            parent_to_children[parent_id].append(periph)
-
-    # Map children of motion sensors to appropriate entities
-    for parent_id, children in parent_to_children.items():
-        if (
-            parent_id in coordinator.data
-            and coordinator.data[parent_id].get("ha_entity") == "binary_sensor"
-        ):
-            for child in children:
-                child_id = child["periph_id"]
-                if (
-                    child_id not in coordinator.data
-                    or "ha_entity" not in coordinator.data[child_id]
-                ):
-                    eedomus_mapping = None
-
-                    # Map children based on their usage_id
-                    if child.get("usage_id") == "7":  # Temperature sensor
-                        eedomus_mapping = {
-                            "ha_entity": "sensor",
-                            "ha_subtype": "temperature",
-                            "justification": "Child of motion sensor - temperature",
-                        }
-                    elif child.get("usage_id") == "24":  # Illuminance sensor
-                        eedomus_mapping = {
-                            "ha_entity": "sensor",
-                            "ha_subtype": "illuminance",
-                            "justification": "Child of motion sensor - illuminance",
-                        }
-                    elif child.get("usage_id") == "36":  # Flood sensor
-                        eedomus_mapping = {
-                            "ha_entity": "binary_sensor",
-                            "ha_subtype": "flood",
-                            "justification": "Child of motion sensor - flood",
-                        }
-
-                    if eedomus_mapping is not None:
-                        coordinator.data[child_id].update(eedomus_mapping)
-                        _LOGGER.info(
-                            "Mapped child sensor for motion device %s (%s)",
-                            child["name"],
-                            child_id,
-                        )
-
-    # Second pass: create binary sensor entities
-    for periph_id, periph in all_peripherals.items():
-        ha_entity = coordinator.data[periph_id].get("ha_entity")
-
-        if ha_entity != "binary_sensor":
-            continue
-
-        _LOGGER.debug(
-            "Creating binary sensor entity for %s (%s)", periph["name"], periph_id
-        )
-        binary_sensors.append(EedomusBinarySensor(coordinator, periph_id))
-
-    async_add_entities(binary_sensors, True)
+    async_add_entities(build_entities(coordinator, ENTITY_FACTORIES), True)
 
 
 class EedomusBinarySensor(EedomusEntity, BinarySensorEntity):
@@ -198,5 +132,6 @@ class EedomusBinarySensor(EedomusEntity, BinarySensorEntity):
             attrs["history"] = periph_data["history"]
         if "value_list" in periph_data:
             attrs["value_list"] = periph_data["value_list"]
+        attrs.update(self._data_age_attributes())
 
         return attrs
@@ -0,0 +1,121 @@
+"""Circuit breaker around the eedomus box.
+
+The box reboots (nightly updates) or stops answering for minutes at a
+time. Without a breaker every request of every refresh cycle waits for the
+full HTTP timeout. After a few consecutive failures (timeouts, connection
+errors, 5xx answers or answers slower than the slow-call threshold) the
+circuit opens: requests fail immediately and the coordinator serves the
+last known data marked as stale. Once the open delay has elapsed the
+circuit is half-open and a single cheap probe (``auth.test``, short
+timeout) decides whether it closes again or stays open for a longer delay
+(exponential backoff).
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from typing import Any, Dict, Optional
+
+_LOGGER = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+FAILURE_THRESHOLD = 3  # Consecutive failures opening the circuit
+SLOW_CALL_RATIO = 0.8  # Answers slower than this share of the HTTP timeout count as failures
+OPEN_DELAY = 15.0  # Seconds before the first probe
+MAX_OPEN_DELAY = 300.0  # Backoff limit between two probes
+PROBE_TIMEOUT = 3.0  # The probe is cheap: a healthy box answers well within this
+
+
+class CircuitBreaker:
+    """Closed / open / half-open state of the box, from the request outcomes."""
+
+    def __init__(
+        self,
+        slow_call_threshold: float,
+        failure_threshold: int = FAILURE_THRESHOLD,
+        open_delay: float = OPEN_DELAY,
+        max_open_delay: float = MAX_OPEN_DELAY,
+        clock=time.monotonic,
+    ):
+        """Initialize the breaker (delays in seconds)."""
+        self.slow_call_threshold = slow_call_threshold
+        self.failure_threshold = failure_threshold
+        self.open_delay = open_delay
+        self.max_open_delay = max_open_delay
+        self._clock = clock
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self._current_delay = open_delay
+        self._opened_at: Optional[float] = None
+        self._next_probe_at = 0.0
+        self.last_failure: Optional[str] = None
+        # Cumulative counters exported by the diagnostics
+        self.open_count = 0
+        self.probe_count = 0
+
+    @property
+    def is_closed(self) -> bool:
+        return self.state == CLOSED
+
+    def probe_due(self) -> bool:
+        """True when the circuit is open and its delay has elapsed: time to probe."""
+        return self.state == OPEN and self._clock() >= self._next_probe_at
+
+    def start_probe(self) -> None:
+        self.state = HALF_OPEN
+        self.probe_count += 1
+
+    def record_success(self, latency: float) -> None:
+        """Record an answer of the box; slow answers count as failures."""
+        if latency > self.slow_call_threshold:
+            self.record_failure(f"slow answer ({latency:.1f}s)")
+            return
+        if self.state != CLOSED:
+            _LOGGER.info(
+                "✅ eedomus box reachable again after %.0fs, resuming requests",
+                self._clock() - (self._opened_at or self._clock()),
+            )
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self._current_delay = self.open_delay
+        self._opened_at = None
+
+    def record_failure(self, reason: str) -> None:
+        """Record a failed request (timeout, connection error, 5xx, slow answer)."""
+        self.consecutive_failures += 1
+        self.last_failure = reason
+        if self.state == HALF_OPEN:
+            # Failed probe: wait longer before the next one
+            self._current_delay = min(self._current_delay * 2, self.max_open_delay)
+            self._open()
+            _LOGGER.debug("eedomus box still unreachable (%s), next probe in %.0fs", reason, self._current_delay)
+        elif self.state == CLOSED and self.consecutive_failures >= self.failure_threshold:
+            self.open_count += 1
+            self._opened_at = self._clock()
+            self._open()
+            _LOGGER.warning(
+                "⛔ eedomus box unreachable (%d consecutive failures, last: %s): "
+                "serving last known data, first probe in %.0fs",
+                self.consecutive_failures, reason, self._current_delay,
+            )
+
+    def _open(self) -> None:
+        self.state = OPEN
+        self._next_probe_at = self._clock() + self._current_delay
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Snapshot for the diagnostics."""
+        now = self._clock()
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "last_failure": self.last_failure,
+            "open_for": round(now - self._opened_at, 1) if self._opened_at is not None else None,
+            "next_probe_in": round(max(self._next_probe_at - now, 0.0), 1) if self.state == OPEN else None,
+            "open_count": self.open_count,
+            "probe_count": self.probe_count,
+        }
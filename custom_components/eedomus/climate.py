@@ -15,40 +15,30 @@ from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
 from .const import DOMAIN, COORDINATOR
-from .entity import EedomusEntity, map_device_to_ha_entity
+from .entity import EedomusEntity
+from .metrics import timed_platform_setup
+from .platform_entities import build_entities, tracked_platform_setup
 
 _LOGGER = logging.getLogger(__name__)
 
 
+def _climate_entities(coordinator, periph_id, periph, children):
+    """Create the climate entity of a peripheral."""
+    _LOGGER.debug("Creating climate entity for %s (%s)", periph["name"], periph_id)
+    return [EedomusClimate(coordinator, periph_id)]
+
+
+ENTITY_FACTORIES = {"climate": _climate_entities}
+
+
+@timed_platform_setup("climate")
+@tracked_platform_setup("climate", ENTITY_FACTORIES)
 async def async_setup_entry(
     hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback
 ) -> None:
     """Set up eedomus climate entities."""
     coordinator = hass.data[DOMAIN][entry.entry_id][COORDINATOR]
-    climates = []
-
-    all_peripherals = coordinator.get_all_peripherals()
-
-    # First pass: ensure all peripherals have proper mapping
-    for periph_id, periph in all_peripherals.items():
-        if "ha_entity" not in coordinator.data[periph_id]:
-            eedomus_mapping = map_device_to_ha_entity(periph, coordinator.data, coordinator=coordinator)
-            coordinator.data[periph_id].update(eedomus_mapping)
-            # S'assurer que le mapping est enregistré dans le registre global
-            from .entity import _register_device_mapping
-            _register_device_mapping(eedomus_mapping, periph["name"], periph_id, periph)
-
-    # Second pass: create climate entities
-    for periph_id, periph in all_peripherals.items():
-        ha_entity = coordinator.data[periph_id].get("ha_entity")
-
-        if ha_entity != "climate":
-            continue
-
-        _LOGGER.debug("Creating climate entity for %s (%s)", periph["name"], periph_id)
-        climates.append(EedomusClimate(coordinator, periph_id))
-
-    async_add_entities(climates, True)
+    async_add_entities(build_entities(coordinator, ENTITY_FACTORIES), True)
 
 
 class EedomusClimate(EedomusEntity, ClimateEntity):
@@ -182,6 +172,7 @@ class EedomusClimate(EedomusEntity, ClimateEntity):
         except Exception as e:
             _LOGGER.debug("Failed to generate extra state attributes: %s", e)
             attrs["error"] = "Failed to generate attributes"
+        attrs.update(self._data_age_attributes())
         
         return attrs
 
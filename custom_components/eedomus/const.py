@@ -39,6 +39,11 @@ CONF_ENABLE_SET_VALUE_RETRY = "enable_set_value_retry"
 CONF_ENABLE_WEBHOOK = "enable_webhook"
 CONF_REMOVE_ENTITIES = "remove_entities"
 CONF_HTTP_REQUEST_TIMEOUT = "http_request_timeout"
+CONF_API_PROXY_MAX_CONCURRENCY = "api_proxy_max_concurrency"
+CONF_API_PROXY_ASYNC = "api_proxy_async"
+CONF_API_PROXY_ALLOWLIST = "api_proxy_allowlist"
+CONF_LOOP_LAG_MONITOR = "loop_lag_monitor"
+CONF_MAPPING_PROCESS_POOL_THRESHOLD = "mapping_process_pool_threshold"
 
 
 CONF_PHP_FALLBACK_ENABLED = "php_fallback_enabled"
@@ -67,6 +72,21 @@ DEFAULT_PHP_FALLBACK_ENABLED = False  # PHP fallback disabled by default
 DEFAULT_PHP_FALLBACK_SCRIPT_NAME = "fallback.php"  # Default script name
 DEFAULT_PHP_FALLBACK_TIMEOUT = 5  # 5 seconds timeout for PHP fallback script
 DEFAULT_HTTP_REQUEST_TIMEOUT = 10  # 10 seconds timeout for HTTP requests to eedomus API
+DEFAULT_API_PROXY_MAX_CONCURRENCY = 4  # Service calls run in parallel by an API proxy batch
+DEFAULT_API_PROXY_ASYNC = False  # Wait for the service call before answering the box
+DEFAULT_API_PROXY_ALLOWLIST = "*"  # Comma-separated "domain.service" / "domain.*", "*" = all
+DEFAULT_LOOP_LAG_MONITOR = False  # Diagnostic: sample event loop stalls per refresh phase
+DEFAULT_MAPPING_PROCESS_POOL_THRESHOLD = 0  # Map in worker processes from this many peripherals, 0 = executor thread only
+
+# History gap tracking (persisted in .storage)
+HISTORY_GAPS_STORAGE_KEY = "eedomus.history_gaps"
+HISTORY_GAPS_STORAGE_VERSION = 1
+HISTORY_GAPS_SAVE_DELAY = 600  # Write coverage at most every 10 minutes (and on shutdown)
+
+# History retry backoff: 15 min doubling per failure, capped by history_retry_delay_hours
+HISTORY_RETRY_BASE_DELAY = 900
+HISTORY_RETRY_JITTER = 0.2  # +/- 20% so peripherals failing together spread out
+HISTORY_RETRY_MAX_PER_CYCLE = 3  # Peripherals retried per timer wake-up
 
 # Platforms
 PLATFORMS = [
@@ -107,6 +127,13 @@ EEDOMUS_TO_HA_ATTR_MAPPING = {
 # Domain
 DOMAIN = "eedomus"
 COORDINATOR = "coordinator"
+# Entry data key: options the entry was set up with (see async_update_listener)
+SETUP_OPTIONS = "setup_options"
+
+# Dispatcher signal sent when history diagnostics (errors, completed) change
+SIGNAL_HISTORY_DIAGNOSTICS = f"{DOMAIN}_history_diagnostics"
+# hass.data key set once the (shared) metrics view is registered
+DATA_METRICS_VIEW = f"{DOMAIN}_metrics_view"
 
 
 # Device classes for sensors
@@ -152,6 +179,8 @@ CLASS_MAPPING: Dict[str, Dict[str, Any]] = {
 CONF_USE_YAML = "edit_custom_mapping"
 CONF_CUSTOM_DEVICES = "custom_devices"
 CONF_YAML_CONTENT = "yaml_content"
+# Options only holding the custom mapping: changing them hot-reloads the mappings
+MAPPING_OPTIONS = (CONF_USE_YAML, CONF_CUSTOM_DEVICES, CONF_YAML_CONTENT)
 
 # Device Mapping Schema
 DEVICE_SCHEMA = vol.Schema({
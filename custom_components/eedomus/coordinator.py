@@ -4,27 +4,73 @@ from __future__ import annotations
 
 import asyncio
 import logging
+import time
+from contextlib import contextmanager, nullcontext
 from datetime import datetime, timedelta
 
-from homeassistant.core import HomeAssistant, State
+from homeassistant.const import Platform
+from homeassistant.core import HomeAssistant, State, callback
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 from homeassistant.helpers import service
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.storage import Store
 
 from .const import (
     CONF_ENABLE_HISTORY,
     CONF_HISTORY_RETRY_DELAY,
+    CONF_HISTORY_PERIPHERALS_PER_SCAN,
     CONF_ENABLE_SET_VALUE_RETRY,
     CONF_PHP_FALLBACK_ENABLED,
     CONF_PHP_FALLBACK_SCRIPT_NAME,
     CONF_PHP_FALLBACK_TIMEOUT,
     DEFAULT_ENABLE_SET_VALUE_RETRY,
+    DEFAULT_HISTORY_PERIPHERALS_PER_SCAN,
+    DEFAULT_HISTORY_RETRY_DELAY,
+    DEFAULT_HTTP_REQUEST_TIMEOUT,
+    DEFAULT_MAPPING_PROCESS_POOL_THRESHOLD,
     DEFAULT_PHP_FALLBACK_ENABLED,
     DEFAULT_PHP_FALLBACK_SCRIPT_NAME,
     DEFAULT_PHP_FALLBACK_TIMEOUT,
     DEFAULT_SCAN_INTERVAL,
     DOMAIN,
+    HISTORY_GAPS_SAVE_DELAY,
+    HISTORY_GAPS_STORAGE_KEY,
+    HISTORY_GAPS_STORAGE_VERSION,
+    HISTORY_RETRY_BASE_DELAY,
+    HISTORY_RETRY_JITTER,
+    HISTORY_RETRY_MAX_PER_CYCLE,
+    PLATFORMS,
+    SIGNAL_HISTORY_DIAGNOSTICS,
 )
-from .entity import EedomusEntity, map_device_to_ha_entity
+from .aggregation import (
+    aggregate_and_map,
+    aggregate_peripherals,
+    apply_platform_overrides,
+    build_parent_child_relations,
+    build_platform_buckets,
+    children_by_parent,
+    create_mapping_process_pool,
+    diff_topology,
+    index_caract,
+    log_mapping_table,
+    map_in_processes,
+    map_peripherals,
+    remap_peripherals,
+)
+from .device_mapping import CUSTOM_MAPPING_CONFIG_FILE, load_compiled_mappings
+from .entity import EedomusEntity, install_device_mappings, map_device_to_ha_entity
+from .history_gaps import HistoryGapTracker, history_entry_timestamp
+from .loop_monitor import LoopLagMonitor
+from .mapping_registry import unregister_device_mapping
+from .metrics import LatencyHistogram, LatencyTracker, StartupTimeline
+from .platform_entities import PlatformEntities
+from .history_window import (
+    BOOTSTRAP_LOOKBACK_SECONDS,
+    HISTORY_MAX_POINTS,
+    HistoryWindowSizer,
+)
+from .retry_scheduler import HistoryRetryScheduler
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -50,8 +96,25 @@ class EedomusDataUpdateCoordinator(DataUpdateCoordinator):
         self._history_progress = (
             {}
         )  # Format: {periph_id: {"last_timestamp": int, "completed": bool}}
-        self._retry_queue = {}  # {periph_id: {"error_time": timestamp, "retry_after": timestamp, "error_message": str, "attempts": int}}
-        self._error_count = {}   # {periph_id: int}
+        self._retry_queue = HistoryRetryScheduler(  # Failed peripherals, heap ordered by retry_after
+            base_delay=HISTORY_RETRY_BASE_DELAY,
+            max_delay=DEFAULT_HISTORY_RETRY_DELAY * 3600,
+            jitter=HISTORY_RETRY_JITTER,
+        )
+        self._history_retry_unsub = None  # Timer armed for the next due retry
+        self._history_retry_due = None
+        self._history_completed_count = 0  # Maintained incrementally for diagnostics
+        self._history_diagnostics_snapshot = None
+        self._periph_listeners = {}  # {periph_id: [callback]} notified by webhook push updates
+        self._refresh_lock = asyncio.Lock()  # Never run two refreshes at once
+        self._pending_refresh = None  # None, "partial" or "full" (queued webhook refresh)
+        self._refresh_drain_task = None
+        self._history_gaps = HistoryGapTracker()  # Missing [start, end] windows per peripheral
+        self._history_gaps_store = None
+        self._history_gaps_save_scheduled = False
+        self._history_windows = HistoryWindowSizer(  # Adaptive [start, end] per history request
+            getattr(client, "http_request_timeout", DEFAULT_HTTP_REQUEST_TIMEOUT)
+        )
         self._scan_interval = scan_interval
         
         # Timing metrics for performance monitoring
@@ -59,7 +122,33 @@ class EedomusDataUpdateCoordinator(DataUpdateCoordinator):
         self._last_processing_time = 0.0
         self._last_refresh_time = 0.0
         self._last_processed_devices = 0
-        self._refresh_timing_history = []  # Store last 10 refresh times for analysis
+        # Rolling latency histograms (p50/p95/p99) kept across refreshes
+        self._endpoint_latency = LatencyTracker()  # per API endpoint
+        self._refresh_latency = LatencyTracker()  # per refresh type: full/partial/set/history
+        self._mapping_latency = LatencyHistogram()  # mapping phase of the initial load
+        # Cumulative counters exported by the metrics view
+        self._set_value_counts = {"retries": 0, "php_fallback": 0, "php_fallback_failed": 0}
+        self._entity_update_count = 0  # Entity state refreshes triggered by the coordinator
+        # Replaced by the one started in async_setup_entry, to time the whole setup
+        self._startup_timeline = StartupTimeline()
+        self._loop_monitor = None  # LoopLagMonitor, when enabled in the options
+        # Map in worker processes from this many peripherals (0: executor thread only)
+        self._mapping_process_pool_threshold = DEFAULT_MAPPING_PROCESS_POOL_THRESHOLD
+        self._mapping_process_pool = None
+        # Mapping result of each peripheral, before the platform overrides
+        self._peripheral_mappings = {}
+        # Platform entity factories and their entities, to re-create some without a reload
+        self._platform_entities = PlatformEntities(self)
+        # Bumped when peripherals or their mapping change; the platform
+        # buckets are built once per version
+        self._topology_version = 0
+        self._platform_buckets = (None, {})
+        # Platforms forwarded for this entry: only the ones with devices
+        self._loaded_platforms = []
+        # {periph_id: datetime} of the last data received from the box, and
+        # since when the last known data is served because the box is unreachable
+        self._data_updated_at = {}
+        self.stale_since = None
         
         # Endpoint-specific timing metrics
         self._endpoint_timings = {
@@ -93,79 +182,52 @@ class EedomusDataUpdateCoordinator(DataUpdateCoordinator):
         """
 
         # Pre-load YAML configuration asynchronously to cache it for later synchronous access
-        await self._load_yaml_config_async()
+        with self._startup_phase("first_refresh.yaml_load"):
+            await self._load_yaml_config_async()
         
-        await self._load_history_progress()
+        with self._startup_phase("first_refresh.history_state_load"):
+            await self._load_history_progress()
+            await self._load_history_gaps()
         
         # Perform initial full data retrieval including peripherals list and value list
-        peripherals, peripherals_value_list, peripherals_caract = (
-            await self._async_full_data_retreive()
-        )
+        with self._startup_phase("first_refresh.api_fetch"):
+            peripherals, peripherals_value_list, peripherals_caract = (
+                await self._async_full_data_retreive()
+            )
         
-        # Conversion des listes en dictionnaires
-        peripherals_dict = {str(periph["periph_id"]): periph for periph in peripherals}
-        peripherals_value_dict = {
-            str(item["periph_id"]): item for item in peripherals_value_list
-        }
-        peripherals_caract_dict = {
-            str(it["periph_id"]): it for it in peripherals_caract
-        }
-
-        # Initialisation du dictionnaire agrégé
-        aggregated_data = {}
-
-        # Agrégation des données pour chaque périphérique
-        all_periph_ids = (
-            set(peripherals_dict.keys())
-            | set(peripherals_value_dict.keys())
-            | set(peripherals_caract_dict.keys())
-        )
-
-        # Phase 1: Construction complète des données SANS mapping
-        # Cela résout le problème de temporalité où les enfants peuvent ne pas être encore dans aggregated_data
-        for periph_id in all_periph_ids:
-            aggregated_data[periph_id] = {}
-
-            # Ajout des données de peripherals_dict (si existantes)
-            if periph_id in peripherals_dict:
-                aggregated_data[periph_id].update(peripherals_dict[periph_id])
-
-            # Ajout des données de peripherals_value_dict (si existantes)
-            if periph_id in peripherals_value_dict:
-                aggregated_data[periph_id].update(peripherals_value_dict[periph_id])
-
-            # Ajout des données de peripherals_caract_dict (si existantes)
-            if periph_id in peripherals_caract_dict:
-                aggregated_data[periph_id].update(peripherals_caract_dict[periph_id])
-
-        # Phase 2: Détection des relations parent-enfant pour résoudre les dépendances circulaires
-        # Cela permet d'avoir une vue complète des relations avant d'appliquer le mapping
-        parent_child_relations = {}
-        for periph_id, device_data in aggregated_data.items():
-            parent_id = device_data.get("parent_periph_id")
-            if parent_id:
-                if parent_id not in parent_child_relations:
-                    parent_child_relations[parent_id] = []
-                parent_child_relations[parent_id].append(periph_id)
-
-        # Phase 3: Application du mapping avec gestion explicite des dépendances
-        # Maintenant que toutes les relations sont établies, nous pouvons appliquer le mapping de manière fiable
-        for periph_id, device_data in aggregated_data.items():
-            # Passer les relations parent-enfant complètes au mapping pour éviter les problèmes de timing
-            eedomus_mapping = map_device_to_ha_entity(
-                device_data, 
-                aggregated_data, 
-                coordinator=self,
-                parent_child_relations=parent_child_relations
+        # Aggregation and mapping are pure CPU work over plain data: run them
+        # off the event loop, which stays responsive on large installs
+        aggregation_start = time.monotonic()
+        yaml_config = self.get_yaml_config_sync()
+        if self._use_mapping_processes(len(peripherals)):
+            aggregated_data = await self.hass.async_add_executor_job(
+                aggregate_peripherals, peripherals, peripherals_value_list, peripherals_caract
             )
-            aggregated_data[periph_id].update(eedomus_mapping)
+            mapping_start = time.monotonic()
+            mappings = await self._async_map_in_processes(aggregated_data, yaml_config)
+            for periph_id, mapping in mappings.items():
+                aggregated_data[periph_id].update(mapping)
+            mapping_time = time.monotonic() - mapping_start
+        else:
+            aggregated_data, mappings, aggregation_time, mapping_time = await self.hass.async_add_executor_job(
+                aggregate_and_map, peripherals, peripherals_value_list, peripherals_caract, yaml_config
+            )
+            mapping_start = aggregation_start + aggregation_time
+        self._peripheral_mappings = {periph_id: dict(mapping) for periph_id, mapping in mappings.items()}
+        self._record_phase("first_refresh.aggregation", aggregation_start, mapping_start)
+        self._mapping_latency.observe(mapping_time)
+        self._record_phase(
+            "first_refresh.mapping", mapping_start, mapping_start + mapping_time,
+            peripherals=len(aggregated_data),
+        )
+        processing_start = time.monotonic()
 
         # Logs des tailles
         _LOGGER.info(
             "Initial data load summary - peripherals: %d, value_list: %d, caract: %d, total: %d",
-            len(peripherals_dict),
-            len(peripherals_value_dict),
-            len(peripherals_caract_dict),
+            len(peripherals),
+            len(peripherals_value_list),
+            len(peripherals_caract),
             len(aggregated_data),
         )
 
@@ -198,96 +260,35 @@ class EedomusDataUpdateCoordinator(DataUpdateCoordinator):
 
         # Log final timing summary for initial refresh (consistent with other refresh types)
         endpoint_details = []
-        for endpoint, time in self._endpoint_timings.items():
-            if time > 0:
-                endpoint_details.append(f"{endpoint}: {time:.3f}s")
+        for endpoint, duration in self._endpoint_timings.items():
+            if duration > 0:
+                endpoint_details.append(f"{endpoint}: {duration:.3f}s")
         endpoint_log = ", ".join(endpoint_details) if endpoint_details else "no endpoints"
         total_time = sum(self._endpoint_timings.values())
         _LOGGER.info("🔄 INITIAL REFRESH: %d total, %.3fs total (Endpoints: %s)", len(aggregated_data), total_time, endpoint_log)
 
         # Display enhanced mapping table only on initial startup (not on subsequent refreshes)
         if not hasattr(self, '_mapping_table_displayed'):
-            # Count device types for summary
-            device_types = {}
-            rgbw_lamps = 0
-            rgbw_children = 0
-            
-            for periph_id in aggregated_data.keys():
-                periph_data = aggregated_data[periph_id]
-                ha_entity = periph_data.get('ha_entity', '?')
-                ha_subtype = periph_data.get('ha_subtype', '?')
-                device_type = f"{ha_entity}:{ha_subtype}"
-                
-                # Count device types
-                device_types[device_type] = device_types.get(device_type, 0) + 1
-                
-                # Count RGBW devices
-                if ha_entity == 'light' and ha_subtype == 'rgbw':
-                    rgbw_lamps += 1
-                elif periph_data.get('parent_periph_id') and \
-                     aggregated_data.get(periph_data['parent_periph_id'], {}).get('ha_subtype') == 'rgbw':
-                    rgbw_children += 1
-            
-            # Display summary at INFO level (always visible)
-            _LOGGER.info("🗺️ Device Mapping Summary: %d total devices, %d unique types", 
-                        len(aggregated_data), len(device_types))
-            if rgbw_lamps > 0:
-                _LOGGER.info("🎨 RGBW Devices: %d lamps with %d brightness channels", 
-                           rgbw_lamps, rgbw_children)
-            
-            # Display enhanced mapping table at INFO level for complete visibility
-            _LOGGER.info("🗺️ Enhanced Device Mapping Table:")
-            _LOGGER.info("=" * 150)
-            _LOGGER.info("| Periph ID   | Device Name                          | Parent ID     | Type       | Subtype         | usage_id | PRODUCT_TYPE_ID | Justification                                  |")
-            _LOGGER.info("=" * 150)
-            
-            for periph_id in sorted(aggregated_data.keys(), key=lambda x: aggregated_data[x].get('name', '').lower()):
-                periph_data = aggregated_data[periph_id]
-                parent_id = periph_data.get('parent_periph_id', 'None')
-                ha_entity = periph_data.get('ha_entity', '?')
-                ha_subtype = periph_data.get('ha_subtype', '?')
-                usage_id = periph_data.get('usage_id', '?')
-                product_type_id = periph_data.get('PRODUCT_TYPE_ID', '?')
-                device_name = periph_data.get('name', '?')
-                
-                # Determine justification
-                is_rgbw_parent = (ha_entity == 'light' and ha_subtype == 'rgbw')
-                is_rgbw_child = (parent_id != 'None' and 
-                                aggregated_data.get(parent_id, {}).get('ha_subtype') == 'rgbw')
-                
-                justification = ""
-                if is_rgbw_parent:
-                    children = [child_id for child_id, child in aggregated_data.items() 
-                              if child.get('parent_periph_id') == periph_id]
-                    justification = f"🎨 RGBW lamp detected ({len(children)} children)"
-                elif is_rgbw_child:
-                    justification = f"🎨 RGBW child brightness channel (parent: {parent_id})"
-                else:
-                    justification = f"{ha_entity}:{ha_subtype} mapping"
-                
-                # Format the table row at INFO level
-                _LOGGER.info("| %-12s | %-35s | %-12s | %-10s | %-14s | %-8s | %-15s | %-45s |",
-                            periph_id,
-                            f"{device_name}",
-                            parent_id,
-                            ha_entity,
-                            ha_subtype,
-                            usage_id,
-                            product_type_id,
-                            justification)
-            
-            _LOGGER.info("=" * 150)
-            _LOGGER.info(f"Total devices mapped: {len(aggregated_data)}")
-            _LOGGER.info("⚠️  Note: This table shows all devices with complete coordinator data")
-            _LOGGER.info("")
+            # Thousands of formatted lines: also kept off the event loop
+            await self.hass.async_add_executor_job(log_mapping_table, aggregated_data)
             self._mapping_table_displayed = True
+        # Dynamic peripheral detection and mapping table logs
+        self._record_phase("first_refresh.processing", processing_start, time.monotonic())
         
         # Set the data for the coordinator
         self.data = aggregated_data
+        self._mark_fresh(aggregated_data)
+        self._topology_version += 1
         
         # No need to call super().async_config_entry_first_refresh() as we've already loaded the data
 
     async def _async_update_data(self):
+        """Run a single refresh at a time, whoever triggers it (poll, webhook, service)."""
+        async with self._refresh_lock:
+            with self._lag_phase("refresh"):
+                return await self._async_refresh_data()
+
+    async def _async_refresh_data(self):
         """Fetch data from eedomus API with improved error handling.
         
         Main update method that decides between full or partial refresh based on timing.
@@ -317,12 +318,17 @@ class EedomusDataUpdateCoordinator(DataUpdateCoordinator):
             'set_periph_value': 0,
             'partial_refresh': 0
         }
+
+        # Box unreachable (circuit breaker open): no request, last known data
+        if self.data and not await self.client.async_box_available():
+            return self._serve_stale_data("box unreachable")
         
         try:
             if self._full_refresh_needed:
                 # Track detailed timing for full refresh
                 api_start = datetime.now()
-                result = await self._async_full_refresh()
+                with self._lag_phase("full_refresh"):
+                    result = await self._async_full_refresh()
                 api_time = (datetime.now() - api_start).total_seconds()
                 
                 processing_start = datetime.now()
@@ -340,6 +346,7 @@ class EedomusDataUpdateCoordinator(DataUpdateCoordinator):
                     self._last_processing_time = processing_time
                     self._last_refresh_time = total_time
                     self._last_processed_devices = stats['total_peripherals']
+                    self._refresh_latency.observe("full", total_time)
                     
                     # Log detailed endpoint metrics (timings + data sizes in KB)
                     endpoint_details = []
@@ -374,6 +381,7 @@ class EedomusDataUpdateCoordinator(DataUpdateCoordinator):
                     self._last_processing_time = processing_time
                     self._last_refresh_time = total_time
                     self._last_processed_devices = len(aggregated_data) if isinstance(aggregated_data, dict) else 0
+                    self._refresh_latency.observe("full", total_time)
                     
                     _LOGGER.info("🔄 FULL REFRESH: %d total, %.3fs total (API: %.3fs, Endpoints: %s)",
                                  len(aggregated_data), total_time, actual_api_time, endpoint_log)
@@ -382,7 +390,8 @@ class EedomusDataUpdateCoordinator(DataUpdateCoordinator):
             else:
                 # Track detailed timing for partial refresh
                 api_start = datetime.now()
-                ret = await self._async_partial_refresh()
+                with self._lag_phase("partial_refresh"):
+                    ret = await self._async_partial_refresh()
                 # Calculate actual API time as sum of relevant endpoint timings for partial refresh
                 actual_api_time = sum(time for endpoint, time in self._endpoint_timings.items() if endpoint in ['get_periph_caract', 'set_periph_value'])
                 
@@ -395,6 +404,7 @@ class EedomusDataUpdateCoordinator(DataUpdateCoordinator):
                 self._last_api_time = actual_api_time
                 self._last_processing_time = processing_time
                 self._last_refresh_time = total_time
+                self._refresh_latency.observe("partial", total_time)
                 # For partial refresh, processed devices is the number of dynamic peripherals
                 self._last_processed_devices = len(self._dynamic_peripherals) if hasattr(self, '_dynamic_peripherals') else 0
                 
@@ -424,7 +434,7 @@ class EedomusDataUpdateCoordinator(DataUpdateCoordinator):
                 )
                 # Return last known good data if available
                 if hasattr(self, "data") and self.data:
-                    return self.data
+                    return self._serve_stale_data("timeout")
                 # If no data available, return empty success response
                 return {"success": 1, "body": []}
             else:
@@ -433,7 +443,7 @@ class EedomusDataUpdateCoordinator(DataUpdateCoordinator):
                 )
                 # Return last known good data if available
                 if hasattr(self, "data") and self.data:
-                    return self.data
+                    return self._serve_stale_data(str(err))
                 raise UpdateFailed(f"Error updating data: {err}") from err
 
     async def _async_partial_data_retreive(self, concat_text_periph_id: str):
@@ -466,6 +476,7 @@ class EedomusDataUpdateCoordinator(DataUpdateCoordinator):
             
             # Load and merge mappings asynchronously
             merged_config = await load_yaml_mappings_async(self.hass)
+            install_device_mappings(merged_config)
             
             self._yaml_config_cache = merged_config
             return self._yaml_config_cache
@@ -501,6 +512,7 @@ class EedomusDataUpdateCoordinator(DataUpdateCoordinator):
         start_time = datetime.now()
         peripherals_response = await self.client.get_periph_list()
         self._endpoint_timings['get_periph_list'] = (datetime.now() - start_time).total_seconds()
+        self._endpoint_latency.observe('get_periph_list', self._endpoint_timings['get_periph_list'])
         # Store data size in bytes (raw response size from client)
         self._endpoint_data_sizes['get_periph_list'] = peripherals_response.get('_raw_data_size_bytes', 0)
         self._endpoint_call_counts['get_periph_list'] += 1
@@ -508,6 +520,7 @@ class EedomusDataUpdateCoordinator(DataUpdateCoordinator):
         start_time = datetime.now()
         peripherals_value_list_response = await self.client.get_periph_value_list("all")
         self._endpoint_timings['get_periph_value_list'] = (datetime.now() - start_time).total_seconds()
+        self._endpoint_latency.observe('get_periph_value_list', self._endpoint_timings['get_periph_value_list'])
         # Store data size in bytes (raw response size from client)
         self._endpoint_data_sizes['get_periph_value_list'] = peripherals_value_list_response.get('_raw_data_size_bytes', 0)
         self._endpoint_call_counts['get_periph_value_list'] += 1
@@ -515,6 +528,7 @@ class EedomusDataUpdateCoordinator(DataUpdateCoordinator):
         start_time = datetime.now()
         peripherals_caract_response = await self.client.get_periph_caract("all", True)
         self._endpoint_timings['get_periph_caract'] = (datetime.now() - start_time).total_seconds()
+        self._endpoint_latency.observe('get_periph_caract', self._endpoint_timings['get_periph_caract'])
         # Store data size in bytes (raw response size from client)
         self._endpoint_data_sizes['get_periph_caract'] = peripherals_caract_response.get('_raw_data_size_bytes', 0)
         self._endpoint_call_counts['get_periph_caract'] += 1
@@ -584,48 +598,42 @@ class EedomusDataUpdateCoordinator(DataUpdateCoordinator):
         _LOGGER.debug("Performing full data refresh from eedomus API")
 
         # Récupération des données - CORRECTED: now calls full data retrieve with all endpoints
-        peripherals_caract = await self._async_full_data_retreive()
+        peripherals, peripherals_value_list, peripherals_caract = await self._async_full_data_retreive()
         
         # SAFE: Ensure peripherals_caract contains dictionaries with periph_id
         # URGENT FIX FOR CRITICAL BUG - 2026-02-23 16:50
-        # Handle both flat and nested list structures
-        peripherals_caract_dict = {}
-        nested_structure_count = 0
-        
-        for it in peripherals_caract:
-            if isinstance(it, dict) and 'periph_id' in it:
-                # Normal case: flat list of dicts
-                peripherals_caract_dict[str(it["periph_id"])] = it
-            elif isinstance(it, list):
-                # Nested case: list of lists - flatten it
-                nested_structure_count += 1
-                for sub_item in it:
-                    if isinstance(sub_item, dict) and 'periph_id' in sub_item:
-                        peripherals_caract_dict[str(sub_item["periph_id"])] = sub_item
-                    else:
-                        _LOGGER.error("❌ Invalid sub-item in nested structure: %s (type: %s)", sub_item, type(sub_item))
-            else:
-                _LOGGER.error("❌ CRITICAL BUG FIXED: Invalid peripheral data format: %s (type: %s)", it, type(it))
+        # Handle both flat and nested list structures (indexed in the executor)
+        peripherals_caract_dict, nested_structure_count = await self.hass.async_add_executor_job(
+            index_caract, peripherals_caract
+        )
         
         # Log nested structure count once instead of multiple times
         if nested_structure_count > 0:
             _LOGGER.debug("🔍 Found %d nested structure(s) in peripherals_caract, flattened successfully", nested_structure_count)
 
         # Initialisation du dictionnaire agrégé
+        # Merged in place on the event loop: entities and webhook pushes share
+        # these per-peripheral dicts, a worker thread must not write them
         aggregated_data = self.data
 
-        # Agrégation des données pour chaque périphérique
-        all_periph_ids = set(peripherals_caract_dict.keys())
-
-        for periph_id in all_periph_ids:
-            if not periph_id in aggregated_data:
-                _LOGGER.warn("This periph_id is unknown %d, please do a reload", periph_id)
-                aggregated_data[periph_id] = {}
+        # Agrégation des données pour chaque périphérique connu
+        for periph_id, caract in peripherals_caract_dict.items():
+            if periph_id in aggregated_data:
+                aggregated_data[periph_id].update(caract)
 
-            # Ajout des données de peripherals_caract_dict (si existantes)
-            if periph_id in peripherals_caract_dict:
-                aggregated_data[periph_id].update(peripherals_caract_dict[periph_id])
+        # Peripherals added, removed or moved on the box: only their entities change
+        added, removed, moved = diff_topology(
+            {periph_id: device_data.get("parent_periph_id") for periph_id, device_data in aggregated_data.items()},
+            peripherals,
+        )
+        if added or removed or moved:
+            await self._async_apply_topology_changes(
+                added, removed, moved, peripherals, peripherals_value_list, peripherals_caract_dict
+            )
 
+        # Peripherals removed from the box: drop their per-peripheral history state
+        if peripherals_caract_dict:
+            self._forget_removed_peripherals(peripherals_caract_dict.keys())
 
         # Logs des tailles
         _LOGGER.debug(
@@ -664,6 +672,7 @@ class EedomusDataUpdateCoordinator(DataUpdateCoordinator):
         # Mapping table only displayed on initial startup, not on subsequent refreshes
         # This reduces log volume while maintaining useful startup information
         self.data = aggregated_data
+        self._mark_fresh(aggregated_data)
         return aggregated_data
 
     async def _async_partial_refresh(self):
@@ -712,6 +721,7 @@ class EedomusDataUpdateCoordinator(DataUpdateCoordinator):
                 concat_text_periph_id
             )
             self._endpoint_timings['get_periph_caract'] = (datetime.now() - api_start_time).total_seconds()
+            self._endpoint_latency.observe('get_periph_caract', self._endpoint_timings['get_periph_caract'])
             # Store data size in bytes (raw response size from client)
             self._endpoint_data_sizes['get_periph_caract'] = peripherals_caract.get('_raw_data_size_bytes', 0)
             self._endpoint_call_counts['get_periph_caract'] += 1
@@ -738,7 +748,7 @@ class EedomusDataUpdateCoordinator(DataUpdateCoordinator):
             # Return current data to preserve state instead of None
             if hasattr(self, 'data') and self.data:
                 _LOGGER.info("Returning current data to preserve state during partial refresh")
-                return self.data
+                return self._serve_stale_data(peripherals_caract.get("error", "invalid partial refresh answer"))
             else:
                 _LOGGER.error("No data available to return during partial refresh")
                 return {"success": 1, "body": []}
@@ -748,11 +758,13 @@ class EedomusDataUpdateCoordinator(DataUpdateCoordinator):
         processing_start_time = datetime.now()
         
         processed_devices = 0
+        refreshed = []
         for periph_data in peripherals_body:
             periph_id = periph_data.get("periph_id")
             # Ajout des données de peripherals_caract_dict (si existantes)
             if self.data and periph_id in self.data:
                 self.data[periph_id].update(periph_data)
+                refreshed.append(periph_id)
                 processed_devices += 1
             else:
                 _LOGGER.warning("Cannot update peripheral data: data not available for %s", periph_id)
@@ -761,14 +773,25 @@ class EedomusDataUpdateCoordinator(DataUpdateCoordinator):
             if history_retrieval and periph_id in peripherals_for_history:
                 if not self._history_progress.get(periph_id, {}).get("completed"):
                     _LOGGER.debug("Retrieving data history %s", periph_id)
-                    chunk = await self.async_fetch_history_chunk(periph_id)
-                    if chunk:
-                        _LOGGER.debug("Retrieved %d history data points for %s", len(chunk), periph_id)
-                        # Import the historical data using the optimized Recorder API method
-                        await self.async_import_history_chunk(periph_id, chunk)
+                    await self._async_fetch_and_import_history(periph_id)
 
-        # Create/update error sensors
-        await self._create_error_sensors()
+        self._mark_fresh(refreshed)
+
+        if history_retrieval:
+            self._record_history_coverage(peripherals_for_history)
+            per_scan = self.client.config_entry.options.get(
+                CONF_HISTORY_PERIPHERALS_PER_SCAN,
+                self.client.config_entry.data.get(
+                    CONF_HISTORY_PERIPHERALS_PER_SCAN, DEFAULT_HISTORY_PERIPHERALS_PER_SCAN
+                ),
+            )
+            try:
+                await self.async_repair_history_gaps(limit=per_scan)
+            except Exception as err:
+                _LOGGER.warning("History gap repair failed: %s", err)
+
+        # Update history diagnostic sensors (no-op when nothing changed)
+        self._notify_history_diagnostics()
 
         # End processing timing
         processing_time = (datetime.now() - processing_start_time).total_seconds()
@@ -816,10 +839,194 @@ class EedomusDataUpdateCoordinator(DataUpdateCoordinator):
         )
         return False
 
+    def _forget_removed_peripherals(self, current_ids) -> int:
+        """Drop history progress, retries and windows of peripherals gone from the box.
+
+        Without this, these per-peripheral structures only ever grow on
+        long uptimes where peripherals are replaced.
+        """
+        current_ids = set(current_ids)
+        for periph_id in set(self._data_updated_at) - current_ids:
+            del self._data_updated_at[periph_id]
+        known = (
+            set(self._history_progress)
+            | {periph_id for periph_id, _ in self._retry_queue.items()}
+        )
+        removed = known - current_ids
+        for periph_id in removed:
+            self._history_progress.pop(periph_id, None)
+            self._retry_queue.record_success(periph_id)
+            self._history_windows.forget(periph_id)
+            self._history_gaps.forget(periph_id)
+            if self.hass:
+                self.hass.states.async_remove(f"{DOMAIN}.history_progress_{periph_id}")
+        if removed:
+            _LOGGER.info("🧹 Forgot history state of %d removed peripherals", len(removed))
+            self._schedule_history_gaps_save()
+        return len(removed)
+
+    @callback
+    def async_add_periph_listener(self, periph_id: str, update_callback):
+        """Listen for push updates of a single peripheral; return a remove callable."""
+        self._periph_listeners.setdefault(periph_id, []).append(update_callback)
+
+        @callback
+        def remove_listener():
+            listeners = self._periph_listeners.get(periph_id, [])
+            if update_callback in listeners:
+                listeners.remove(update_callback)
+            if not listeners:
+                self._periph_listeners.pop(periph_id, None)
+
+        return remove_listener
+
+    @callback
+    def async_apply_push(self, periph_id: str, value, timestamp: datetime | None = None) -> bool:
+        """Apply a value pushed by the eedomus box without any API call.
+
+        Only the entities of this peripheral (and of its parent, whose state may
+        be computed from its children) are written. Returns False when the
+        peripheral is unknown.
+        """
+        periph = (self.data or {}).get(periph_id)
+        if periph is None:
+            return False
+
+        timestamp = timestamp or datetime.now()
+        changed_at = timestamp.strftime("%Y-%m-%d %H:%M:%S")
+        # Pushes can arrive out of order: never overwrite a newer value
+        if periph.get("last_value_change") and periph["last_value_change"] > changed_at:
+            _LOGGER.debug("Ignoring stale push for %s (%s)", periph_id, changed_at)
+            return True
+
+        periph["last_value"] = str(value)
+        periph["last_value_change"] = changed_at
+        self._data_updated_at[periph_id] = datetime.now()
+        _LOGGER.debug("📨 Push update for %s (%s): %s", periph.get("name"), periph_id, value)
+
+        for target in (periph_id, periph.get("parent_periph_id")):
+            for update_callback in list(self._periph_listeners.get(target, [])):
+                update_callback()
+        return True
+
+    def _mark_fresh(self, periph_ids) -> None:
+        """Record that the box just sent the data of `periph_ids`."""
+        now = datetime.now()
+        for periph_id in periph_ids:
+            self._data_updated_at[periph_id] = now
+        if self.stale_since is not None:
+            _LOGGER.info("✅ Fresh eedomus data again after %.0fs of stale data", (now - self.stale_since).total_seconds())
+            self.stale_since = None
+
+    def _serve_stale_data(self, reason: str):
+        """Keep the last known data (entities stay available, marked stale)."""
+        if self.stale_since is None:
+            self.stale_since = datetime.now()
+            _LOGGER.warning("⏸️ Serving last known eedomus data (%s)", reason)
+        return self.data
+
+    def data_age_attributes(self, periph_id: str) -> dict:
+        """Entity attributes marking the data of `periph_id` as stale.
+
+        Empty while the data is fresh: a timestamp changing on every poll
+        would make every entity write its state (and the recorder store it)
+        on every refresh.
+        """
+        updated_at = self._data_updated_at.get(periph_id)
+        if updated_at is None or self.stale_since is None or updated_at >= self.stale_since:
+            return {}
+        return {"data_updated_at": updated_at.isoformat(timespec="seconds"), "stale": True}
+
+    def platform_peripherals(self, platform: str) -> list:
+        """[(periph_id, periph, children)] of the peripherals of `platform` (an ha_entity).
+
+        Built for every platform in one pass, once per topology version:
+        each platform setup only goes through its own peripherals.
+        """
+        version, buckets = self._platform_buckets
+        if version != self._topology_version:
+            buckets = self._build_platform_buckets()
+            self._platform_buckets = (self._topology_version, buckets)
+        return buckets.get(platform, [])
+
+    def needed_platforms(self) -> list:
+        """PLATFORMS with at least one mapped peripheral.
+
+        The sensor platform is always needed: it also holds the diagnostic sensors.
+        """
+        return [
+            platform for platform in PLATFORMS
+            if platform == Platform.SENSOR or self.platform_peripherals(platform)
+        ]
+
+    @property
+    def loaded_platforms(self) -> list:
+        return list(self._loaded_platforms)
+
+    async def async_forward_platforms(self) -> list:
+        """Set up the needed platforms not set up yet; return them.
+
+        Called by the entry setup, then when a topology change or a mapping
+        reload brings the first device of a new kind.
+        """
+        new_platforms = [platform for platform in self.needed_platforms() if platform not in self._loaded_platforms]
+        if not new_platforms:
+            return []
+        entry = self.client.config_entry
+        config_entries = self.hass.config_entries
+        if self._loaded_platforms:
+            _LOGGER.info("🧩 First %s devices: setting up these platforms", ", ".join(new_platforms))
+            # The entry is already loaded: newer HA versions require a late forward
+            forward = getattr(config_entries, "async_late_forward_entry_setups", config_entries.async_forward_entry_setups)
+        else:
+            forward = config_entries.async_forward_entry_setups
+        self._loaded_platforms.extend(new_platforms)
+        await forward(entry, new_platforms)
+        return new_platforms
+
+    def _build_platform_buckets(self) -> dict:
+        for periph_id, periph in self.data.items():
+            if "ha_entity" not in periph and "periph_id" in periph and "name" in periph:
+                # Normally mapped by the first refresh already
+                periph.update(map_device_to_ha_entity(periph, self.data, coordinator=self))
+        children = children_by_parent(self.data)
+        overridden = apply_platform_overrides(self.data, children)
+        buckets = build_platform_buckets(self.data, children)
+        _LOGGER.debug(
+            "Platform buckets (topology v%d): %s, %d overridden",
+            self._topology_version,
+            {platform: len(items) for platform, items in buckets.items()},
+            overridden,
+        )
+        return buckets
+
     def get_all_peripherals(self):
         """Return all peripherals (for entity setup)."""
         return self._all_peripherals
 
+    @callback
+    def async_request_webhook_refresh(self, full: bool = False) -> None:
+        """Queue a refresh requested by a webhook, merging bursts into one refresh.
+
+        Requests arriving while a refresh runs are merged into a single
+        follow-up refresh (full wins over partial).
+        """
+        self._pending_refresh = "full" if full or self._pending_refresh == "full" else "partial"
+        if self._refresh_drain_task is None or self._refresh_drain_task.done():
+            self._refresh_drain_task = self.hass.async_create_task(
+                self._async_drain_refresh_requests()
+            )
+
+    async def _async_drain_refresh_requests(self) -> None:
+        """Run queued webhook refreshes one after the other until none is pending."""
+        while self._pending_refresh is not None:
+            kind = self._pending_refresh
+            self._pending_refresh = None
+            if kind == "full":
+                self._full_refresh_needed = True
+            _LOGGER.info("🔄 Running coalesced %s refresh requested by webhook", kind)
+            await self.async_refresh()
+
     async def request_full_refresh(self):
         """Request a full refresh of all peripherals."""
         _LOGGER.debug("Requesting full data refresh")
@@ -849,6 +1056,9 @@ class EedomusDataUpdateCoordinator(DataUpdateCoordinator):
                         periph_id,
                         self._history_progress[periph_id],
                     )
+                self._history_completed_count = sum(
+                    1 for p in self._history_progress.values() if p.get("completed", False)
+                )
         except Exception as e:
             _LOGGER.warning(
                 "Warning loading history progress (this is normal if no history data exists): %s",
@@ -883,6 +1093,102 @@ class EedomusDataUpdateCoordinator(DataUpdateCoordinator):
         except Exception as e:
             _LOGGER.error("Error saving history progress: %s", e)
 
+    async def _load_history_gaps(self):
+        """Charge l'index des trous d'historique depuis le stockage persistant.
+
+        The index survives restarts so the window during which Home Assistant was
+        down can be detected and repaired on the next polls.
+        """
+        try:
+            self._history_gaps_store = Store(
+                self.hass, HISTORY_GAPS_STORAGE_VERSION, HISTORY_GAPS_STORAGE_KEY
+            )
+            stored = await self._history_gaps_store.async_load()
+            self._history_gaps = HistoryGapTracker.from_dict(stored)
+            _LOGGER.debug(
+                "Loaded history gap index: %d pending windows",
+                self._history_gaps.pending_count(),
+            )
+        except Exception as e:
+            _LOGGER.warning("Warning loading history gap index: %s", e)
+            self._history_gaps = HistoryGapTracker()
+
+    def _schedule_history_gaps_save(self):
+        """Schedule a delayed write of the history gap index."""
+        if self._history_gaps_store is None or self._history_gaps_save_scheduled:
+            return
+        self._history_gaps_save_scheduled = True
+
+        def _data_to_save():
+            self._history_gaps_save_scheduled = False
+            return self._history_gaps.as_dict()
+
+        self._history_gaps_store.async_delay_save(_data_to_save, HISTORY_GAPS_SAVE_DELAY)
+
+    def _record_history_coverage(self, periph_ids):
+        """Extend history coverage for peripherals refreshed while HA is running.
+
+        A peripheral whose coverage is older than its expected cadence gets the
+        missing window (typically Home Assistant downtime) recorded as a gap.
+        Peripherals still being backfilled are skipped: their coverage only
+        reaches the last imported chunk, the backfill fills the rest.
+        """
+        now = int(datetime.now().timestamp())
+        before = self._history_gaps.pending_count()
+        for periph_id in periph_ids:
+            if not self._history_progress.get(periph_id, {}).get("completed"):
+                continue
+            self._history_gaps.record_live_update(periph_id, now)
+        if self._history_gaps.pending_count() != before:
+            _LOGGER.info(
+                "🕳️ %d history gap(s) detected, scheduled for targeted repair",
+                self._history_gaps.pending_count() - before,
+            )
+        self._schedule_history_gaps_save()
+
+    async def async_repair_history_gaps(self, limit: int = 1) -> int:
+        """Re-download only the missing history windows, oldest first.
+
+        Returns the number of windows repaired (or proven empty).
+        """
+        repaired = 0
+        for periph_id, start, end in self._history_gaps.next_windows(limit):
+            _LOGGER.info(
+                "🩹 Repairing history gap for %s: %s → %s",
+                periph_id,
+                datetime.fromtimestamp(start).isoformat(),
+                datetime.fromtimestamp(end).isoformat(),
+            )
+            chunk = await self.client.get_device_history(
+                periph_id, start_timestamp=start, end_timestamp=end
+            )
+            if chunk is None or not self._validate_history_data(chunk):
+                self._history_gaps.record_failure(periph_id, start, end)
+                continue
+
+            self._history_gaps.resolve(periph_id, start, end)
+            repaired += 1
+            if not chunk:
+                _LOGGER.debug("History gap %s → %s for %s is empty on the box", start, end, periph_id)
+                continue
+
+            try:
+                await self.async_import_history_chunk(periph_id, chunk)
+            except Exception as err:
+                _LOGGER.error("Failed to import repaired history for %s: %s", periph_id, err)
+                self._history_gaps.add_gap(periph_id, start, end)
+                continue
+
+            if len(chunk) >= HISTORY_MAX_POINTS:
+                # Response was truncated: the rest of the window is still missing
+                self._history_gaps.add_gap(
+                    periph_id, max(history_entry_timestamp(entry) for entry in chunk), end
+                )
+
+        if repaired:
+            self._schedule_history_gaps_save()
+        return repaired
+
     def _validate_history_data(self, chunk: list) -> bool:
         """Valider les données historiques reçues."""
         if not isinstance(chunk, list):
@@ -902,45 +1208,263 @@ class EedomusDataUpdateCoordinator(DataUpdateCoordinator):
         return True
 
     def _handle_fetch_error(self, periph_id, error_message):
-        """Gérer les erreurs de récupération d'historique."""
-        now = datetime.now().timestamp()
-
-        # Initialiser si première erreur
-        if periph_id not in self._error_count:
-            self._error_count[periph_id] = 0
+        """Gérer les erreurs de récupération d'historique (backoff exponentiel)."""
+        retry_delay_hours = self.client.config_entry.options.get(
+            CONF_HISTORY_RETRY_DELAY,
+            self.client.config_entry.data.get(CONF_HISTORY_RETRY_DELAY, DEFAULT_HISTORY_RETRY_DELAY),
+        )
+        self._retry_queue.max_delay = retry_delay_hours * 3600
+        info = self._retry_queue.record_failure(periph_id, error_message)
+        _LOGGER.error(f"❌ Erreur lors de la récupération de l'historique pour {periph_id}: {error_message}")
+        _LOGGER.error(
+            f"   Réessai n°{info['attempts']} dans {(info['retry_after'] - info['error_time']) / 60:.0f} minutes"
+        )
+        self._schedule_history_retry()
+        self._notify_history_diagnostics()
 
-        self._error_count[periph_id] += 1
+    def _schedule_history_retry(self):
+        """Arm a single timer for the next due peripheral of the retry queue."""
+        next_due = self._retry_queue.next_due()
+        if next_due is None or self.hass is None:
+            return
+        if self._history_retry_unsub is not None:
+            if self._history_retry_due is not None and self._history_retry_due <= next_due:
+                return  # Already armed for an earlier (or the same) wake-up
+            self._history_retry_unsub()
+        self._history_retry_due = next_due
+        self._history_retry_unsub = async_call_later(
+            self.hass, max(next_due - time.time(), 0), self._async_history_retry_due
+        )
 
-        # Si première erreur, mettre en pause pour la durée configurée
-        if self._error_count[periph_id] == 1:
-            # Obtenir la durée de réessai depuis la configuration
-            retry_delay_hours = self.config_entry.options.get(
-                CONF_HISTORY_RETRY_DELAY,
-                DEFAULT_HISTORY_RETRY_DELAY
+    async def _async_history_retry_due(self, _now=None):
+        """Retry the peripherals whose backoff expired, then re-arm the timer."""
+        self._history_retry_unsub = None
+        self._history_retry_due = None
+        # A partial refresh may be fetching the same peripherals
+        async with self._refresh_lock:
+            for periph_id in self._retry_queue.pop_due(HISTORY_RETRY_MAX_PER_CYCLE):
+                _LOGGER.info("🔁 Retrying history for %s", periph_id)
+                info = self._retry_queue.get(periph_id)
+                await self._async_fetch_and_import_history(periph_id)
+                if self._retry_queue.get(periph_id) is info:
+                    # Neither success nor failure (timed-out window split): keep it scheduled
+                    self._retry_queue.requeue(periph_id)
+        self._schedule_history_retry()
+
+    async def _async_fetch_and_import_history(self, periph_id: str) -> None:
+        """Fetch the next history chunk of a peripheral and import it."""
+        start = time.monotonic()
+        chunk = await self.async_fetch_history_chunk(periph_id)
+        if not chunk:
+            return
+        _LOGGER.debug("Retrieved %d history data points for %s", len(chunk), periph_id)
+        # Import the historical data using the optimized Recorder API method
+        try:
+            with self._lag_phase("history_import"):
+                await self.async_import_history_chunk(periph_id, chunk)
+        except Exception as err:
+            # The cursor already moved past this chunk: remember the hole
+            timestamps = [history_entry_timestamp(entry) for entry in chunk]
+            self._history_gaps.add_gap(periph_id, min(timestamps), max(timestamps))
+            _LOGGER.warning(
+                "History chunk import failed for %s, window kept for repair: %s",
+                periph_id, err,
             )
-            retry_delay = retry_delay_hours * 3600
-            retry_after = now + retry_delay
-            self._retry_queue[periph_id] = {
-                "error_time": now,
-                "retry_after": retry_after,
-                "error_message": error_message,
-                "attempts": 1
-            }
-            _LOGGER.error(f"❌ Erreur lors de la récupération de l'historique pour {periph_id}: {error_message}")
-            _LOGGER.error(f"   Réessai dans {retry_delay_hours} heures")
-        else:
-            # Mettre à jour le compteur d'erreurs
-            if periph_id in self._retry_queue:
-                self._retry_queue[periph_id]["attempts"] += 1
+        self._refresh_latency.observe("history", time.monotonic() - start)
+
+    def enable_loop_lag_monitor(self) -> LoopLagMonitor:
+        """Start sampling the event loop lag, attributed to the coordinator phases."""
+        if self._loop_monitor is None:
+            self._loop_monitor = LoopLagMonitor()
+            self._loop_monitor.start(
+                lambda coro: self.hass.async_create_background_task(coro, f"{DOMAIN}_loop_lag_monitor")
+            )
+        return self._loop_monitor
+
+    def _lag_phase(self, name: str):
+        """Attribute event loop stalls in the enclosed block to `name` (if monitored)."""
+        if self._loop_monitor is None:
+            return nullcontext()
+        return self._loop_monitor.phase(name)
+
+    @contextmanager
+    def _startup_phase(self, name: str):
+        """Time a startup phase in the timeline and the loop lag monitor."""
+        with self._startup_timeline.phase(name) as entry, self._lag_phase(name):
+            yield entry
+
+    def _record_phase(self, name: str, start: float, end: float, **details) -> None:
+        """Declare an inline (synchronous) startup phase once it is over."""
+        self._startup_timeline.record(name, end - start, **details)
+        if self._loop_monitor is not None:
+            self._loop_monitor.record(name, start, end)
+
+    def _use_mapping_processes(self, count: int) -> bool:
+        return 0 < self._mapping_process_pool_threshold <= count
+
+    async def _async_map_in_processes(self, aggregated_data, yaml_config):
+        """Map in the worker processes; fall back to an executor thread if the pool fails."""
+        if self._mapping_process_pool is None:
+            self._mapping_process_pool = create_mapping_process_pool()
+        try:
+            return await map_in_processes(self.hass.loop, self._mapping_process_pool, aggregated_data, yaml_config)
+        except Exception as err:
+            # Broken pool (worker killed, spawn not allowed...): don't try again
+            _LOGGER.warning("⚠️ Mapping process pool failed, mapping in a thread instead: %s", err)
+            self._mapping_process_pool.shutdown(wait=False, cancel_futures=True)
+            self._mapping_process_pool = None
+            self._mapping_process_pool_threshold = 0
+            return await self.hass.async_add_executor_job(
+                map_peripherals,
+                aggregated_data,
+                build_parent_child_relations(aggregated_data),
+                yaml_config,
+            )
+
+    async def async_reload_mappings(self) -> dict:
+        """Apply changed YAML mappings without reloading the integration.
+
+        The mappings are compiled again (no-op when the files did not change),
+        every peripheral is mapped again in the executor, and only the entities
+        of the peripherals whose mapping changed (with their parent and
+        children, which platforms handle together) are re-created.
+        """
+        merged = await self.hass.async_add_executor_job(
+            load_compiled_mappings, "", self.hass.config.path(CUSTOM_MAPPING_CONFIG_FILE)
+        )
+        if merged is self._yaml_config_cache:
+            _LOGGER.info("🗺️ Mapping files unchanged, nothing to reload")
+            return {"changed": 0, "added": 0, "removed": 0}
+        install_device_mappings(merged)
+        self._yaml_config_cache = merged
+
+        mappings = await self._async_remap()
+        changed = {
+            periph_id for periph_id, mapping in mappings.items()
+            if mapping != self._peripheral_mappings.get(periph_id)
+        }
+        affected = changed | self._related_peripherals(changed)
+        self._apply_peripheral_mappings(mappings, affected)
+        if affected:
+            self._topology_version += 1
+
+        result = await self._platform_entities.async_rebuild(affected)
+        if self._loaded_platforms:
+            await self.async_forward_platforms()
+        _LOGGER.info(
+            "🗺️ Mappings reloaded: %d peripherals changed, %d entities removed, %d added",
+            len(changed), result["removed"], result["added"],
+        )
+        return {"changed": len(changed), **result}
+
+    async def _async_remap(self, periph_ids=None) -> dict:
+        """Map `periph_ids` (default: all) again in the executor, without applying it."""
+        # Copied here: webhook pushes update these dicts on the event loop
+        snapshot = {periph_id: dict(device_data) for periph_id, device_data in self.data.items()}
+        return await self.hass.async_add_executor_job(
+            remap_peripherals, snapshot, self._peripheral_mappings, self.get_yaml_config_sync(), periph_ids
+        )
+
+    def _related_peripherals(self, periph_ids) -> set:
+        """Parents and children of `periph_ids`: platforms build their entities together."""
+        related = set()
+        for periph_id, device_data in self.data.items():
+            parent_id = device_data.get("parent_periph_id")
+            if parent_id in periph_ids:
+                related.add(periph_id)
+            elif periph_id in periph_ids and parent_id in self.data:
+                related.add(parent_id)
+        return related
+
+    def _apply_peripheral_mappings(self, mappings: dict, periph_ids) -> None:
+        """Replace the mapping fields of `periph_ids` by their new mapping."""
+        for periph_id in periph_ids:
+            if periph_id not in mappings:
+                continue  # Incomplete data (unknown peripheral), never mapped
+            device_data = self.data[periph_id]
+            for key in self._peripheral_mappings.get(periph_id, ()):
+                device_data.pop(key, None)
+            self._peripheral_mappings[periph_id] = dict(mappings[periph_id])
+            # Platform overrides (children of lights...) are applied again by the rebuild
+            device_data.update(self._peripheral_mappings[periph_id])
+            if self._is_dynamic_peripheral(device_data):
+                self._dynamic_peripherals[periph_id] = device_data
+            else:
+                self._dynamic_peripherals.pop(periph_id, None)
+
+    async def _async_apply_topology_changes(
+        self, added, removed, moved, peripherals, peripherals_value_list, peripherals_caract_dict
+    ) -> dict:
+        """Add, remove and re-parent peripherals, re-creating only their entities.
+
+        A new child can change the mapping of its parent (RGBW lamp channels...):
+        the parents and children of every changed peripheral are mapped again.
+        Only the platform entity factories of these peripherals run; the other
+        entities are neither constructed nor re-added.
+        """
+        data = self.data
+        # Relations before the change: old parents lose a child
+        affected = added | removed | moved | self._related_peripherals(removed | moved)
+        for periph_id in removed:
+            data.pop(periph_id, None)
+            self._peripheral_mappings.pop(periph_id, None)
+            self._dynamic_peripherals.pop(periph_id, None)
+            unregister_device_mapping(periph_id)
+
+        listed = {str(periph["periph_id"]): periph for periph in peripherals if "periph_id" in periph}
+        if added:
+            data.update(await self.hass.async_add_executor_job(
+                aggregate_peripherals,
+                [listed[periph_id] for periph_id in added],
+                [value for value in peripherals_value_list if str(value.get("periph_id")) in added],
+                [peripherals_caract_dict[periph_id] for periph_id in added if periph_id in peripherals_caract_dict],
+            ))
+        for periph_id in moved:
+            data[periph_id]["parent_periph_id"] = listed[periph_id].get("parent_periph_id")
+
+        affected = (affected | self._related_peripherals(added | moved)) - removed
+        mappings = await self._async_remap(affected)
+        self._apply_peripheral_mappings(mappings, affected)
+        self._topology_version += 1
+        result = await self._platform_entities.async_rebuild(affected | removed)
+        if self._loaded_platforms:
+            # After the rebuild: new platforms create their entities when set up
+            await self.async_forward_platforms()
+        _LOGGER.info(
+            "🧩 Topology changed: %d peripherals added, %d removed, %d re-parented (%d entities removed, %d added)",
+            len(added), len(removed), len(moved), result["removed"], result["added"],
+        )
+        return result
+
+    async def async_shutdown(self) -> None:
+        """Cancel the history retry timer and flush the gap index before shutting down."""
+        if self._loop_monitor is not None:
+            await self._loop_monitor.stop()
+        if self._mapping_process_pool is not None:
+            self._mapping_process_pool.shutdown(wait=False, cancel_futures=True)
+            self._mapping_process_pool = None
+        if self._history_retry_unsub is not None:
+            self._history_retry_unsub()
+            self._history_retry_unsub = None
+        # A pending delayed save would keep this coordinator alive for minutes
+        # after a reload, then overwrite the index saved by the new one
+        if self._history_gaps_save_scheduled and self._history_gaps_store is not None:
+            self._history_gaps_save_scheduled = False
+            await self._history_gaps_store.async_save(self._history_gaps.as_dict())
+        await super().async_shutdown()
 
     async def async_fetch_history_chunk(self, periph_id: str) -> list:
-        """Récupère un chunk de 10 000 points d'historique."""
+        """Récupère un chunk d'historique sur une fenêtre de temps adaptative.
+
+        La taille de la fenêtre [start, end] est ajustée par HistoryWindowSizer
+        selon la densité de points du périphérique et le temps de réponse mesuré.
+        """
         # Vérifier si le périphérique est en queue de réessai
-        if periph_id in self._retry_queue:
-            retry_info = self._retry_queue[periph_id]
-            if datetime.now().timestamp() < retry_info["retry_after"]:
-                _LOGGER.debug(f"Skipping {periph_id} - in retry queue until {retry_info['retry_after']}")
-                return []
+        if self._retry_queue.is_waiting(periph_id):
+            _LOGGER.debug(
+                f"Skipping {periph_id} - in retry queue until {self._retry_queue.get(periph_id)['retry_after']}"
+            )
+            return []
 
         if periph_id not in self._history_progress:
             self._history_progress[periph_id] = {
@@ -951,37 +1475,67 @@ class EedomusDataUpdateCoordinator(DataUpdateCoordinator):
         progress = self._history_progress[periph_id]
         if progress["completed"]:
             _LOGGER.debug("History already fully fetched for %s", periph_id)
+            self._retry_queue.record_success(periph_id)
             return []
 
+        now = int(datetime.now().timestamp())
+        start, end = self._history_windows.next_window(periph_id, progress["last_timestamp"], now)
         _LOGGER.info(
-            "Fetching history for %s (from %s)",
+            "Fetching history for %s (from %s to %s)",
             periph_id,
-            (
-                datetime.fromtimestamp(progress["last_timestamp"]).isoformat()
-                if progress["last_timestamp"]
-                else "start"
-            ),
+            datetime.fromtimestamp(start).isoformat() if start else "start",
+            datetime.fromtimestamp(end).isoformat() if end else "now",
         )
 
         try:
+            request_start = time.monotonic()
             chunk = await self.client.get_device_history(
                 periph_id,
-                start_timestamp=progress["last_timestamp"],
+                start_timestamp=start,
+                end_timestamp=end,
             )
-
-            if not chunk:
+            elapsed = time.monotonic() - request_start
+            self._endpoint_latency.observe("get_device_history", elapsed)
+
+            if chunk is None:
+                last_error = getattr(self.client, "last_history_error", None) or {}
+                if last_error.get("http_status") == 408 and self._history_windows.record_timeout(
+                    periph_id, start, end
+                ):
+                    if not start:
+                        # Open-ended bootstrap request too heavy: walk forward from a bounded past
+                        progress["last_timestamp"] = now - BOOTSTRAP_LOOKBACK_SECONDS
+                    return []
                 _LOGGER.error("No history data received for %s", periph_id)
                 self._handle_fetch_error(periph_id, "No data received")
                 return []
 
             # Valider les données reçues
-            if not self._validate_history_data(chunk):
+            if chunk and not self._validate_history_data(chunk):
                 _LOGGER.error(f"❌ Données historiques invalides pour {periph_id}")
                 self._handle_fetch_error(periph_id, "Invalid data format")
                 return []
 
-            if len(chunk) < 10000:  # ⚠️ À adapter selon la réponse réelle de l'API eedomus
+            if self._retry_queue.record_success(periph_id):
+                _LOGGER.info("✅ History fetch recovered for %s", periph_id)
+
+            window_end = end if end is not None else now
+            truncated = len(chunk) >= HISTORY_MAX_POINTS
+            # Span actually described by the response: from the first point for the
+            # open-ended bootstrap request, up to the last point when truncated
+            timestamps = [history_entry_timestamp(entry) for entry in chunk]
+            self._history_windows.record_success(
+                periph_id,
+                start or (min(timestamps) if timestamps else window_end),
+                max(timestamps) if truncated else window_end,
+                len(chunk),
+                elapsed,
+                getattr(self.client, "last_history_response_size", None),
+            )
+
+            if window_end >= now and not truncated:
                 progress["completed"] = True
+                self._history_completed_count += 1
                 _LOGGER.info(
                     "History fully fetched for %s (%s) (received %d entries)",
                     periph_id,
@@ -989,6 +1543,11 @@ class EedomusDataUpdateCoordinator(DataUpdateCoordinator):
                     len(chunk),
                 )
 
+            if not chunk:
+                # Empty window: nothing recorded in that range, move the cursor past it
+                progress["last_timestamp"] = window_end
+                self._history_gaps.mark_covered(periph_id, window_end)
+
             if chunk:
                 # Import the history data into Home Assistant states
                 _LOGGER.info(
@@ -1016,10 +1575,15 @@ class EedomusDataUpdateCoordinator(DataUpdateCoordinator):
                         timestamp
                     )
                 
-                progress["last_timestamp"] = max(
-                    int(datetime.fromisoformat(entry["timestamp"]).timestamp())
-                    for entry in chunk
+                self._history_gaps.record_chunk(
+                    periph_id, chunk, requested_start=progress["last_timestamp"]
                 )
+                # A complete window is covered up to its end; a truncated one only up to its last point
+                if truncated:
+                    progress["last_timestamp"] = max(timestamps)
+                else:
+                    progress["last_timestamp"] = max(max(timestamps), window_end)
+                    self._history_gaps.mark_covered(periph_id, window_end)
                 _LOGGER.debug(
                     "Updated last_timestamp for %s to %s",
                     periph_id,
@@ -1027,8 +1591,7 @@ class EedomusDataUpdateCoordinator(DataUpdateCoordinator):
                 )
 
             await self._save_history_progress()
-            # History sensors are now proper entities, no need to recreate them here
-            await self._create_error_sensors()
+            self._notify_history_diagnostics()
             return chunk
             
         except Exception as e:
@@ -1036,72 +1599,19 @@ class EedomusDataUpdateCoordinator(DataUpdateCoordinator):
             self._handle_fetch_error(periph_id, str(e))
             return []
 
-    async def _create_error_sensors(self):
-        """Créer des capteurs pour visualiser les erreurs et la queue de réessais."""
+    def _notify_history_diagnostics(self):
+        """Signal the history diagnostic sensors, only when a counter changed."""
         if not self.hass:
             return
-        
-        try:
-            # Capteur pour le nombre total de périphériques en erreur
-            self.hass.states.async_set(
-                "sensor.eedomus_history_errors_total",
-                str(len(self._retry_queue)),
-                {
-                    "device_class": "problem",
-                    "state_class": "measurement",
-                    "unit_of_measurement": "devices",
-                    "friendly_name": "Eedomus History Errors Total",
-                    "icon": "mdi:alert-circle",
-                    "last_updated": datetime.now().isoformat(),
-                },
-            )
-
-            # Capteur pour le nombre de périphériques complétés
-            completed_count = sum(1 for p in self._history_progress.values() if p.get("completed", False))
-            self.hass.states.async_set(
-                "sensor.eedomus_history_completed",
-                str(completed_count),
-                {
-                    "device_class": "problem",
-                    "state_class": "measurement",
-                    "unit_of_measurement": "devices",
-                    "friendly_name": "Eedomus History Completed",
-                    "icon": "mdi:check-circle",
-                    "last_updated": datetime.now().isoformat(),
-                },
-            )
-
-            # Capteur pour chaque périphérique en erreur
-            for periph_id, error_info in self._retry_queue.items():
-                periph_name = self.data.get(periph_id, {}).get("name", "Unknown")
-                retry_in_hours = max(0, (error_info["retry_after"] - datetime.now().timestamp()) / 3600)
-
-                self.hass.states.async_set(
-                    f"sensor.eedomus_history_error_{periph_id}",
-                    str(retry_in_hours),
-                    {
-                        "device_class": "duration",
-                        "state_class": "measurement",
-                        "unit_of_measurement": "hours",
-                        "friendly_name": f"History Error: {periph_name}",
-                        "icon": "mdi:clock-alert",
-                        "periph_id": periph_id,
-                        "periph_name": periph_name,
-                        "error_message": error_info["error_message"],
-                        "attempts": error_info["attempts"],
-                        "last_updated": datetime.now().isoformat(),
-                    },
-                )
-
-            _LOGGER.info(
-                "✅ Error sensors created: %d devices in retry queue",
-                len(self._retry_queue)
-            )
-            
-        except Exception as e:
-            _LOGGER.error("Error creating error sensors: %s", e)
-
-
+        snapshot = (
+            self._retry_queue.version,
+            self._history_completed_count,
+            len(self._history_progress),
+        )
+        if snapshot == self._history_diagnostics_snapshot:
+            return
+        self._history_diagnostics_snapshot = snapshot
+        async_dispatcher_send(self.hass, SIGNAL_HISTORY_DIAGNOSTICS)
 
     async def async_import_history_chunk(self, periph_id: str, chunk: list, main_entity_id: str = None) -> None:
         """Import historical data using the most reliable method available.
@@ -1219,6 +1729,14 @@ class EedomusDataUpdateCoordinator(DataUpdateCoordinator):
 
     # Add method to set value for a specific peripheral
     async def async_set_periph_value(self, periph_id: str, value: str):
+        """Set the value of a specific peripheral (timed, retries included)."""
+        start = time.monotonic()
+        try:
+            return await self._async_set_periph_value(periph_id, value)
+        finally:
+            self._refresh_latency.observe("set", time.monotonic() - start)
+
+    async def _async_set_periph_value(self, periph_id: str, value: str):
         """Set the value of a specific peripheral."""
         _LOGGER.debug(
             "Setting value '%s' for peripheral '%s' (%s) ",
@@ -1266,7 +1784,16 @@ class EedomusDataUpdateCoordinator(DataUpdateCoordinator):
                      self.data[periph_id]["name"], periph_id, original_value)
         
         # try:
+        api_start = time.monotonic()
         ret = await self.client.set_periph_value(periph_id, value)
+        self._endpoint_latency.observe("set_periph_value", time.monotonic() - api_start)
+        if ret.get("circuit_open"):
+            _LOGGER.warning(
+                "⛔ Cannot set %s (%s): eedomus box unreachable",
+                self.data[periph_id]["name"],
+                periph_id,
+            )
+            return ret
 
         # Log API response details
         _LOGGER.debug("📋 API response for %s (%s): success=%s, error_code=%s",
@@ -1275,8 +1802,10 @@ class EedomusDataUpdateCoordinator(DataUpdateCoordinator):
 
         # Only retry if enabled and we get error_code 6 (value refused)
         if enable_retry and ret.get("success") == 0 and ret.get("error_code") == "6":
+            self._set_value_counts["retries"] += 1
             # Try PHP fallback first if enabled
             if php_fallback_enabled:
+                self._set_value_counts["php_fallback"] += 1
                 _LOGGER.info(
                     "🔄 Trying PHP fallback for %s (%s) with original value: %s",
                     self.data[periph_id]["name"],
@@ -1296,6 +1825,7 @@ class EedomusDataUpdateCoordinator(DataUpdateCoordinator):
                     # Return success response when PHP fallback succeeds
                     return {"success": 1, "fallback_used": True, "value_used": value}
                 else:
+                    self._set_value_counts["php_fallback_failed"] += 1
                     _LOGGER.warning(
                         "⚠️ PHP fallback failed for %s (%s): %s",
                         self.data[periph_id]["name"],
@@ -10,93 +10,38 @@ from homeassistant.core import HomeAssistant
 
 from .const import DOMAIN, COORDINATOR
 from .entity import EedomusEntity
+from .metrics import timed_platform_setup
+from .platform_entities import build_entities, tracked_platform_setup
 
 _LOGGER = logging.getLogger(__name__)
 
 
+def _cover_entities(coordinator, periph_id, periph, children):
+    """Create the cover entity of a peripheral."""
+    _LOGGER.debug(
+        "Creating cover entity for %s (periph_id=%s)", periph["name"], periph_id
+    )
+
+    # Check if this cover has children that should be aggregated
+    if children:
+        # Create aggregated cover entity (similar to RGBW light)
+        return [EedomusAggregatedCover(coordinator, periph_id, children)]
+    # Create regular cover entity
+    return [EedomusCover(coordinator, periph_id)]
+
+
+# Slats (usage_id=48) are already mapped as cover:shutter by the coordinator
+ENTITY_FACTORIES = {"cover": _cover_entities}
+
+
+@timed_platform_setup("cover")
+@tracked_platform_setup("cover", ENTITY_FACTORIES)
 async def async_setup_entry(
     hass: HomeAssistant, entry: ConfigEntry, async_add_entities
 ):
     """Set up eedomus cover entities from config entry."""
     coordinator = hass.data[DOMAIN][entry.entry_id][COORDINATOR]
-    entities = []
-
-    # Get all peripherals and build parent-to-children mapping
-    all_peripherals = coordinator.get_all_peripherals()
-    parent_to_children = {}
-
-    for periph_id, periph in all_peripherals.items():
-        if periph.get("parent_periph_id"):
-            parent_id = periph["parent_periph_id"]
-            if parent_id not in parent_to_children:
-                parent_to_children[parent_id] = []
-            parent_to_children[parent_id].append(periph)
-        if not "ha_entity" in coordinator.data[periph_id]:
-            eedomus_mapping = map_device_to_ha_entity(periph, coordinator.data, coordinator=coordinator)
-            coordinator.data[periph_id].update(eedomus_mapping)
-            # S'assurer que le mapping est enregistré dans le registre global
-            from .entity import _register_device_mapping
-            _register_device_mapping(eedomus_mapping, periph["name"], periph_id, periph)
-
-    for periph_id, periph in all_peripherals.items():
-        ha_entity = None
-        if "ha_entity" in coordinator.data[periph_id]:
-            ha_entity = coordinator.data[periph_id]["ha_entity"]
-
-        parent_id = periph.get("parent_periph_id", None)
-        if parent_id and parent_id in coordinator.data and coordinator.data[parent_id]["ha_entity"] == "cover":
-            # Children are managed by parent... similar to light logic
-            eedomus_mapping = None
-            if periph.get("usage_id") == "26":  # Energy meter
-                eedomus_mapping = {
-                    "ha_entity": "sensor",
-                    "ha_subtype": "energy",
-                    "justification": "Parent is a cover - energy consumption meter",
-                }
-                # Log pour confirmer que le device a été mappé
-                _LOGGER.debug("✅ Device mapped: %s (%s) → %s:%s", 
-                            periph["name"], periph_id, eedomus_mapping["ha_entity"], eedomus_mapping["ha_subtype"])
-            if periph.get("usage_id") == "48":  # Slats
-                eedomus_mapping = {
-                    "ha_entity": "cover",
-                    "ha_subtype": "shutter",
-                    "justification": "Parent is a cover - slats",
-                }
-            if not eedomus_mapping is None:
-                coordinator.data[periph_id].update(eedomus_mapping)
-                _LOGGER.debug(
-                    "Created energy sensor for cover %s (%s) - consumption monitoring",
-                    periph["name"],
-                    periph_id,
-                )
-
-    for periph_id, periph in all_peripherals.items():
-        ha_entity = None
-        if "ha_entity" in coordinator.data[periph_id]:
-            ha_entity = coordinator.data[periph_id]["ha_entity"]
-
-        if ha_entity is None or not ha_entity == "cover":
-            continue
-
-        _LOGGER.debug(
-            "Creating cover entity for %s (periph_id=%s)", periph["name"], periph_id
-        )
-
-        # Check if this cover has children that should be aggregated
-        if periph_id in parent_to_children and len(parent_to_children[periph_id]) > 0:
-            # Create aggregated cover entity (similar to RGBW light)
-            entities.append(
-                EedomusAggregatedCover(
-                    coordinator,
-                    periph_id,
-                    parent_to_children[periph_id],
-                )
-            )
-        else:
-            # Create regular cover entity
-            entities.append(EedomusCover(coordinator, periph_id))
-
-    async_add_entities(entities)
+    async_add_entities(build_entities(coordinator, ENTITY_FACTORIES))
 
 
 class EedomusCover(EedomusEntity, CoverEntity):
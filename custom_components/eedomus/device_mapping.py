@@ -12,6 +12,7 @@ Priority order for device mapping:
 5. Default mapping
 """
 
+import hashlib
 import os
 import logging
 from typing import Dict, Any, Optional
@@ -24,6 +25,21 @@ _LOGGER = logging.getLogger(__name__)
 DEFAULT_MAPPING_FILE = "config/device_mapping.yaml"
 CUSTOM_MAPPING_FILE = "config/custom_mapping.yaml"
 
+# Custom mapping saved by the options flow, in the Home Assistant config dir
+# (the integration directory is replaced on upgrade). Takes precedence over
+# CUSTOM_MAPPING_FILE when it exists.
+CUSTOM_MAPPING_CONFIG_FILE = "custom_mapping.yaml"
+
+# libyaml parser when PyYAML was built with it (several times faster)
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# Compiled mappings are kept in memory, keyed by the digest of the files
+# content. Bump when merge_yaml_mappings changes what it produces.
+# Only repeat loads in the same process (hot reloads, options updates) skip
+# the parsing: the first load after a restart always parses the YAML files
+# (a few milliseconds with CSafeLoader), nothing is persisted on disk.
+MAPPING_CACHE_VERSION = 1
+
 
 def get_absolute_path(relative_path: str) -> str:
     """Convert relative path to absolute path based on module location.
@@ -63,7 +79,7 @@ async def load_yaml_file_async(hass, file_path: str) -> Optional[Dict[str, Any]]
         def _load_yaml_sync():
             try:
                 with open(file_path, 'r', encoding='utf-8') as file:
-                    content = yaml.safe_load(file)
+                    content = yaml.load(file, Loader=YAML_LOADER)
                     
                     if content:
                         _LOGGER.debug("✅ Successfully loaded YAML mapping from %s", file_path)
@@ -160,7 +176,7 @@ def load_yaml_file(file_path: str) -> Optional[Dict[str, Any]]:
         # Note: File I/O during initialization is acceptable as it's not in the hot path
         # For production use, consider using hass.async_add_executor_job if available
         with open(file_path, 'r', encoding='utf-8') as file:
-            content = yaml.safe_load(file)
+            content = yaml.load(file, Loader=YAML_LOADER)
             
             if content:
                 _LOGGER.debug("✅ Successfully loaded YAML mapping from %s", file_path)
@@ -215,6 +231,9 @@ def load_yaml_file(file_path: str) -> Optional[Dict[str, Any]]:
 async def load_yaml_mappings_async(hass, base_path: str = "") -> Dict[str, Any]:
     """Load and merge YAML mappings from default and custom files asynchronously.
     
+    Files are read in the executor; parsing and merging are skipped when the
+    compiled cache matches the files (see load_compiled_mappings).
+    
     Args:
         hass: Home Assistant instance for async operations
         base_path: Base path where YAML files are located (optional)
@@ -223,49 +242,9 @@ async def load_yaml_mappings_async(hass, base_path: str = "") -> Dict[str, Any]:
         Merged mapping configuration
     """
     _LOGGER.debug("🔍 Starting async YAML mappings load process")
-    
-    # Use absolute paths if no base_path provided
-    if base_path:
-        default_file = os.path.join(base_path, DEFAULT_MAPPING_FILE)
-        custom_file = os.path.join(base_path, CUSTOM_MAPPING_FILE)
-    else:
-        # Convert relative paths to absolute paths based on module location
-        default_file = get_absolute_path(DEFAULT_MAPPING_FILE)
-        custom_file = get_absolute_path(CUSTOM_MAPPING_FILE)
-    
-    _LOGGER.debug("📁 Default mapping file path: %s", default_file)
-    _LOGGER.debug("📁 Custom mapping file path: %s", custom_file)
-    
-    # Check if files exist before loading
-    if not os.path.exists(default_file):
-        _LOGGER.error("❌ CRITICAL: Default YAML file not found at: %s", default_file)
-        _LOGGER.error("❌ This will cause all dynamic properties to be empty!")
-    else:
-        _LOGGER.debug("✅ Default YAML file found")
-    
-    if os.path.exists(custom_file):
-        _LOGGER.debug("✅ Custom YAML file found")
-    else:
-        _LOGGER.debug("⚠️  Custom YAML file not found (this is normal): %s", custom_file)
-    
-    # Load mappings asynchronously to avoid blocking warnings
-    _LOGGER.debug("📖 Loading default mapping asynchronously...")
-    default_mapping = await load_yaml_file_async(hass, default_file) or {}
-    _LOGGER.debug("Default mapping loaded: %s", bool(default_mapping))
-    
-    if not default_mapping:
-        _LOGGER.error("❌ CRITICAL: Default mapping could not be loaded!")
-        _LOGGER.error("❌ Check file permissions and YAML syntax")
-    
-    _LOGGER.debug("📖 Loading custom mapping asynchronously...")
-    custom_mapping = await load_yaml_file_async(hass, custom_file) or {}
-    _LOGGER.debug("Custom mapping loaded: %s", bool(custom_mapping))
-    
-    # Merge mappings (custom overrides default)
-    _LOGGER.debug("🔧 Merging mappings...")
-    merged = merge_yaml_mappings(default_mapping, custom_mapping)
-    
-    return merged
+    return await hass.async_add_executor_job(
+        load_compiled_mappings, base_path, hass.config.path(CUSTOM_MAPPING_CONFIG_FILE)
+    )
 
 def load_yaml_mappings(base_path: str = "") -> Dict[str, Any]:
     """Load and merge YAML mappings from default and custom files.
@@ -615,13 +594,17 @@ def load_and_merge_yaml_mappings(base_path: str = "") -> Dict[str, Any]:
         return minimal_config
 
 
-def load_custom_yaml_mappings():
+def load_custom_yaml_mappings(config_file: Optional[str] = None):
     """Load custom mappings from custom_mapping.yaml file.
     
     This function loads user-specific mappings that should not be in the main
     device_mapping.yaml file. This includes temperature sensor mappings and other
     installation-specific configurations.
     
+    Args:
+        config_file: custom_mapping.yaml of the Home Assistant config dir, used
+            instead of the one of the integration when it exists
+    
     Returns:
         dict: Custom mappings or None if file doesn't exist or can't be loaded
         
@@ -636,6 +619,8 @@ def load_custom_yaml_mappings():
         # Get the directory where the current file is located
         current_dir = os.path.dirname(os.path.abspath(__file__))
         custom_mapping_path = os.path.join(current_dir, 'config', 'custom_mapping.yaml')
+        if config_file and os.path.exists(config_file):
+            custom_mapping_path = config_file
         
         if not os.path.exists(custom_mapping_path):
             _LOGGER.debug("Custom mapping file not found at %s", custom_mapping_path)
@@ -644,7 +629,7 @@ def load_custom_yaml_mappings():
         # Load custom mappings using synchronous file I/O
         with open(custom_mapping_path, 'r', encoding='utf-8') as f:
             content = f.read()
-            custom_mappings = yaml.safe_load(content) or {}
+            custom_mappings = yaml.load(content, Loader=YAML_LOADER) or {}
             _LOGGER.debug("Loaded custom mappings from %s", custom_mapping_path)
             return custom_mappings
             
@@ -665,6 +650,90 @@ async def load_custom_yaml_mappings_async(hass):
         dict: Custom mappings or None if file doesn't exist or can't be loaded
     """
     def _load_sync():
-        return load_custom_yaml_mappings()
+        return load_custom_yaml_mappings(hass.config.path(CUSTOM_MAPPING_CONFIG_FILE))
     
     return await hass.async_add_executor_job(_load_sync)
+
+
+# Compiled mappings of this process: (digest, merged), lost on restart
+_COMPILED_MAPPINGS = None
+
+
+def _read_mapping_file(file_path: str) -> Optional[bytes]:
+    try:
+        with open(file_path, "rb") as file:
+            return file.read()
+    except FileNotFoundError:
+        return None
+
+
+def _parse_mapping(content: Optional[bytes], file_path: str) -> Dict[str, Any]:
+    """Parse a mapping file content; list files become advanced rules (as load_yaml_file)."""
+    if not content:
+        return {}
+    try:
+        parsed = yaml.load(content, Loader=YAML_LOADER)
+    except yaml.YAMLError as e:
+        _LOGGER.error("❌ CRITICAL: Failed to parse YAML file %s: %s", file_path, e)
+        return {}
+    if isinstance(parsed, list):
+        parsed = {
+            'advanced_rules': parsed,
+            'usage_id_mappings': {},
+            'name_patterns': [],
+            'dynamic_entity_properties': {},
+            'specific_device_dynamic_overrides': {}
+        }
+    return parsed or {}
+
+
+def load_compiled_mappings(base_path: str = "", config_file: Optional[str] = None) -> Dict[str, Any]:
+    """Return the merged mappings, parsing the YAML files only when they changed.
+    
+    Blocking (file I/O): run it in the executor from async code. The files are
+    always read and hashed; when unchanged, the merged result of the previous
+    call is returned (same object).
+    
+    Args:
+        base_path: Base path where YAML files are located (optional)
+        config_file: custom_mapping.yaml of the Home Assistant config dir
+            (see CUSTOM_MAPPING_CONFIG_FILE), used when it exists
+        
+    Returns:
+        Merged mapping configuration
+    """
+    global _COMPILED_MAPPINGS
+
+    if base_path:
+        default_file = os.path.join(base_path, DEFAULT_MAPPING_FILE)
+        custom_file = os.path.join(base_path, CUSTOM_MAPPING_FILE)
+    else:
+        default_file = get_absolute_path(DEFAULT_MAPPING_FILE)
+        custom_file = get_absolute_path(CUSTOM_MAPPING_FILE)
+
+    default_content = _read_mapping_file(default_file)
+    custom_content = _read_mapping_file(config_file) if config_file else None
+    if custom_content is None:
+        custom_content = _read_mapping_file(custom_file)
+    else:
+        custom_file = config_file
+    if default_content is None:
+        _LOGGER.error("❌ CRITICAL: Default YAML file not found at: %s", default_file)
+
+    digest = hashlib.sha256()
+    digest.update(f"{MAPPING_CACHE_VERSION}:{YAML_LOADER.__name__}".encode())
+    for content in (default_content, custom_content):
+        digest.update(b"\0" if content is None else hashlib.sha256(content).digest())
+    digest = digest.hexdigest()
+
+    if _COMPILED_MAPPINGS is not None and _COMPILED_MAPPINGS[0] == digest:
+        return _COMPILED_MAPPINGS[1]
+
+    _LOGGER.debug("📖 Parsing YAML mappings (%s)", YAML_LOADER.__name__)
+    merged = merge_yaml_mappings(
+        _parse_mapping(default_content, default_file),
+        _parse_mapping(custom_content, custom_file),
+    )
+
+    _COMPILED_MAPPINGS = (digest, merged)
+    return merged
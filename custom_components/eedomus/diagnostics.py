@@ -0,0 +1,51 @@
+"""Diagnostics support for eedomus."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import CONF_API_SECRET, CONF_API_USER, COORDINATOR, DOMAIN
+
+TO_REDACT = {CONF_API_USER, CONF_API_SECRET}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    diagnostics: dict[str, Any] = {
+        "entry": {
+            "data": async_redact_data(dict(entry.data), TO_REDACT),
+            "options": async_redact_data(dict(entry.options), TO_REDACT),
+        },
+    }
+    coordinator = hass.data.get(DOMAIN, {}).get(entry.entry_id, {}).get(COORDINATOR)
+    if coordinator is None:
+        # API proxy only mode: no polling, no latency to report
+        return diagnostics
+
+    diagnostics["coordinator"] = {
+        "peripherals": len(coordinator.data or {}),
+        "dynamic_peripherals": len(coordinator._dynamic_peripherals),
+        "last_refresh_time": coordinator._last_refresh_time,
+        "last_api_time": coordinator._last_api_time,
+        "history_completed": coordinator._history_completed_count,
+        "history_retry_queue": len(coordinator._retry_queue),
+        "stale_since": coordinator.stale_since.isoformat() if coordinator.stale_since else None,
+    }
+    diagnostics["circuit_breaker"] = coordinator.client.circuit.as_dict()
+    scheduler = getattr(coordinator.client, "scheduler", None)
+    if scheduler is not None:
+        diagnostics["request_lanes"] = scheduler.as_dict()
+    diagnostics["startup"] = coordinator._startup_timeline.as_dict()
+    if coordinator._loop_monitor is not None:
+        diagnostics["loop_lag"] = coordinator._loop_monitor.snapshot()
+    diagnostics["latency"] = {
+        "endpoints": coordinator._endpoint_latency.snapshots(),
+        "refresh": coordinator._refresh_latency.snapshots(),
+    }
+    return diagnostics
@@ -13,6 +13,9 @@ import aiohttp
 from async_timeout import timeout as async_timeout
 from homeassistant.config_entries import ConfigEntry
 
+from .api_recording import ApiRecorder
+from .circuit_breaker import HALF_OPEN, PROBE_TIMEOUT, SLOW_CALL_RATIO, CircuitBreaker
+from .request_scheduler import BACKGROUND, INTERACTIVE, POLLING, RequestScheduler
 from .const import (
     DEFAULT_PHP_FALLBACK_ENABLED,
     DEFAULT_PHP_FALLBACK_SCRIPT_NAME,
@@ -63,6 +66,8 @@ class EedomusClient:
         self.base_url_get = f"http://{self.api_host}/api/get"
         self.base_url_set = f"http://{self.api_host}/api/set"
         self.base_url_script = f"http://{self.api_host}/script/?exec="
+        # History is served by the cloud API, not by the box
+        self.base_url_history = f"{HISTORY_API_URL}/get"
 
         # Configuration du PHP fallback
         self.php_fallback_enabled = config_entry.options.get(
@@ -86,6 +91,26 @@ class EedomusClient:
             config_entry.data.get(CONF_HTTP_REQUEST_TIMEOUT, DEFAULT_HTTP_REQUEST_TIMEOUT),
         )
 
+        # Outcome of the last history request (used for adaptive windowing)
+        self.last_history_error: Optional[Dict] = None
+        self.last_history_response_size: Optional[int] = None
+
+        # Set by start_recording() to capture API responses into a fixture
+        self.recorder: Optional[ApiRecorder] = None
+
+        # Cumulative counters exported by the metrics view, keyed by API action
+        self.call_counts: Dict[str, int] = {}
+        self.bytes_received: Dict[str, int] = {}
+        # {(action, error): count}, error is the eedomus error code, "http_<status>",
+        # "timeout", "invalid_json", "client_error" or "circuit_open"
+        self.error_counts: Dict[tuple, int] = {}
+
+        # Requests to the box fail fast while it is unreachable (history goes to the cloud)
+        self.circuit = CircuitBreaker(slow_call_threshold=self.http_request_timeout * SLOW_CALL_RATIO)
+        self._probe_lock = asyncio.Lock()
+        # Commands before polls before history (see request_scheduler)
+        self.scheduler = RequestScheduler()
+
     async def fetch_data(
         self,
         endpoint: str,
@@ -93,8 +118,15 @@ class EedomusClient:
         use_set: bool = False,
         history_mode: bool = False,
         url: Optional[str] = None,
+        lane: Optional[str] = None,
     ) -> Dict:
-        """Fetch data from eedomus API with proper encoding handling."""
+        """Fetch data from eedomus API with proper encoding handling.
+
+        `lane` defaults to interactive for set requests, background for
+        history and polling for the others.
+        """
+        if lane is None:
+            lane = BACKGROUND if history_mode else INTERACTIVE if use_set else POLLING
         if params is None:
             params = {}
         params["api_user"] = self.api_user
@@ -103,75 +135,169 @@ class EedomusClient:
             base_url = self.base_url_set if use_set else self.base_url_get
             url = f"{base_url}?action={endpoint}"
         # When url is provided (e.g. history_mode), it is already fully built.
-        self.url = url
-        self.params = params
+        box_request = not history_mode
+        if box_request and not await self.async_box_available():
+            self._count_error(endpoint, "circuit_open")
+            response = self._format_error_response("eedomus box unreachable (circuit open)", http_status=503)
+            response["circuit_open"] = True
+            return response
+        self.call_counts[endpoint] = self.call_counts.get(endpoint, 0) + 1
 
         try:
-            async with async_timeout(self.http_request_timeout):
-                async with self.session.get(url, params=params) as resp:
-                    # Lire les données brutes
-                    raw_data = await resp.read()
-
-                    # Gestion des statuts HTTP
-                    if resp.status != 200:
-                        try:
-                            error_text = raw_data.decode("utf-8", errors="replace")
-                        except UnicodeDecodeError:
-                            error_text = raw_data.decode("iso-8859-1", errors="replace")
-                        _LOGGER.error(
-                            "HTTP %s error for %s: %s",
-                            resp.status,
-                            endpoint,
-                            error_text,
+            async with self.scheduler.slot(lane):
+                request_start = time.monotonic()
+                async with async_timeout(self.http_request_timeout):
+                    async with self.session.get(url, params=params) as resp:
+                        # Lire les données brutes
+                        raw_data = await resp.read()
+                        if box_request:
+                            if resp.status >= 500:
+                                self.circuit.record_failure(f"HTTP {resp.status}")
+                            else:
+                                self.circuit.record_success(time.monotonic() - request_start)
+                        self.bytes_received[endpoint] = (
+                            self.bytes_received.get(endpoint, 0) + len(raw_data)
                         )
-                        return self._format_error_response(
-                            f"HTTP {resp.status} error", error_text, resp.status
-                        )
-
-                    # Essayer plusieurs encodages pour la réponse
-                    response_text = self._decode_response(raw_data)
 
-                    # Parsing de la réponse
-                    try:
-                        response_data = json.loads(response_text)
+                        if self.recorder is not None:
+                            self.recorder.record(
+                                endpoint,
+                                self._get_safe_url_for_logging(url),
+                                self._get_safe_params_for_logging(params),
+                                resp.status,
+                                self._decode_response(raw_data),
+                                time.monotonic() - request_start,
+                            )
 
-                        # Normalisation de la structure de réponse
-                        if not isinstance(response_data, dict):
+                        # Gestion des statuts HTTP
+                        if resp.status != 200:
+                            try:
+                                error_text = raw_data.decode("utf-8", errors="replace")
+                            except UnicodeDecodeError:
+                                error_text = raw_data.decode("iso-8859-1", errors="replace")
+                            _LOGGER.error(
+                                "HTTP %s error for %s: %s",
+                                resp.status,
+                                endpoint,
+                                error_text,
+                            )
+                            self._count_error(endpoint, f"http_{resp.status}")
                             return self._format_error_response(
-                                "Invalid response format", response_text
+                                f"HTTP {resp.status} error", error_text, resp.status
                             )
 
-                        # Gestion des réponses d'erreur eedomus
-                        success = response_data.get("success")
-                        if success == "0" or success == 0:
-                            return self._handle_eedomus_error(response_data)
+                        # Essayer plusieurs encodages pour la réponse
+                        response_text = self._decode_response(raw_data)
 
-                        # Normalisation du champ success
-                        response_data["success"] = 1
-                        # Add raw data size for volume tracking
-                        response_data["_raw_data_size_bytes"] = len(raw_data)
-                        return response_data
+                        # Parsing de la réponse
+                        try:
+                            response_data = json.loads(response_text)
+
+                            # Normalisation de la structure de réponse
+                            if not isinstance(response_data, dict):
+                                self._count_error(endpoint, "invalid_json")
+                                return self._format_error_response(
+                                    "Invalid response format", response_text
+                                )
+
+                            # Gestion des réponses d'erreur eedomus
+                            success = response_data.get("success")
+                            if success == "0" or success == 0:
+                                error_response = self._handle_eedomus_error(response_data, url, params)
+                                self._count_error(endpoint, str(error_response.get("error_code") or "unknown"))
+                                return error_response
+
+                            # Normalisation du champ success
+                            response_data["success"] = 1
+                            # Add raw data size for volume tracking
+                            response_data["_raw_data_size_bytes"] = len(raw_data)
+                            return response_data
 
-                    except json.JSONDecodeError:
-                        _LOGGER.error(
-                            "Invalid JSON response for %s: %s", endpoint, response_text
-                        )
-                        return self._format_error_response(
-                            "Invalid JSON response", response_text
-                        )
+                        except json.JSONDecodeError:
+                            _LOGGER.error(
+                                "Invalid JSON response for %s: %s", endpoint, response_text
+                            )
+                            self._count_error(endpoint, "invalid_json")
+                            return self._format_error_response(
+                                "Invalid JSON response", response_text
+                            )
 
         except asyncio.TimeoutError:
             _LOGGER.warning("⏳ Request timed out for %s - will retry on next refresh cycle", endpoint)
+            self._count_error(endpoint, "timeout")
+            if box_request:
+                self.circuit.record_failure("timeout")
             return self._format_error_response("Request timed out", http_status=408)
 
         except aiohttp.ClientError as e:
             _LOGGER.error("Client error for %s: %s", endpoint, str(e))
+            self._count_error(endpoint, "client_error")
+            if box_request:
+                self.circuit.record_failure(type(e).__name__)
             return self._format_error_response(str(e))
 
         except Exception as e:
             _LOGGER.error("Unexpected error for %s: %s", endpoint, str(e))
+            self._count_error(endpoint, "client_error")
             return self._format_error_response(str(e))
 
+    async def async_box_available(self) -> bool:
+        """False while the circuit breaker is open; probes the box when due."""
+        if self.circuit.is_closed:
+            return True
+        if self.circuit.probe_due():
+            async with self._probe_lock:
+                # Concurrent callers wait for the probe in progress instead of sending theirs
+                if self.circuit.probe_due():
+                    await self._async_probe()
+        return self.circuit.is_closed
+
+    async def _async_probe(self) -> None:
+        """Send a cheap auth.test with a short timeout to close or re-open the circuit.
+
+        The circuit never stays half-open: whatever interrupts the probe
+        (cancellation included) re-opens it with the next backoff delay.
+        """
+        self.circuit.start_probe()
+        self.call_counts["auth.test"] = self.call_counts.get("auth.test", 0) + 1
+        params = {"api_user": self.api_user, "api_secret": self.api_secret}
+        request_start = time.monotonic()
+        try:
+            async with async_timeout(PROBE_TIMEOUT):
+                async with self.session.get(f"{self.base_url_get}?action=auth.test", params=params) as resp:
+                    await resp.read()
+                    status = resp.status
+            if status >= 500:
+                self.circuit.record_failure(f"probe HTTP {status}")
+            else:
+                self.circuit.record_success(time.monotonic() - request_start)
+        except asyncio.TimeoutError:
+            self.circuit.record_failure("probe timeout")
+        except aiohttp.ClientError as e:
+            self.circuit.record_failure(f"probe {type(e).__name__}")
+        except Exception as e:
+            _LOGGER.exception("Unexpected error while probing the eedomus box: %s", e)
+            self.circuit.record_failure(f"probe {type(e).__name__}")
+        finally:
+            # Cancelled: re-open the circuit, the CancelledError propagates
+            if self.circuit.state == HALF_OPEN:
+                self.circuit.record_failure("probe cancelled")
+
+    def _count_error(self, endpoint: str, error: str) -> None:
+        key = (endpoint, error)
+        self.error_counts[key] = self.error_counts.get(key, 0) + 1
+
+    def start_recording(self, path: str) -> ApiRecorder:
+        """Record every API response (credentials redacted) until stop_recording()."""
+        self.recorder = ApiRecorder(path)
+        _LOGGER.info("⏺️ Recording eedomus API responses to %s", path)
+        return self.recorder
+
+    def stop_recording(self) -> Optional[ApiRecorder]:
+        """Stop recording and return the recorder; call its save() in an executor."""
+        recorder, self.recorder = self.recorder, None
+        return recorder
+
     def _decode_response(self, raw_data: bytes) -> str:
         """Try multiple encodings to decode the response."""
         encodings = ["utf-8", "iso-8859-1", "latin-1", "windows-1252"]
@@ -184,17 +310,15 @@ class EedomusClient:
         # Si tout échoue, utiliser un remplacement de caractères
         return raw_data.decode("utf-8", errors="replace")
 
-    def _get_safe_url_for_logging(self) -> str:
-        """Return a version of self.url safe to log (no secrets in query string)."""
-        url = getattr(self, "url", "")
+    def _get_safe_url_for_logging(self, url: str) -> str:
+        """Return a version of `url` safe to log (no secrets in query string)."""
         # Strip query parameters entirely to avoid logging api_user/api_secret.
         if "?" in url:
             return url.split("?", 1)[0]
         return url
 
-    def _get_safe_params_for_logging(self) -> Dict[str, Any]:
-        """Return a copy of self.params with sensitive fields redacted."""
-        params = getattr(self, "params", {})
+    def _get_safe_params_for_logging(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Return a copy of `params` with sensitive fields redacted."""
         if not isinstance(params, dict):
             return {}
         redacted = {}
@@ -223,8 +347,8 @@ class EedomusClient:
             response["raw_response"] = raw_response
         return response
 
-    def _handle_eedomus_error(self, response: Dict) -> Dict:
-        """Handle eedomus-specific error responses."""
+    def _handle_eedomus_error(self, response: Dict, url: str, params: Dict[str, Any]) -> Dict:
+        """Handle eedomus-specific error responses of the request to `url`."""
         error_code = None
         error_msg = "Unknown eedomus error"
         if isinstance(response, dict):
@@ -243,8 +367,8 @@ class EedomusClient:
 
         _LOGGER.debug(
             "Eedomus API error request url %s params %s",
-            self._get_safe_url_for_logging(),
-            self._get_safe_params_for_logging(),
+            self._get_safe_url_for_logging(url),
+            self._get_safe_params_for_logging(params),
         )
         return {
             "success": 0,
@@ -295,6 +419,8 @@ class EedomusClient:
         if not self.php_fallback_enabled:
             _LOGGER.warning("PHP fallback is not configured or disabled")
             return {"success": 0, "error": "PHP fallback not configured"}
+        if not await self.async_box_available():
+            return {"success": 0, "error": "eedomus box unreachable (circuit open)", "circuit_open": True}
 
         # Construct the PHP fallback script URL
         php_fallback_script_url = (
@@ -310,62 +436,64 @@ class EedomusClient:
                 params,
             )
 
-            async with async_timeout(self.php_fallback_timeout):
-                async with self.session.get(
-                    php_fallback_script_url, params=params
-                ) as resp:
-                    raw_data = await resp.read()
-
-                    if resp.status != 200:
-                        error_text = raw_data.decode("utf-8", errors="replace")
-                        _LOGGER.error(
-                            "PHP fallback script error: HTTP %s - %s",
-                            resp.status,
-                            error_text,
-                        )
-                        return {
-                            "success": 0,
-                            "error": f"PHP fallback script error: HTTP {resp.status}",
-                            "details": error_text,
-                        }
-
-                    response_text = raw_data.decode("utf-8", errors="replace")
-
-                    # Parse the JSON response from the PHP fallback script
-                    try:
-                        response_data = json.loads(response_text)
-
-                        # Extract duration from response if available
-                        duration = response_data.get("duration", "N/A")
-
-                        if (
-                            isinstance(response_data, dict)
-                            and response_data.get("success") == 1
-                        ):
-                            _LOGGER.info(
-                                "PHP fallback succeeded for peripheral %s (duration: %ss)",
-                                periph_id,
-                                duration,
+            # Part of a user command: interactive lane
+            async with self.scheduler.slot(INTERACTIVE):
+                async with async_timeout(self.php_fallback_timeout):
+                    async with self.session.get(
+                        php_fallback_script_url, params=params
+                    ) as resp:
+                        raw_data = await resp.read()
+
+                        if resp.status != 200:
+                            error_text = raw_data.decode("utf-8", errors="replace")
+                            _LOGGER.error(
+                                "PHP fallback script error: HTTP %s - %s",
+                                resp.status,
+                                error_text,
                             )
-                            return response_data
-                        else:
-                            _LOGGER.warning(
-                                "PHP fallback failed for peripheral %s (duration: %ss): %s",
-                                periph_id,
-                                duration,
-                                response_data.get("error", "Unknown error"),
+                            return {
+                                "success": 0,
+                                "error": f"PHP fallback script error: HTTP {resp.status}",
+                                "details": error_text,
+                            }
+
+                        response_text = raw_data.decode("utf-8", errors="replace")
+
+                        # Parse the JSON response from the PHP fallback script
+                        try:
+                            response_data = json.loads(response_text)
+
+                            # Extract duration from response if available
+                            duration = response_data.get("duration", "N/A")
+
+                            if (
+                                isinstance(response_data, dict)
+                                and response_data.get("success") == 1
+                            ):
+                                _LOGGER.info(
+                                    "PHP fallback succeeded for peripheral %s (duration: %ss)",
+                                    periph_id,
+                                    duration,
+                                )
+                                return response_data
+                            else:
+                                _LOGGER.warning(
+                                    "PHP fallback failed for peripheral %s (duration: %ss): %s",
+                                    periph_id,
+                                    duration,
+                                    response_data.get("error", "Unknown error"),
+                                )
+                                return response_data
+                        except json.JSONDecodeError:
+                            _LOGGER.error(
+                                "Invalid JSON response from PHP fallback script: %s",
+                                response_text,
                             )
-                            return response_data
-                    except json.JSONDecodeError:
-                        _LOGGER.error(
-                            "Invalid JSON response from PHP fallback script: %s",
-                            response_text,
-                        )
-                        return {
-                            "success": 0,
-                            "error": "Invalid JSON response from PHP fallback script",
-                            "details": response_text,
-                        }
+                            return {
+                                "success": 0,
+                                "error": "Invalid JSON response from PHP fallback script",
+                                "details": response_text,
+                            }
 
         except asyncio.TimeoutError:
             _LOGGER.error("PHP fallback script request timed out")
@@ -520,7 +648,7 @@ class EedomusClient:
         Returns:
             list: Liste de dictionnaires {"value": str, "timestamp": str}.
         """
-        base_url = f"{HISTORY_API_URL}/get"
+        base_url = self.base_url_history
         params = {
             "action": "periph.history",
             "periph_id": periph_id,
@@ -537,6 +665,8 @@ class EedomusClient:
                 url=base_url,
             )
             if data.get("success") == 1:
+                self.last_history_error = None
+                self.last_history_response_size = data.get("_raw_data_size_bytes")
                 return [
                     {
                         "value": entry[0],
@@ -545,6 +675,8 @@ class EedomusClient:
                     for entry in data.get("body", {}).get("history", [])
                 ]
             else:
+                # Kept so the caller can tell a timeout (http_status 408) from other failures
+                self.last_history_error = data
                 _LOGGER.error(
                     "Failed to fetch history: %s", data.get("message", "Unknown error")
                 )
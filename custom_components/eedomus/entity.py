@@ -4,113 +4,70 @@ from __future__ import annotations
 from datetime import datetime
 import re
 import logging
-import os
-import json
 
+from homeassistant.core import callback
 from homeassistant.helpers.entity import DeviceInfo, Entity
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from .const import ATTR_PERIPH_ID, DOMAIN, EEDOMUS_TO_HA_ATTR_MAPPING
-from .device_mapping import load_and_merge_yaml_mappings, load_yaml_mappings
+from .device_mapping import load_compiled_mappings
 from .mapping_registry import register_device_mapping, get_mapping_registry, print_mapping_table, print_mapping_summary
 from .mapping_rules import evaluate_conditions
 
-# Get version from manifest.json
-try:
-    manifest_path = os.path.join(os.path.dirname(__file__), "manifest.json")
-    with open(manifest_path, "r") as f:
-        manifest_data = json.load(f)
-        VERSION = manifest_data.get("version", "unknown")
-except Exception as e:
-    VERSION = "unknown"
-    _LOGGER.warning("Failed to read version from manifest.json: %s", e)
-
 _LOGGER = logging.getLogger(__name__)
 
-# Global variable to store loaded mappings
-# NOTE: DEVICE_MAPPINGS is initialized at module load time using synchronous YAML loading.
-# This triggers a single blocking warning during Home Assistant startup, which is acceptable.
-# All runtime operations use the coordinator's async-loaded cache via get_yaml_config_sync().
-# This architecture follows Home Assistant patterns where module initialization may have
-# blocking I/O warnings, but runtime operations are fully asynchronous.
+# Merged YAML mappings used by map_device_to_ha_entity. Installed by the
+# coordinator once loaded in the executor (install_device_mappings): importing
+# this module does no file I/O.
 DEVICE_MAPPINGS = None
+NAME_PATTERNS = []
 
-# Initialize YAML mappings when module is loaded
-try:
-    _LOGGER.debug("🚀 Starting DEVICE_MAPPINGS initialization...")
-    DEVICE_MAPPINGS = load_and_merge_yaml_mappings()
-    
-    if DEVICE_MAPPINGS:
-        _LOGGER.debug("✅ YAML device mappings initialized successfully")
-        
-        # Critical checks for dynamic properties
-        dynamic_props = DEVICE_MAPPINGS.get('dynamic_entity_properties', {})
-        specific_overrides = DEVICE_MAPPINGS.get('specific_device_dynamic_overrides', {})
-        
-        _LOGGER.debug("📊 DEVICE_MAPPINGS summary:")
-        _LOGGER.debug("   📋 Usage ID mappings: %d", len(DEVICE_MAPPINGS.get('usage_id_mappings', {})))
-        _LOGGER.debug("   🤖 Advanced rules: %d", len(DEVICE_MAPPINGS.get('advanced_rules', [])))
-        _LOGGER.debug("   📝 Name patterns: %d", len(DEVICE_MAPPINGS.get('name_patterns', [])))
-        _LOGGER.debug("   ⚡ Dynamic entity properties: %s", dynamic_props)
-        _LOGGER.debug("   🎛️ Specific device overrides: %s", specific_overrides)
-        _LOGGER.debug("   🎯 Specific device mappings: %d", len(DEVICE_MAPPINGS.get('specific_device_mappings', {})))
-        
-        # Critical error if dynamic properties are missing
-        if not dynamic_props:
-            _LOGGER.error("❌ CRITICAL ERROR: dynamic_entity_properties is empty!")
-            _LOGGER.error("❌ This will cause ALL devices to be treated as static!")
-            _LOGGER.error("❌ No partial refresh will work - performance will be severely impacted!")
-            _LOGGER.error("❌ Check YAML file and loading process immediately!")
-        else:
-            _LOGGER.debug("✅ Dynamic properties loaded: %s", dynamic_props)
-            
-        if not specific_overrides:
-            _LOGGER.debug("⚠️  No specific device overrides (this is normal)")
-        else:
-            _LOGGER.debug("✅ Specific device overrides loaded: %s", specific_overrides)
-            
-    else:
+
+def install_device_mappings(mappings: dict) -> None:
+    """Use `mappings` (merged YAML configuration) for the device mapping."""
+    global DEVICE_MAPPINGS, NAME_PATTERNS
+
+    if not mappings:
         _LOGGER.error("❌ CRITICAL ERROR: DEVICE_MAPPINGS is None or empty!")
-        _LOGGER.error("❌ This will cause complete failure of device mapping!")
-        raise Exception("DEVICE_MAPPINGS initialization failed - cannot continue")
-        
-except Exception as e:
-    _LOGGER.error("❌ CRITICAL ERROR: Failed to initialize YAML mappings: %s", e)
-    _LOGGER.error("❌ This is a fatal error - device mapping will not work!")
-    import traceback
-    _LOGGER.error("Exception details: %s", traceback.format_exc())
-    _LOGGER.warning("⚠️  Using fallback mapping configuration - expect major issues!")
-    
-    # Fallback configuration with error tracking
-    DEVICE_MAPPINGS = {
-        'usage_id_mappings': {},
-        'advanced_rules': [],
-        'name_patterns': [],
-        'dynamic_entity_properties': {},
-        'specific_device_dynamic_overrides': {},
-        'default_mapping': {
-            'ha_entity': 'sensor',
-            'ha_subtype': 'unknown',
-            'justification': 'Fallback mapping - YAML loading failed!'
-        },
-        '_initialization_error': str(e)
-    }
-    
-    _LOGGER.error("❌ DEVICE_MAPPINGS set to fallback: %s", DEVICE_MAPPINGS)
+        _LOGGER.warning("⚠️  Using fallback mapping configuration - expect major issues!")
+        mappings = {
+            'usage_id_mappings': {},
+            'advanced_rules': [],
+            'name_patterns': [],
+            'dynamic_entity_properties': {},
+            'specific_device_dynamic_overrides': {},
+            'default_mapping': {
+                'ha_entity': 'sensor',
+                'ha_subtype': 'unknown',
+                'justification': 'Fallback mapping - YAML loading failed!'
+            },
+            '_initialization_error': 'YAML mappings not loaded'
+        }
+    DEVICE_MAPPINGS = mappings
+    NAME_PATTERNS = mappings.get('name_patterns', []) or []
 
-# Load name patterns for device name matching
-try:
-    # Try to get YAML config via coordinator if available (uses cached async-loaded config)
-    if 'coordinator' in locals() and hasattr(coordinator, 'get_yaml_config_sync'):
-        yaml_config = coordinator.get_yaml_config_sync()
-    else:
-        # Fallback to synchronous loading (during initialization)
-        yaml_config = load_yaml_mappings()  # Sync loading
-    NAME_PATTERNS = yaml_config.get('name_patterns', []) if yaml_config else []
-    _LOGGER.info("Loaded %d name patterns from YAML configuration", len(NAME_PATTERNS))
-except Exception as e:
-    _LOGGER.error("Failed to load name patterns: %s", e)
-    NAME_PATTERNS = []
+    dynamic_props = mappings.get('dynamic_entity_properties', {})
+    _LOGGER.debug("📊 DEVICE_MAPPINGS summary:")
+    _LOGGER.debug("   📋 Usage ID mappings: %d", len(mappings.get('usage_id_mappings', {})))
+    _LOGGER.debug("   🤖 Advanced rules: %d", len(mappings.get('advanced_rules', [])))
+    _LOGGER.debug("   📝 Name patterns: %d", len(NAME_PATTERNS))
+    _LOGGER.debug("   ⚡ Dynamic entity properties: %s", dynamic_props)
+    _LOGGER.debug("   🎯 Specific device mappings: %d", len(mappings.get('specific_device_mappings', {})))
+
+    # Critical error if dynamic properties are missing
+    if not dynamic_props:
+        _LOGGER.error("❌ CRITICAL ERROR: dynamic_entity_properties is empty!")
+        _LOGGER.error("❌ This will cause ALL devices to be treated as static!")
+        _LOGGER.error("❌ No partial refresh will work - performance will be severely impacted!")
+
+
+def _ensure_device_mappings() -> None:
+    """Load the mappings synchronously when nothing installed them (scripts, tests).
+
+    Within Home Assistant the coordinator installs them before any mapping.
+    """
+    if DEVICE_MAPPINGS is None:
+        install_device_mappings(load_compiled_mappings())
 
 
 class EedomusEntity(CoordinatorEntity):
@@ -193,6 +150,16 @@ class EedomusEntity(CoordinatorEntity):
             via_device=(DOMAIN, "eedomus_box_main"),
         )
 
+    @property
+    def extra_state_attributes(self):
+        """Return the data age attributes (see _data_age_attributes)."""
+        return self._data_age_attributes() or None
+
+    def _data_age_attributes(self) -> dict:
+        """data_updated_at/stale while the box is unreachable, nothing when fresh."""
+        data_age_attributes = getattr(self.coordinator, "data_age_attributes", None)
+        return data_age_attributes(self._periph_id) if data_age_attributes else {}
+
     async def async_update(self):
         """Update the entity state.
         
@@ -201,6 +168,13 @@ class EedomusEntity(CoordinatorEntity):
         """
         await self.coordinator.async_request_refresh()
 
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the new state, counting updates for the metrics view."""
+        if hasattr(self.coordinator, "_entity_update_count"):
+            self.coordinator._entity_update_count += 1
+        super()._handle_coordinator_update()
+
     async def async_added_to_hass(self):
         """Call when the entity is added to Home Assistant.
         
@@ -208,6 +182,13 @@ class EedomusEntity(CoordinatorEntity):
         Schedules initial state update to ensure the entity has current data.
         """
         await super().async_added_to_hass()
+        # Push updates (webhook) only notify the entities of the pushed peripheral
+        if hasattr(self.coordinator, "async_add_periph_listener"):
+            self.async_on_remove(
+                self.coordinator.async_add_periph_listener(
+                    self._periph_id, self._handle_coordinator_update
+                )
+            )
         # Schedule a regular update to ensure consistency
         self.async_schedule_update_ha_state()
 
@@ -247,7 +228,7 @@ class EedomusEntity(CoordinatorEntity):
             )
             return None
 
-def map_device_to_ha_entity(device_data, all_devices=None, default_ha_entity: str = "sensor", coordinator=None, parent_child_relations=None):
+def map_device_to_ha_entity(device_data, all_devices=None, default_ha_entity: str = "sensor", coordinator=None, parent_child_relations=None, yaml_config=None):
     """Map an eedomus device to a Home Assistant entity.
     
     Core device mapping function that determines how eedomus devices are represented
@@ -256,6 +237,7 @@ def map_device_to_ha_entity(device_data, all_devices=None, default_ha_entity: st
     Args:
         coordinator: Optional coordinator instance for async YAML loading
         parent_child_relations: Pre-computed parent-child relationships to resolve timing issues
+        yaml_config: Already loaded YAML config (executor jobs, which have no coordinator)
     
     Priority order:
     1. Advanced rules (parent-child relationships, RGBW detection)
@@ -273,6 +255,7 @@ def map_device_to_ha_entity(device_data, all_devices=None, default_ha_entity: st
     Returns:
         Dictionary with ha_entity, ha_subtype, and justification keys
     """
+    _ensure_device_mappings()
     periph_id = device_data["periph_id"]
     periph_name = device_data["name"]
     usage_id = device_data.get("usage_id")
@@ -291,12 +274,13 @@ def map_device_to_ha_entity(device_data, all_devices=None, default_ha_entity: st
     # Priorité 1: Règles avancées (nécessite all_devices)
     # Use the pre-converted dict format from device_mapping.py
     if periph_id == "1269454":
-        _LOGGER.debug("SPECIAL DEBUG (v%s): Device 1269454 - advanced_rules type: %s", 
-                     VERSION, type(DEVICE_MAPPINGS.get('advanced_rules')))
-        _LOGGER.debug("SPECIAL DEBUG (v%s): Device 1269454 - advanced_rules_dict type: %s", 
-                     VERSION, type(DEVICE_MAPPINGS.get('advanced_rules_dict')))
-        _LOGGER.debug("SPECIAL DEBUG (v%s): Device 1269454 - advanced_rules_dict content: %s", 
-                     VERSION, DEVICE_MAPPINGS.get('advanced_rules_dict'))
+        mapping_version = DEVICE_MAPPINGS.get('metadata', {}).get('version', 'unknown')
+        _LOGGER.debug("SPECIAL DEBUG (mapping v%s): Device 1269454 - advanced_rules type: %s", 
+                     mapping_version, type(DEVICE_MAPPINGS.get('advanced_rules')))
+        _LOGGER.debug("SPECIAL DEBUG (mapping v%s): Device 1269454 - advanced_rules_dict type: %s", 
+                     mapping_version, type(DEVICE_MAPPINGS.get('advanced_rules_dict')))
+        _LOGGER.debug("SPECIAL DEBUG (mapping v%s): Device 1269454 - advanced_rules_dict content: %s", 
+                     mapping_version, DEVICE_MAPPINGS.get('advanced_rules_dict'))
     
     # Use the pre-converted dict format if available, otherwise fall back to old conversion
     if 'advanced_rules_dict' in DEVICE_MAPPINGS and isinstance(DEVICE_MAPPINGS['advanced_rules_dict'], dict):
@@ -504,7 +488,7 @@ def map_device_to_ha_entity(device_data, all_devices=None, default_ha_entity: st
                             parent_id, parent.get("name"), parent.get("usage_id"))
                 
                 # Check if parent is mapped as RGBW
-                parent_mapping = map_device_to_ha_entity(parent, all_devices, coordinator=coordinator)
+                parent_mapping = map_device_to_ha_entity(parent, all_devices, coordinator=coordinator, yaml_config=yaml_config)
                 _LOGGER.debug("🔍 Parent mapping: %s:%s", 
                             parent_mapping["ha_entity"], parent_mapping["ha_subtype"])
         
@@ -569,11 +553,11 @@ def map_device_to_ha_entity(device_data, all_devices=None, default_ha_entity: st
     # Priorité 5: Mapping par défaut (YAML fallback)
     try:
         # Try to get YAML config via coordinator if available (uses cached async-loaded config)
-        if coordinator is not None and hasattr(coordinator, 'get_yaml_config_sync'):
+        if yaml_config is None and coordinator is not None and hasattr(coordinator, 'get_yaml_config_sync'):
             yaml_config = coordinator.get_yaml_config_sync()
-        else:
-            # Fallback to synchronous loading (during initialization)
-            yaml_config = load_yaml_mappings()  # Sync loading
+        elif yaml_config is None:
+            # Same merged configuration, installed above
+            yaml_config = DEVICE_MAPPINGS
         if yaml_config and 'default_mapping' in yaml_config:
             default_config = yaml_config['default_mapping']
             mapping = {
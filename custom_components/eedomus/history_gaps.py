@@ -0,0 +1,203 @@
+"""History gap detection for eedomus integration.
+
+Tracks, per peripheral, which part of the history has been imported into Home
+Assistant and which ``[start, end]`` windows are still missing (HA downtime,
+failed chunks, holes in a chunk compared to the expected sampling cadence).
+Only those windows are re-requested from the eedomus history API instead of
+downloading the whole history again.
+"""
+
+from __future__ import annotations
+
+import logging
+from datetime import datetime
+from statistics import median
+from typing import Dict, List, Optional, Tuple
+
+_LOGGER = logging.getLogger(__name__)
+
+# A hole is reported when two consecutive points are further apart than
+# GAP_TOLERANCE times the expected cadence (and at least MIN_GAP_SECONDS).
+GAP_TOLERANCE = 3.0
+MIN_GAP_SECONDS = 900
+# Cadence used before any history has been observed for a peripheral
+DEFAULT_CADENCE_SECONDS = 300
+# A window that keeps failing is dropped after this many repair attempts
+MAX_REPAIR_ATTEMPTS = 3
+
+
+def history_entry_timestamp(entry: dict) -> int:
+    """Return the epoch timestamp of a history entry {"value", "timestamp"}."""
+    return int(datetime.fromisoformat(entry["timestamp"]).timestamp())
+
+
+def estimate_sampling_interval(timestamps: List[int]) -> Optional[float]:
+    """Estimate the sampling cadence (median interval) of a list of timestamps."""
+    ordered = sorted(timestamps)
+    deltas = [b - a for a, b in zip(ordered, ordered[1:]) if b > a]
+    if not deltas:
+        return None
+    return float(median(deltas))
+
+
+def find_history_gaps(
+    timestamps: List[int],
+    expected_interval: float,
+    tolerance: float = GAP_TOLERANCE,
+    min_gap: int = MIN_GAP_SECONDS,
+) -> List[Tuple[int, int]]:
+    """Return the ``(start, end)`` windows where consecutive points are too far apart."""
+    threshold = max(expected_interval * tolerance, min_gap)
+    ordered = sorted(timestamps)
+    return [(a, b) for a, b in zip(ordered, ordered[1:]) if b - a > threshold]
+
+
+def merge_windows(windows: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Merge overlapping or touching windows, sorted by start."""
+    merged: List[Tuple[int, int]] = []
+    for start, end in sorted(windows):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class HistoryGapTracker:
+    """Keep the imported coverage, cadence and missing windows of each peripheral."""
+
+    def __init__(self):
+        """Initialize an empty tracker."""
+        self._covered_until: Dict[str, int] = {}
+        self._cadence: Dict[str, float] = {}
+        self._gaps: Dict[str, List[Tuple[int, int]]] = {}
+        self._attempts: Dict[Tuple[str, int, int], int] = {}
+
+    def cadence(self, periph_id: str) -> float:
+        """Return the expected sampling cadence of a peripheral in seconds."""
+        return self._cadence.get(periph_id, DEFAULT_CADENCE_SECONDS)
+
+    def covered_until(self, periph_id: str) -> Optional[int]:
+        """Return the newest timestamp known to be present in Home Assistant."""
+        return self._covered_until.get(periph_id)
+
+    def gaps(self, periph_id: str) -> List[Tuple[int, int]]:
+        """Return the pending windows of a peripheral."""
+        return list(self._gaps.get(periph_id, []))
+
+    def pending_count(self) -> int:
+        """Return the number of pending windows across all peripherals."""
+        return sum(len(windows) for windows in self._gaps.values())
+
+    def add_gap(self, periph_id: str, start: int, end: int) -> None:
+        """Record a missing ``[start, end]`` window."""
+        if end <= start:
+            return
+        windows = self._gaps.setdefault(periph_id, [])
+        windows.append((int(start), int(end)))
+        self._gaps[periph_id] = merge_windows(windows)
+        _LOGGER.debug("🕳️ History gap recorded for %s: %s → %s", periph_id, start, end)
+
+    def record_chunk(self, periph_id: str, chunk: List[dict], requested_start: int = 0) -> None:
+        """Analyse an imported chunk: update cadence, coverage and detect holes."""
+        timestamps = [history_entry_timestamp(entry) for entry in chunk]
+        if not timestamps:
+            return
+
+        interval = estimate_sampling_interval(timestamps)
+        if interval:
+            previous = self._cadence.get(periph_id)
+            # Smooth the estimate so one irregular chunk doesn't swing it
+            self._cadence[periph_id] = interval if previous is None else (previous + interval) / 2
+
+        cadence = self.cadence(periph_id)
+        for start, end in find_history_gaps(timestamps, cadence):
+            self.add_gap(periph_id, start, end)
+
+        # Hole between what was already covered and the first point of the chunk
+        first = min(timestamps)
+        covered = self._covered_until.get(periph_id) or requested_start
+        if covered and first - covered > max(cadence * GAP_TOLERANCE, MIN_GAP_SECONDS):
+            self.add_gap(periph_id, covered, first)
+
+        self._covered_until[periph_id] = max(timestamps + [self._covered_until.get(periph_id, 0)])
+
+    def record_live_update(self, periph_id: str, timestamp: int) -> None:
+        """Extend coverage with a value observed while Home Assistant was running."""
+        covered = self._covered_until.get(periph_id)
+        if covered is None:
+            # History import never ran for this peripheral: nothing to compare against
+            return
+        if timestamp - covered > max(self.cadence(periph_id) * GAP_TOLERANCE, MIN_GAP_SECONDS):
+            # Home Assistant was down (or polling stopped) between both points
+            self.add_gap(periph_id, covered, timestamp)
+        if timestamp > covered:
+            self._covered_until[periph_id] = timestamp
+
+    def mark_covered(self, periph_id: str, timestamp: int) -> None:
+        """Extend coverage over a window proven empty by the history API."""
+        if timestamp > self._covered_until.get(periph_id, 0):
+            self._covered_until[periph_id] = int(timestamp)
+
+    def next_windows(self, limit: int) -> List[Tuple[str, int, int]]:
+        """Return up to ``limit`` pending windows, oldest first."""
+        candidates = [
+            (start, periph_id, end)
+            for periph_id, windows in self._gaps.items()
+            for start, end in windows
+        ]
+        candidates.sort()
+        return [(periph_id, start, end) for start, periph_id, end in candidates[:limit]]
+
+    def resolve(self, periph_id: str, start: int, end: int) -> None:
+        """Remove a window once it has been repaired (or proven empty)."""
+        windows = [w for w in self._gaps.get(periph_id, []) if w != (start, end)]
+        if windows:
+            self._gaps[periph_id] = windows
+        else:
+            self._gaps.pop(periph_id, None)
+        self._attempts.pop((periph_id, start, end), None)
+
+    def record_failure(self, periph_id: str, start: int, end: int) -> bool:
+        """Count a failed repair; return True when the window was given up."""
+        key = (periph_id, start, end)
+        self._attempts[key] = self._attempts.get(key, 0) + 1
+        if self._attempts[key] >= MAX_REPAIR_ATTEMPTS:
+            _LOGGER.warning(
+                "Giving up history gap %s → %s for %s after %d attempts",
+                start, end, periph_id, self._attempts[key],
+            )
+            self.resolve(periph_id, start, end)
+            return True
+        return False
+
+    def forget(self, periph_id: str) -> None:
+        """Drop everything known about a peripheral (e.g. removed from the box)."""
+        self._covered_until.pop(periph_id, None)
+        self._cadence.pop(periph_id, None)
+        self._gaps.pop(periph_id, None)
+        for key in [k for k in self._attempts if k[0] == periph_id]:
+            self._attempts.pop(key, None)
+
+    def as_dict(self) -> dict:
+        """Serialize the tracker for persistent storage."""
+        return {
+            "covered_until": dict(self._covered_until),
+            "cadence": dict(self._cadence),
+            "gaps": {pid: [list(w) for w in windows] for pid, windows in self._gaps.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Optional[dict]) -> "HistoryGapTracker":
+        """Restore a tracker from persistent storage."""
+        tracker = cls()
+        if not data:
+            return tracker
+        tracker._covered_until = {pid: int(ts) for pid, ts in data.get("covered_until", {}).items()}
+        tracker._cadence = {pid: float(c) for pid, c in data.get("cadence", {}).items()}
+        tracker._gaps = {
+            pid: merge_windows([(int(s), int(e)) for s, e in windows])
+            for pid, windows in data.get("gaps", {}).items()
+            if windows
+        }
+        return tracker
@@ -3,15 +3,18 @@
 from __future__ import annotations
 
 import logging
+from abc import abstractmethod
 from datetime import datetime
 
 from homeassistant.components.sensor import (SensorEntity, SensorDeviceClass, SensorStateClass)
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import EntityCategory
 from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .const import DOMAIN
+from .const import DOMAIN, SIGNAL_HISTORY_DIAGNOSTICS
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -204,6 +207,112 @@ class EedomusHistoryStatsSensor(CoordinatorEntity, SensorEntity):
         }
 
 
+class EedomusHistoryDiagnosticSensor(SensorEntity):
+    """Base class for history diagnostics driven by coordinator counters.
+
+    Not a CoordinatorEntity: the state is only written when the coordinator
+    signals a change and the value or attributes actually differ, instead of
+    on every refresh.
+    """
+
+    _attr_should_poll = False
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_native_unit_of_measurement = "devices"
+
+    def __init__(self, coordinator):
+        """Initialize the diagnostic sensor."""
+        self.coordinator = coordinator
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, "eedomus_box_main")},
+            name="Box eedomus",
+            manufacturer="Eedomus",
+            model="Eedomus Box",
+            sw_version="Unknown",
+        )
+        self._last_written = None
+
+    @abstractmethod
+    def _snapshot(self):
+        """Return the (value, attributes) exposed by the sensor."""
+
+    @property
+    def native_value(self):
+        """Return the current counter value."""
+        return self._snapshot()[0]
+
+    @property
+    def extra_state_attributes(self):
+        """Return additional state attributes."""
+        return self._snapshot()[1]
+
+    async def async_added_to_hass(self):
+        """Subscribe to coordinator history diagnostic changes."""
+        self._last_written = self._snapshot()
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass, SIGNAL_HISTORY_DIAGNOSTICS, self._async_handle_change
+            )
+        )
+
+    @callback
+    def _async_handle_change(self):
+        """Write the state only if what is exposed changed."""
+        snapshot = self._snapshot()
+        if snapshot == self._last_written:
+            return
+        self._last_written = snapshot
+        self.async_write_ha_state()
+
+
+class EedomusHistoryErrorsSensor(EedomusHistoryDiagnosticSensor):
+    """Number of peripherals waiting in the history retry queue."""
+
+    _attr_icon = "mdi:alert-circle"
+
+    def __init__(self, coordinator):
+        """Initialize the history errors sensor."""
+        super().__init__(coordinator)
+        self._attr_unique_id = "eedomus_history_errors_total"
+        self._attr_name = "Eedomus History Errors Total"
+
+    def _snapshot(self):
+        errors = {}
+        for periph_id, info in self.coordinator._retry_queue.items():
+            errors[periph_id] = {
+                "periph_name": self.coordinator.data.get(periph_id, {}).get("name", "Unknown"),
+                "error_message": info["error_message"],
+                "attempts": info["attempts"],
+                "retry_after": datetime.fromtimestamp(info["retry_after"]).isoformat(),
+            }
+        return len(errors), {"errors": errors}
+
+
+class EedomusHistoryCompletedSensor(EedomusHistoryDiagnosticSensor):
+    """Number of peripherals whose history is fully imported."""
+
+    _attr_icon = "mdi:check-circle"
+
+    def __init__(self, coordinator):
+        """Initialize the history completed sensor."""
+        super().__init__(coordinator)
+        self._attr_unique_id = "eedomus_history_completed"
+        self._attr_name = "Eedomus History Completed"
+
+    def _snapshot(self):
+        return self.coordinator._history_completed_count, {
+            "devices_total": len(self.coordinator._history_progress),
+        }
+
+
+def async_setup_history_diagnostic_sensors(coordinator):
+    """Create the history diagnostic sensors (added by the sensor platform)."""
+    return [
+        EedomusHistoryErrorsSensor(coordinator),
+        EedomusHistoryCompletedSensor(coordinator),
+    ]
+
+
 async def async_setup_history_sensors(hass: HomeAssistant, coordinator, device_registry):
     """Set up history sensors and attach them to the eedomus box device."""
     
@@ -0,0 +1,135 @@
+"""Adaptive time-window sizing for eedomus history requests.
+
+The history API returns at most ``HISTORY_MAX_POINTS`` rows per call and a
+request spanning years of a chatty sensor can exceed the HTTP timeout.  The
+sizer learns, per peripheral, the point density (points per second of
+history) and the cost of a request (seconds per point returned) and picks the
+``[start, end]`` range expected to return as many points as possible while
+staying under both limits.  Windows that time out are split, windows that come
+back with few points are widened.
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+_LOGGER = logging.getLogger(__name__)
+
+# Hard limit of rows returned by one periph.history call
+HISTORY_MAX_POINTS = 10000
+# Aim below the row limit so a denser than expected window is not truncated
+TARGET_FILL = 0.8
+# Share of the HTTP timeout a history request is allowed to use
+TARGET_TIMEOUT_SHARE = 0.5
+# A window is never widened by more than this factor at once, a few points
+# are not enough to trust the measured density
+MAX_GROWTH = 8
+
+MIN_WINDOW_SECONDS = 3600  # 1 hour
+MAX_WINDOW_SECONDS = 365 * 86400  # 1 year
+INITIAL_WINDOW_SECONDS = 30 * 86400  # 30 days
+# When the open-ended bootstrap request times out, history is walked
+# forward from this far back instead
+BOOTSTRAP_LOOKBACK_SECONDS = 365 * 86400
+
+
+@dataclass
+class _WindowState:
+    """Learned request profile of one peripheral."""
+
+    window: float = INITIAL_WINDOW_SECONDS
+    density: Optional[float] = None  # points per second of history
+    seconds_per_point: Optional[float] = None  # request cost
+    bytes_per_point: Optional[float] = None
+
+
+class HistoryWindowSizer:
+    """Choose the time range of the next history request of each peripheral."""
+
+    def __init__(self, http_timeout: float):
+        """Initialize the sizer with the HTTP timeout used by the client."""
+        self._http_timeout = float(http_timeout)
+        self._states: Dict[str, _WindowState] = {}
+
+    def _state(self, periph_id: str) -> _WindowState:
+        return self._states.setdefault(periph_id, _WindowState())
+
+    def window_seconds(self, periph_id: str) -> float:
+        """Return the current window length of a peripheral."""
+        return self._state(periph_id).window
+
+    def next_window(self, periph_id: str, start: int, now: int) -> Tuple[int, Optional[int]]:
+        """Return the ``(start, end)`` range of the next request.
+
+        ``end`` is None for the very first request of a peripheral (cursor at
+        0): the oldest point is unknown, so the API is asked from the
+        beginning, exactly like before adaptive windowing.
+        """
+        if not start:
+            return 0, None
+        end = int(min(now, start + self._state(periph_id).window))
+        return start, max(end, start + 1)
+
+    def _clamp(self, window: float) -> float:
+        return min(max(window, MIN_WINDOW_SECONDS), MAX_WINDOW_SECONDS)
+
+    def record_success(
+        self,
+        periph_id: str,
+        start: int,
+        end: int,
+        points: int,
+        elapsed: float,
+        size_bytes: Optional[int] = None,
+    ) -> float:
+        """Learn from a successful request and return the next window length."""
+        state = self._state(periph_id)
+        span = max(end - start, 1)
+        target = HISTORY_MAX_POINTS * TARGET_FILL
+
+        if points:
+            state.density = points / span
+            state.seconds_per_point = elapsed / points
+            if size_bytes:
+                state.bytes_per_point = size_bytes / points
+
+        if points >= HISTORY_MAX_POINTS:
+            # Truncated: the window held more than the API returns, shrink it
+            state.window = self._clamp(span * target / points)
+        elif not points:
+            # Nothing in that range: widen
+            state.window = self._clamp(span * 2)
+        else:
+            if state.seconds_per_point:
+                time_budget = self._http_timeout * TARGET_TIMEOUT_SHARE
+                target = min(target, time_budget / state.seconds_per_point)
+            state.window = self._clamp(min(target / state.density, span * MAX_GROWTH))
+
+        _LOGGER.debug(
+            "📐 History window for %s: %d points in %.2fs over %ds → next window %ds",
+            periph_id, points, elapsed, span, state.window,
+        )
+        return state.window
+
+    def record_timeout(self, periph_id: str, start: int, end: Optional[int]) -> bool:
+        """Split the window after a timeout.
+
+        Returns False when the window is already at its minimum, meaning the
+        timeout is not caused by the amount of data requested.
+        """
+        state = self._state(periph_id)
+        span = (end - start) if end is not None else state.window * 2
+        if span <= MIN_WINDOW_SECONDS:
+            return False
+        state.window = self._clamp(span / 2)
+        _LOGGER.info(
+            "⏱️ History request for %s timed out, splitting window to %ds",
+            periph_id, state.window,
+        )
+        return True
+
+    def forget(self, periph_id: str) -> None:
+        """Drop the learned profile of a peripheral."""
+        self._states.pop(periph_id, None)
@@ -24,111 +24,48 @@ from homeassistant.util.color import (  # color_rgb_to_kelvin,; color_rgb_to_xy,
 )
 
 from .const import DOMAIN, COORDINATOR
-from .entity import EedomusEntity, map_device_to_ha_entity
+from .entity import EedomusEntity
+from .metrics import timed_platform_setup
+from .platform_entities import build_entities, tracked_platform_setup
 
 _LOGGER = logging.getLogger(__name__)
 
 
+def _light_entities(coordinator, periph_id, periph, children):
+    """Create the light entity of a peripheral."""
+    _LOGGER.debug(
+        "Go for a light !!! %s (%s) mapping=%s", periph["name"], periph_id, periph
+    )
+    if "rgbw" in (periph.get("ha_subtype") or ""):
+        # Vérifier si le périphérique a suffisamment d'enfants pour être RGBW
+        if len(children) >= 4:
+            # Créer une entité RGBW agrégée
+            return [EedomusRGBWLight(coordinator, periph_id, children)]
+        _LOGGER.warning(
+            "Device '%s' (%s) mapped as RGBW but only has %d children (need 4). Falling back to regular light.",
+            periph["name"],
+            periph_id,
+            len(children)
+        )
+        # Créer une lumière régulière à la place
+        # Note: Le mode de couleur sera déterminé par ha_subtype dans EedomusLight.__init__
+        return [EedomusLight(coordinator, periph_id)]
+    _LOGGER.debug("Create a light entity %s (%s)", periph["name"], periph_id)
+    return [EedomusLight(coordinator, periph_id)]
+
+
+# Lamp channels (usage_id=1) are already mapped as light:brightness by the coordinator
+ENTITY_FACTORIES = {"light": _light_entities}
+
+
+@timed_platform_setup("light")
+@tracked_platform_setup("light", ENTITY_FACTORIES)
 async def async_setup_entry(
     hass: HomeAssistant, entry: ConfigEntry, async_add_entities
 ):
     """Set up eedomus lights from config entry."""
     coordinator = hass.data[DOMAIN][entry.entry_id][COORDINATOR]
-    entities = []
-
-    # devices = coordinator.data.get("periph_list", {}).get("body", [])
-    all_peripherals = coordinator.get_all_peripherals()
-    parent_to_children = {}
-
-    for periph_id, periph in all_peripherals.items():
-        if periph.get("parent_periph_id"):
-            parent_id = periph["parent_periph_id"]
-            if parent_id not in parent_to_children:
-                parent_to_children[parent_id] = []
-            parent_to_children[parent_id].append(periph)
-        if not "ha_entity" in coordinator.data[periph_id]:
-            eedomus_mapping = map_device_to_ha_entity(periph, coordinator.data, coordinator=coordinator)
-            coordinator.data[periph_id].update(eedomus_mapping)
-            # S'assurer que le mapping est enregistré dans le registre global
-            _register_device_mapping(eedomus_mapping, periph["name"], periph_id, periph)
-            # Log pour confirmer que le device a été mappé
-            _LOGGER.debug("✅ Light device mapped: %s (%s) → %s:%s", 
-                        periph["name"], periph_id, eedomus_mapping["ha_entity"], eedomus_mapping["ha_subtype"])
-
-    for periph_id, periph in all_peripherals.items():
-        ha_entity = None
-        if "ha_entity" in coordinator.data[periph_id]:
-            ha_entity = coordinator.data[periph_id]["ha_entity"]
-
-        parent_id = periph.get("parent_periph_id", None)
-        if parent_id and coordinator.data[parent_id]["ha_entity"] == "light":
-            # les enfants sont gérés par le parent... est-ce une bonne idée ?
-            eedomus_mapping = None
-            if periph.get("usage_id") == "1":
-                eedomus_mapping = {
-                    "ha_entity": "light",
-                    "ha_subtype": "brightness",
-                    "justification": "Parent is a light",
-                }
-            # Removed usage_id=82 mapping as it's now handled by the main mapping system as "select"
-            if periph.get("usage_id") == "26":
-                eedomus_mapping = {
-                    "ha_entity": "sensor",
-                    "ha_subtype": "energy",
-                    "justification": "Parent is a light - energy consumption meter",
-                }
-            if not eedomus_mapping is None:
-                coordinator.data[periph_id].update(eedomus_mapping)
-                _LOGGER.debug(
-                    "Created energy sensor for light %s (%s) - consumption monitoring",
-                    periph["name"],
-                    periph_id,
-                )
-
-    for periph_id, periph in all_peripherals.items():
-        ha_entity = None
-        if "ha_entity" in coordinator.data[periph_id]:
-            ha_entity = coordinator.data[periph_id]["ha_entity"]
-
-        if ha_entity is None or not ha_entity == "light":
-            continue
-
-        _LOGGER.debug(
-            "Go for a light !!! %s (%s) mapping=%s", periph["name"], periph_id, periph
-        )
-        if "light" in coordinator.data[periph_id].get("ha_entity", None):
-            if "rgbw" in coordinator.data[periph_id].get("ha_subtype", None):
-                # Vérifier si le périphérique a suffisamment d'enfants pour être RGBW
-                children = parent_to_children.get(periph_id, [])
-                if len(children) >= 4:
-                    # Créer une entité RGBW agrégée
-                    entities.append(
-                        EedomusRGBWLight(
-                            coordinator,
-                            periph_id,
-                            parent_to_children[periph_id],
-                        )
-                    )
-                else:
-                    _LOGGER.warning(
-                        "Device '%s' (%s) mapped as RGBW but only has %d children (need 4). Falling back to regular light.",
-                        periph["name"],
-                        periph_id,
-                        len(children)
-                    )
-                    # Créer une lumière régulière à la place
-                    # Note: Le mode de couleur sera déterminé par ha_subtype dans EedomusLight.__init__
-                    entities.append(EedomusLight(coordinator, periph_id))
-            else:
-                _LOGGER.debug(
-                    "Create a light entity %s (%s) mapping=%s",
-                    periph["name"],
-                    periph_id,
-                    eedomus_mapping,
-                )
-                entities.append(EedomusLight(coordinator, periph_id))
-
-    async_add_entities(entities)
+    async_add_entities(build_entities(coordinator, ENTITY_FACTORIES))
 
 
 class EedomusLight(EedomusEntity, LightEntity):
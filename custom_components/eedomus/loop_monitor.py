@@ -0,0 +1,145 @@
+"""Opt-in event loop lag monitor.
+
+A sampler task sleeps for a short interval and measures how late it wakes
+up: the delay is time during which the loop was blocked by synchronous
+code. Each stall is attributed to the coordinator phase that was running
+during it (phases are marked by the coordinator, see `phase()`), so the
+report shows which eedomus code paths should move off the loop. Stalls
+outside any phase come from other code (other integrations, HA itself).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+_LOGGER = logging.getLogger(__name__)
+
+SAMPLE_INTERVAL = 0.05  # seconds between two samples
+STALL_THRESHOLD = 0.02  # lateness below this is ordinary scheduling noise
+WARN_THRESHOLD = 0.5  # stalls logged as warnings from this duration
+OUTSIDE_PHASE = "outside_eedomus"
+# Phase intervals kept to attribute the next stalls (old ones are useless)
+MAX_INTERVALS = 256
+
+
+class LoopLagMonitor:
+    """Sample event loop lag and aggregate stalls per coordinator phase."""
+
+    def __init__(
+        self,
+        interval: float = SAMPLE_INTERVAL,
+        threshold: float = STALL_THRESHOLD,
+        clock=time.monotonic,
+    ):
+        self.interval = interval
+        self.threshold = threshold
+        self._clock = clock
+        # [name, start, end] (end None while running), in start order
+        self._intervals: deque = deque(maxlen=MAX_INTERVALS)
+        self.stats: Dict[str, Dict[str, float]] = {}
+        self.samples = 0
+        self._task: Optional[asyncio.Task] = None
+
+    @contextmanager
+    def phase(self, name: str):
+        """Attribute stalls happening in the enclosed block to `name`."""
+        interval = [name, self._clock(), None]
+        self._intervals.append(interval)
+        try:
+            yield
+        finally:
+            interval[2] = self._clock()
+
+    def record(self, name: str, start: float, end: float) -> None:
+        """Declare a phase measured by the caller (clock values of `time.monotonic`).
+
+        Valid for synchronous blocks: the sampler cannot run before the caller
+        yields, so the phase is known before the stall is attributed.
+        """
+        self._intervals.append([name, start, end])
+
+    def start(self, create_task=None) -> None:
+        """Start sampling (create_task defaults to asyncio.create_task)."""
+        if self._task is not None:
+            return
+        self._task = (create_task or asyncio.create_task)(self._run())
+        _LOGGER.info("🐢 Event loop lag monitor started (interval %.0f ms)", self.interval * 1000)
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    async def _run(self) -> None:
+        while True:
+            expected = self._clock() + self.interval
+            await asyncio.sleep(self.interval)
+            self.sample(expected, self._clock())
+
+    def sample(self, expected: float, woke: float) -> Optional[str]:
+        """Account for one wake-up; return the phase charged with a stall, if any."""
+        self.samples += 1
+        lag = woke - expected
+        if lag < self.threshold:
+            return None
+        phase = self._attribute(woke - lag, woke)
+        stats = self.stats.setdefault(phase, {"stalls": 0, "total": 0.0, "max": 0.0})
+        stats["stalls"] += 1
+        stats["total"] += lag
+        stats["max"] = max(stats["max"], lag)
+        if lag >= WARN_THRESHOLD:
+            _LOGGER.warning("🐢 Event loop blocked for %.3fs during %s", lag, phase)
+        return phase
+
+    def _attribute(self, start: float, end: float) -> str:
+        """Phase that ran during [start, end]: the innermost one covering most of it."""
+        best = None
+        best_key = None
+        length = max(end - start, 1e-9)
+        for name, phase_start, phase_end in self._intervals:
+            overlap = min(phase_end if phase_end is not None else end, end) - max(phase_start, start)
+            if overlap <= 0:
+                continue
+            # Covering half the stall is enough; then the latest started (innermost) wins
+            key = (overlap >= length / 2, phase_start if overlap >= length / 2 else overlap)
+            if best_key is None or key > best_key:
+                best, best_key = name, key
+        self._prune(end)
+        return best or OUTSIDE_PHASE
+
+    def _prune(self, now: float) -> None:
+        # Finished phases older than a few samples can no longer match a stall
+        horizon = now - 10 * self.interval
+        while self._intervals and self._intervals[0][2] is not None and self._intervals[0][2] < horizon:
+            self._intervals.popleft()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Stall count, max and average stall (seconds) per phase, worst first."""
+        phases: List = sorted(self.stats.items(), key=lambda item: item[1]["max"], reverse=True)
+        return {
+            "running": self.running,
+            "samples": self.samples,
+            "phases": {
+                name: {
+                    "stalls": stats["stalls"],
+                    "max": round(stats["max"], 4),
+                    "avg": round(stats["total"] / stats["stalls"], 4),
+                    "total": round(stats["total"], 4),
+                }
+                for name, stats in phases
+            },
+        }
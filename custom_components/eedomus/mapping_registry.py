@@ -5,24 +5,36 @@ import logging
 
 _LOGGER = logging.getLogger(__name__)
 
-# Liste globale pour stocker tous les mappings
-_MAPPING_REGISTRY = []
+# Registre global des mappings, indexé par periph_id: un périphérique re-mappé
+# (refresh, reload) remplace son entrée au lieu d'en ajouter une nouvelle
+_MAPPING_REGISTRY = {}
 
 
 def register_device_mapping(mapping: dict, periph_name: str, periph_id: str, device_data: dict = None) -> None:
     """Enregistre un mapping dans le registre global."""
     parent_periph_id = device_data.get("parent_periph_id") if device_data else None
-    _MAPPING_REGISTRY.append({
+    _MAPPING_REGISTRY[str(periph_id)] = {
         "periph_id": periph_id,
         "periph_name": periph_name,
         "parent_periph_id": parent_periph_id,
         "ha_entity": mapping["ha_entity"],
         "ha_subtype": mapping["ha_subtype"],
         "justification": mapping.get("justification", "No justification provided")
-    })
+    }
     _LOGGER.debug("✅ Device mapped: %s (%s) → %s:%s", periph_name, periph_id, mapping["ha_entity"], mapping["ha_subtype"])
 
 
+def import_mapping_registry(entries: list) -> None:
+    """Ajoute au registre des entrées produites ailleurs (processus de mapping)."""
+    for entry in entries:
+        _MAPPING_REGISTRY[str(entry["periph_id"])] = entry
+
+
+def unregister_device_mapping(periph_id: str) -> None:
+    """Retire du registre un périphérique supprimé de la box."""
+    _MAPPING_REGISTRY.pop(str(periph_id), None)
+
+
 def clear_mapping_registry() -> None:
     """Réinitialise le registre de mapping."""
     _MAPPING_REGISTRY.clear()
@@ -30,7 +42,7 @@ def clear_mapping_registry() -> None:
 
 def get_mapping_registry() -> list:
     """Retourne le registre de mapping."""
-    return _MAPPING_REGISTRY.copy()
+    return list(_MAPPING_REGISTRY.values())
 
 
 def print_mapping_table() -> None:
@@ -44,7 +56,7 @@ def print_mapping_table() -> None:
                  "Periph ID", "Device Name", "Parent ID", "Type", "Subtype", "Justification")
     _LOGGER.info("="*120)
 
-    for mapping in _MAPPING_REGISTRY:
+    for mapping in _MAPPING_REGISTRY.values():
         _LOGGER.info("| %-15s | %-30s | %-15s | %-10s | %-15s | %-50s |",
                      mapping["periph_id"],
                      mapping["periph_name"][:29],
@@ -67,17 +79,17 @@ def print_mapping_summary() -> None:
 
     # Compter par type pour le résumé condensé
     entity_counts = {}
-    for mapping in _MAPPING_REGISTRY:
+    for mapping in _MAPPING_REGISTRY.values():
         entity_type = f"{mapping['ha_entity']}:{mapping['ha_subtype']}"
         entity_counts[entity_type] = entity_counts.get(entity_type, 0) + 1
     
     # Créer un résumé condensé sur une seule ligne
     type_summary = ", ".join(f"{count} {entity_type}" for entity_type, count in sorted(entity_counts.items(), key=lambda x: x[1], reverse=True))
     _LOGGER.info("ℹ️  Eedomus mapping: %d devices (%s) from %d API devices", 
-                 len(_MAPPING_REGISTRY), type_summary, len(set(m["periph_id"] for m in _MAPPING_REGISTRY)))
+                 len(_MAPPING_REGISTRY), type_summary, len(_MAPPING_REGISTRY))
     
     # Détails en DEBUG pour ceux qui en ont besoin
-    _LOGGER.debug("Total unique periph_ids: %d", len(set(m["periph_id"] for m in _MAPPING_REGISTRY)))
+    _LOGGER.debug("Total unique periph_ids: %d", len(_MAPPING_REGISTRY))
     _LOGGER.debug("Breakdown by type:")
     for entity_type, count in sorted(entity_counts.items(), key=lambda x: x[1], reverse=True):
         _LOGGER.debug("  %s: %d", entity_type, count)
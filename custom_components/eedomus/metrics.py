@@ -0,0 +1,235 @@
+"""Fixed-memory latency histograms for the eedomus API and refresh cycles.
+
+Each histogram counts samples in log-spaced buckets (about 19% apart, from
+1 ms to 10 min), so percentiles cost a few dozen integers whatever the
+number of samples. Two windows are kept and rotated: percentiles describe
+the last one to two windows (rolling), while the lifetime counts are kept
+for cumulative exports.
+"""
+
+from __future__ import annotations
+
+import bisect
+import functools
+import math
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Any, Dict, List, Optional
+
+from .const import COORDINATOR, DOMAIN
+
+# Bucket upper bounds in seconds: 1 ms * 2^(i/4), up to 10 minutes
+BUCKET_BOUNDS: List[float] = [
+    0.001 * 2 ** (i / 4) for i in range(int(4 * math.log2(600 / 0.001)) + 2)
+]
+DEFAULT_WINDOW_SECONDS = 3600
+PERCENTILES = (50, 95, 99)
+
+
+class LatencyHistogram:
+    """Rolling latency histogram with log buckets and p50/p95/p99."""
+
+    def __init__(self, window_seconds: float = DEFAULT_WINDOW_SECONDS, clock=time.monotonic):
+        self.window_seconds = window_seconds
+        self._clock = clock
+        size = len(BUCKET_BOUNDS) + 1  # last bucket: above the largest bound
+        self._current = [0] * size
+        self._previous = [0] * size
+        self._window_start = clock()
+        # Lifetime totals
+        self.lifetime_counts = [0] * size
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self.last = None
+
+    def _rotate(self) -> None:
+        now = self._clock()
+        elapsed = now - self._window_start
+        if elapsed < self.window_seconds:
+            return
+        if elapsed >= 2 * self.window_seconds:
+            # Idle for more than a window: nothing recent to keep
+            self._previous = [0] * len(self._current)
+        else:
+            self._previous = self._current
+        self._current = [0] * len(self._previous)
+        self._window_start = now
+
+    def observe(self, seconds: float) -> None:
+        """Record one sample."""
+        seconds = max(0.0, float(seconds))
+        self._rotate()
+        index = bisect.bisect_left(BUCKET_BOUNDS, seconds)
+        self._current[index] += 1
+        self.lifetime_counts[index] += 1
+        self.count += 1
+        self.sum += seconds
+        self.last = seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def recent_count(self) -> int:
+        self._rotate()
+        return sum(self._current) + sum(self._previous)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """Upper bound of the bucket holding the pct-th recent sample (None if empty)."""
+        self._rotate()
+        counts = [a + b for a, b in zip(self._current, self._previous)]
+        total = sum(counts)
+        if not total:
+            return None
+        rank = math.ceil(total * pct / 100)
+        seen = 0
+        for index, bucket in enumerate(counts):
+            seen += bucket
+            if seen >= rank:
+                if index < len(BUCKET_BOUNDS):
+                    return min(BUCKET_BOUNDS[index], self.max)
+                return self.max
+        return self.max
+
+    def cumulative_buckets(self, step: int = 4) -> List[tuple]:
+        """Lifetime (upper bound, cumulative count) pairs, one bound every `step`.
+
+        With the default step the bounds double (1 ms, 2 ms, 4 ms...), which is
+        enough resolution for an exported histogram; "+Inf" is always last.
+        """
+        buckets = []
+        seen = 0
+        for index, bucket in enumerate(self.lifetime_counts[:-1]):
+            seen += bucket
+            if index % step == 0:
+                buckets.append((BUCKET_BOUNDS[index], seen))
+        buckets.append((math.inf, self.count))
+        return buckets
+
+    def snapshot(self) -> Dict[str, Optional[float]]:
+        """Percentiles of the recent samples plus lifetime count, mean and max."""
+        result: Dict[str, Optional[float]] = {
+            f"p{pct}": _round(self.percentile(pct)) for pct in PERCENTILES
+        }
+        result.update(
+            count=self.count,
+            recent_count=self.recent_count(),
+            mean=_round(self.sum / self.count) if self.count else None,
+            max=_round(self.max) if self.count else None,
+            last=_round(self.last),
+        )
+        return result
+
+
+class LatencyTracker:
+    """Named set of histograms (one per endpoint or per refresh type)."""
+
+    def __init__(self, window_seconds: float = DEFAULT_WINDOW_SECONDS):
+        self.window_seconds = window_seconds
+        self.histograms: Dict[str, LatencyHistogram] = {}
+
+    def observe(self, name: str, seconds: float) -> None:
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = LatencyHistogram(self.window_seconds)
+        histogram.observe(seconds)
+
+    def get(self, name: str) -> Optional[LatencyHistogram]:
+        return self.histograms.get(name)
+
+    def snapshot(self, name: str) -> Dict[str, Optional[float]]:
+        histogram = self.histograms.get(name)
+        return histogram.snapshot() if histogram else {}
+
+    def snapshots(self) -> Dict[str, Dict[str, Optional[float]]]:
+        return {name: h.snapshot() for name, h in self.histograms.items()}
+
+
+class StartupTimeline:
+    """Phases of the integration setup, with their start offset and duration.
+
+    Phases may nest (e.g. "first_refresh.mapping" inside "first_refresh") and
+    overlap (platforms are set up concurrently).
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self._clock = clock
+        self._start = clock()
+        self._end: Optional[float] = None
+        self.phases: List[Dict[str, Any]] = []
+
+    @contextmanager
+    def phase(self, name: str, **details):
+        """Time the enclosed block; details can be added to the yielded dict."""
+        entry = {"phase": name, "start": round(self._clock() - self._start, 4), **details}
+        start = self._clock()
+        try:
+            yield entry
+        finally:
+            entry["duration"] = round(self._clock() - start, 4)
+            self.phases.append(entry)
+
+    def record(self, name: str, duration: float, **details) -> None:
+        """Add a phase measured elsewhere, ending now."""
+        now = self._clock() - self._start
+        self.phases.append({
+            "phase": name, "start": round(now - duration, 4), "duration": round(duration, 4), **details,
+        })
+
+    def finish(self) -> None:
+        if self._end is None:
+            self._end = self._clock()
+
+    @property
+    def finished(self) -> bool:
+        return self._end is not None
+
+    @property
+    def total(self) -> float:
+        end = self._end if self._end is not None else self._clock()
+        return round(end - self._start, 4)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "total": self.total,
+            "finished": self.finished,
+            "phases": sorted(self.phases, key=lambda entry: entry["start"]),
+        }
+
+
+def timed_platform_setup(platform: str):
+    """Decorate a platform async_setup_entry to record it in the startup timeline.
+
+    The phase holds the number of entities the platform added.
+    """
+
+    def decorator(setup):
+        @functools.wraps(setup)
+        async def wrapper(hass, entry, async_add_entities):
+            entry_data = hass.data.get(DOMAIN, {}).get(entry.entry_id, {})
+            coordinator = entry_data.get(COORDINATOR) if isinstance(entry_data, dict) else None
+            timeline = getattr(coordinator, "_startup_timeline", None)
+            if timeline is None:
+                return await setup(hass, entry, async_add_entities)
+
+            added = 0
+
+            def counting_add_entities(new_entities, update_before_add=False):
+                nonlocal added
+                new_entities = list(new_entities)
+                added += len(new_entities)
+                return async_add_entities(new_entities, update_before_add)
+
+            name = f"platform.{platform}"
+            lag_monitor = getattr(coordinator, "_loop_monitor", None)
+            with timeline.phase(name) as phase, (lag_monitor.phase(name) if lag_monitor else nullcontext()):
+                result = await setup(hass, entry, counting_add_entities)
+                phase["entities"] = added
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 4) if value is not None else None
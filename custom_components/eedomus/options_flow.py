@@ -30,7 +30,17 @@ from .const import (
     CONF_PHP_FALLBACK_SCRIPT_NAME,
     CONF_PHP_FALLBACK_TIMEOUT,
     CONF_HTTP_REQUEST_TIMEOUT,
+    CONF_API_PROXY_MAX_CONCURRENCY,
+    CONF_API_PROXY_ASYNC,
+    CONF_API_PROXY_ALLOWLIST,
+    CONF_LOOP_LAG_MONITOR,
+    CONF_MAPPING_PROCESS_POOL_THRESHOLD,
     DEFAULT_HTTP_REQUEST_TIMEOUT,
+    DEFAULT_API_PROXY_MAX_CONCURRENCY,
+    DEFAULT_API_PROXY_ASYNC,
+    DEFAULT_API_PROXY_ALLOWLIST,
+    DEFAULT_LOOP_LAG_MONITOR,
+    DEFAULT_MAPPING_PROCESS_POOL_THRESHOLD,
 )
 
 _LOGGER = logging.getLogger(__name__)
@@ -83,6 +93,16 @@ class EedomusOptionsFlow(config_entries.OptionsFlow):
             options[CONF_ENABLE_WEBHOOK] = config_data.get(CONF_ENABLE_WEBHOOK, True)
         if CONF_API_PROXY_DISABLE_SECURITY not in options:
             options[CONF_API_PROXY_DISABLE_SECURITY] = config_data.get(CONF_API_PROXY_DISABLE_SECURITY, False)
+        if CONF_API_PROXY_MAX_CONCURRENCY not in options:
+            options[CONF_API_PROXY_MAX_CONCURRENCY] = config_data.get(CONF_API_PROXY_MAX_CONCURRENCY, DEFAULT_API_PROXY_MAX_CONCURRENCY)
+        if CONF_API_PROXY_ASYNC not in options:
+            options[CONF_API_PROXY_ASYNC] = config_data.get(CONF_API_PROXY_ASYNC, DEFAULT_API_PROXY_ASYNC)
+        if CONF_API_PROXY_ALLOWLIST not in options:
+            options[CONF_API_PROXY_ALLOWLIST] = config_data.get(CONF_API_PROXY_ALLOWLIST, DEFAULT_API_PROXY_ALLOWLIST)
+        if CONF_LOOP_LAG_MONITOR not in options:
+            options[CONF_LOOP_LAG_MONITOR] = config_data.get(CONF_LOOP_LAG_MONITOR, DEFAULT_LOOP_LAG_MONITOR)
+        if CONF_MAPPING_PROCESS_POOL_THRESHOLD not in options:
+            options[CONF_MAPPING_PROCESS_POOL_THRESHOLD] = config_data.get(CONF_MAPPING_PROCESS_POOL_THRESHOLD, DEFAULT_MAPPING_PROCESS_POOL_THRESHOLD)
         if CONF_PHP_FALLBACK_ENABLED not in options:
             options[CONF_PHP_FALLBACK_ENABLED] = config_data.get(CONF_PHP_FALLBACK_ENABLED, False)
         if CONF_PHP_FALLBACK_SCRIPT_NAME not in options:
@@ -123,6 +143,11 @@ class EedomusOptionsFlow(config_entries.OptionsFlow):
             options[CONF_ENABLE_SET_VALUE_RETRY] = user_input.get(CONF_ENABLE_SET_VALUE_RETRY, True)
             options[CONF_ENABLE_WEBHOOK] = user_input.get(CONF_ENABLE_WEBHOOK, True)
             options[CONF_API_PROXY_DISABLE_SECURITY] = user_input.get(CONF_API_PROXY_DISABLE_SECURITY, False)
+            options[CONF_API_PROXY_MAX_CONCURRENCY] = user_input.get(CONF_API_PROXY_MAX_CONCURRENCY, DEFAULT_API_PROXY_MAX_CONCURRENCY)
+            options[CONF_API_PROXY_ASYNC] = user_input.get(CONF_API_PROXY_ASYNC, DEFAULT_API_PROXY_ASYNC)
+            options[CONF_API_PROXY_ALLOWLIST] = user_input.get(CONF_API_PROXY_ALLOWLIST, DEFAULT_API_PROXY_ALLOWLIST)
+            options[CONF_LOOP_LAG_MONITOR] = user_input.get(CONF_LOOP_LAG_MONITOR, DEFAULT_LOOP_LAG_MONITOR)
+            options[CONF_MAPPING_PROCESS_POOL_THRESHOLD] = user_input.get(CONF_MAPPING_PROCESS_POOL_THRESHOLD, DEFAULT_MAPPING_PROCESS_POOL_THRESHOLD)
             options[CONF_PHP_FALLBACK_ENABLED] = user_input.get(CONF_PHP_FALLBACK_ENABLED, False)
             options[CONF_PHP_FALLBACK_SCRIPT_NAME] = user_input.get(CONF_PHP_FALLBACK_SCRIPT_NAME, "fallback.php")
             options[CONF_PHP_FALLBACK_TIMEOUT] = user_input.get(CONF_PHP_FALLBACK_TIMEOUT, 5)
@@ -163,6 +188,11 @@ class EedomusOptionsFlow(config_entries.OptionsFlow):
                 vol.Optional(CONF_ENABLE_SET_VALUE_RETRY, default=current_options.get(CONF_ENABLE_SET_VALUE_RETRY, True)): bool,
                 vol.Optional(CONF_ENABLE_WEBHOOK, default=current_options.get(CONF_ENABLE_WEBHOOK, True)): bool,
                 vol.Optional(CONF_API_PROXY_DISABLE_SECURITY, default=current_options.get(CONF_API_PROXY_DISABLE_SECURITY, False)): bool,
+                vol.Optional(CONF_API_PROXY_MAX_CONCURRENCY, default=current_options.get(CONF_API_PROXY_MAX_CONCURRENCY, DEFAULT_API_PROXY_MAX_CONCURRENCY)): int,
+                vol.Optional(CONF_API_PROXY_ASYNC, default=current_options.get(CONF_API_PROXY_ASYNC, DEFAULT_API_PROXY_ASYNC)): bool,
+                vol.Optional(CONF_API_PROXY_ALLOWLIST, default=current_options.get(CONF_API_PROXY_ALLOWLIST, DEFAULT_API_PROXY_ALLOWLIST)): str,
+                vol.Optional(CONF_LOOP_LAG_MONITOR, default=current_options.get(CONF_LOOP_LAG_MONITOR, DEFAULT_LOOP_LAG_MONITOR)): bool,
+                vol.Optional(CONF_MAPPING_PROCESS_POOL_THRESHOLD, default=current_options.get(CONF_MAPPING_PROCESS_POOL_THRESHOLD, DEFAULT_MAPPING_PROCESS_POOL_THRESHOLD)): int,
                 vol.Optional(CONF_PHP_FALLBACK_ENABLED, default=current_options.get(CONF_PHP_FALLBACK_ENABLED, False)): bool,
                 vol.Optional(CONF_PHP_FALLBACK_SCRIPT_NAME, default=current_options.get(CONF_PHP_FALLBACK_SCRIPT_NAME, "fallback.php")): str,
                 vol.Optional(CONF_PHP_FALLBACK_TIMEOUT, default=current_options.get(CONF_PHP_FALLBACK_TIMEOUT, 5)): int,
@@ -206,6 +236,11 @@ class EedomusOptionsFlow(config_entries.OptionsFlow):
                     CONF_ENABLE_SET_VALUE_RETRY: current_options.get(CONF_ENABLE_SET_VALUE_RETRY, True),
                     CONF_ENABLE_WEBHOOK: current_options.get(CONF_ENABLE_WEBHOOK, True),
                     CONF_API_PROXY_DISABLE_SECURITY: current_options.get(CONF_API_PROXY_DISABLE_SECURITY, False),
+                    CONF_API_PROXY_MAX_CONCURRENCY: current_options.get(CONF_API_PROXY_MAX_CONCURRENCY, DEFAULT_API_PROXY_MAX_CONCURRENCY),
+                    CONF_API_PROXY_ASYNC: current_options.get(CONF_API_PROXY_ASYNC, DEFAULT_API_PROXY_ASYNC),
+                    CONF_API_PROXY_ALLOWLIST: current_options.get(CONF_API_PROXY_ALLOWLIST, DEFAULT_API_PROXY_ALLOWLIST),
+                    CONF_LOOP_LAG_MONITOR: current_options.get(CONF_LOOP_LAG_MONITOR, DEFAULT_LOOP_LAG_MONITOR),
+                    CONF_MAPPING_PROCESS_POOL_THRESHOLD: current_options.get(CONF_MAPPING_PROCESS_POOL_THRESHOLD, DEFAULT_MAPPING_PROCESS_POOL_THRESHOLD),
                     CONF_PHP_FALLBACK_ENABLED: current_options.get(CONF_PHP_FALLBACK_ENABLED, False),
                     CONF_PHP_FALLBACK_SCRIPT_NAME: current_options.get(CONF_PHP_FALLBACK_SCRIPT_NAME, "fallback.php"),
                     CONF_PHP_FALLBACK_TIMEOUT: current_options.get(CONF_PHP_FALLBACK_TIMEOUT, 5),
@@ -245,6 +280,11 @@ class EedomusOptionsFlow(config_entries.OptionsFlow):
                 vol.Optional(CONF_ENABLE_SET_VALUE_RETRY, default=current_options.get(CONF_ENABLE_SET_VALUE_RETRY, True)): bool,
                 vol.Optional(CONF_ENABLE_WEBHOOK, default=current_options.get(CONF_ENABLE_WEBHOOK, True)): bool,
                 vol.Optional(CONF_API_PROXY_DISABLE_SECURITY, default=current_options.get(CONF_API_PROXY_DISABLE_SECURITY, False)): bool,
+                vol.Optional(CONF_API_PROXY_MAX_CONCURRENCY, default=current_options.get(CONF_API_PROXY_MAX_CONCURRENCY, DEFAULT_API_PROXY_MAX_CONCURRENCY)): int,
+                vol.Optional(CONF_API_PROXY_ASYNC, default=current_options.get(CONF_API_PROXY_ASYNC, DEFAULT_API_PROXY_ASYNC)): bool,
+                vol.Optional(CONF_API_PROXY_ALLOWLIST, default=current_options.get(CONF_API_PROXY_ALLOWLIST, DEFAULT_API_PROXY_ALLOWLIST)): str,
+                vol.Optional(CONF_LOOP_LAG_MONITOR, default=current_options.get(CONF_LOOP_LAG_MONITOR, DEFAULT_LOOP_LAG_MONITOR)): bool,
+                vol.Optional(CONF_MAPPING_PROCESS_POOL_THRESHOLD, default=current_options.get(CONF_MAPPING_PROCESS_POOL_THRESHOLD, DEFAULT_MAPPING_PROCESS_POOL_THRESHOLD)): int,
                 vol.Optional(CONF_PHP_FALLBACK_ENABLED, default=current_options.get(CONF_PHP_FALLBACK_ENABLED, False)): bool,
                 vol.Optional(CONF_PHP_FALLBACK_SCRIPT_NAME, default=current_options.get(CONF_PHP_FALLBACK_SCRIPT_NAME, "fallback.php")): str,
                 vol.Optional(CONF_PHP_FALLBACK_TIMEOUT, default=current_options.get(CONF_PHP_FALLBACK_TIMEOUT, 5)): int,
@@ -296,6 +336,11 @@ class EedomusOptionsFlow(config_entries.OptionsFlow):
                         CONF_ENABLE_SET_VALUE_RETRY: current_options.get(CONF_ENABLE_SET_VALUE_RETRY, True),
                         CONF_ENABLE_WEBHOOK: current_options.get(CONF_ENABLE_WEBHOOK, True),
                         CONF_API_PROXY_DISABLE_SECURITY: current_options.get(CONF_API_PROXY_DISABLE_SECURITY, False),
+                        CONF_API_PROXY_MAX_CONCURRENCY: current_options.get(CONF_API_PROXY_MAX_CONCURRENCY, DEFAULT_API_PROXY_MAX_CONCURRENCY),
+                        CONF_API_PROXY_ASYNC: current_options.get(CONF_API_PROXY_ASYNC, DEFAULT_API_PROXY_ASYNC),
+                        CONF_API_PROXY_ALLOWLIST: current_options.get(CONF_API_PROXY_ALLOWLIST, DEFAULT_API_PROXY_ALLOWLIST),
+                        CONF_LOOP_LAG_MONITOR: current_options.get(CONF_LOOP_LAG_MONITOR, DEFAULT_LOOP_LAG_MONITOR),
+                        CONF_MAPPING_PROCESS_POOL_THRESHOLD: current_options.get(CONF_MAPPING_PROCESS_POOL_THRESHOLD, DEFAULT_MAPPING_PROCESS_POOL_THRESHOLD),
                         CONF_PHP_FALLBACK_ENABLED: current_options.get(CONF_PHP_FALLBACK_ENABLED, False),
                         CONF_PHP_FALLBACK_SCRIPT_NAME: current_options.get(CONF_PHP_FALLBACK_SCRIPT_NAME, "fallback.php"),
                         CONF_PHP_FALLBACK_TIMEOUT: current_options.get(CONF_PHP_FALLBACK_TIMEOUT, 5),
@@ -0,0 +1,127 @@
+"""Entities created by each platform, to replace some of them without a reload.
+
+Each platform declares, per coordinator bucket, an entity factory called
+with ``(coordinator, periph_id, periph, children)``. The platform setup
+runs the factories over its buckets; to re-create the entities of a few
+peripherals (mapping hot reload, topology changes) the coordinator runs
+the same factories for these peripherals only, with the add callback kept
+from the setup.
+"""
+
+from __future__ import annotations
+
+import functools
+import logging
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Tuple
+
+from homeassistant.helpers import entity_registry as er
+
+from .const import COORDINATOR, DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+# (coordinator, periph_id, periph, children) -> entities of the peripheral
+EntityFactory = Callable[[Any, str, dict, list], List[Any]]
+
+
+def build_entities(coordinator, factories: Mapping[str, EntityFactory], periph_ids=None) -> list:
+    """Create the entities of the peripherals of each bucket (default: all of them)."""
+    entities = []
+    for bucket, factory in factories.items():
+        for periph_id, periph, children in coordinator.platform_peripherals(bucket):
+            if periph_ids is None or periph_id in periph_ids:
+                entities.extend(factory(coordinator, periph_id, periph, children))
+    return entities
+
+
+class PlatformEntities:
+    """Platform entity factories and the entities they added, by periph_id."""
+
+    def __init__(self, coordinator) -> None:
+        self._coordinator = coordinator
+        self._setups = {}  # {platform: ({bucket: factory}, async_add_entities)}
+        self._entities: Dict[str, List[Tuple[str, object]]] = {}  # {periph_id: [(platform, entity)]}
+
+    @property
+    def platforms(self) -> List[str]:
+        return list(self._setups)
+
+    def track(self, platform: str, factories: Mapping[str, EntityFactory], async_add_entities):
+        """Remember the platform factories; return an add callback recording the entities."""
+
+        def recording_add_entities(new_entities, update_before_add=False):
+            new_entities = list(new_entities)
+            self._record(platform, new_entities)
+            return async_add_entities(new_entities, update_before_add)
+
+        self._setups[platform] = (dict(factories), recording_add_entities)
+        return recording_add_entities
+
+    def _record(self, platform: str, entities) -> None:
+        for entity in entities:
+            periph_id = getattr(entity, "_periph_id", None)
+            if periph_id is not None:
+                self._entities.setdefault(str(periph_id), []).append((platform, entity))
+
+    def entities_of(self, periph_id: str) -> List[Tuple[str, object]]:
+        return list(self._entities.get(str(periph_id), []))
+
+    async def async_rebuild(self, periph_ids: Iterable[str]) -> Dict[str, int]:
+        """Re-create the entities of `periph_ids` from the current coordinator data.
+
+        Entities created again on the same platform keep their registry entry
+        (entity_id, name and area customizations); the ones no platform
+        creates any more are removed from the entity registry.
+        """
+        periph_ids = {str(periph_id) for periph_id in periph_ids}
+        if not periph_ids:
+            return {"added": 0, "removed": 0}
+
+        # Build the new entities first: unchanged unique_ids are swapped in place
+        created = {
+            platform: build_entities(self._coordinator, factories, periph_ids)
+            for platform, (factories, _add) in self._setups.items()
+        }
+        kept = {(platform, entity.unique_id) for platform, entities in created.items() for entity in entities}
+
+        removed = 0
+        for periph_id in periph_ids:
+            for platform, entity in self._entities.pop(periph_id, []):
+                if entity.hass is None:
+                    continue  # Never added, or already removed
+                if (platform, entity.unique_id) not in kept and entity.registry_entry:
+                    # The registry removal also removes the entity
+                    er.async_get(entity.hass).async_remove(entity.entity_id)
+                else:
+                    await entity.async_remove(force_remove=True)
+                removed += 1
+
+        added = 0
+        for platform, entities in created.items():
+            if entities:
+                self._setups[platform][1](entities)
+                added += len(entities)
+        _LOGGER.debug("♻️ Rebuilt entities of %d peripherals: %d removed, %d added", len(periph_ids), removed, added)
+        return {"added": added, "removed": removed}
+
+
+def tracked_platform_setup(platform: str, factories: Mapping[str, EntityFactory]):
+    """Decorate a platform async_setup_entry so the coordinator can re-create its entities.
+
+    `factories` maps the coordinator buckets the platform creates entities
+    from to their entity factory.
+    """
+
+    def decorator(setup):
+        @functools.wraps(setup)
+        async def wrapper(hass, entry, async_add_entities):
+            entry_data = hass.data.get(DOMAIN, {}).get(entry.entry_id, {})
+            coordinator = entry_data.get(COORDINATOR) if isinstance(entry_data, dict) else None
+            platform_entities = getattr(coordinator, "_platform_entities", None)
+            if platform_entities is None:
+                return await setup(hass, entry, async_add_entities)
+            return await setup(hass, entry, platform_entities.track(platform, factories, async_add_entities))
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,129 @@
+"""On-demand profiling of a coordinator refresh cycle.
+
+Used by the eedomus.profile_refresh service: one refresh runs under cProfile
+and tracemalloc, the sorted stats and the top allocations are written to a
+text report. cProfile sees the whole event loop thread, so work done by other
+tasks during the refresh shows up too (and is usually small).
+"""
+
+from __future__ import annotations
+
+import cProfile
+import io
+import logging
+import pstats
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Dict
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_TOP = 30
+# Functions and allocations listed in the service response (the file has `top`)
+SUMMARY_TOP = 5
+
+
+def _top_functions(stats: pstats.Stats, count: int) -> list:
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)
+    return [
+        {
+            "function": pstats.func_std_string(func),
+            "calls": nc,
+            "cumulative_s": round(ct, 4),
+            "own_s": round(tt, 4),
+        }
+        for func, (cc, nc, tt, ct, callers) in rows[:count]
+    ]
+
+
+def _top_allocations(snapshot: tracemalloc.Snapshot, count: int) -> list:
+    snapshot = snapshot.filter_traces(
+        (
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        )
+    )
+    return [
+        {
+            "location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+            "size_kib": round(stat.size / 1024, 1),
+            "blocks": stat.count,
+        }
+        for stat in snapshot.statistics("lineno")[:count]
+    ]
+
+
+def _write_report(path: str, header: Dict[str, Any], stats_text: str, allocations: list) -> None:
+    """Write the report (blocking I/O, run it in an executor)."""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("eedomus refresh profile\n")
+        for key, value in header.items():
+            f.write(f"{key}: {value}\n")
+        f.write("\n=== cProfile (sorted by cumulative time) ===\n")
+        f.write(stats_text)
+        f.write("\n=== Top allocations (tracemalloc, by line) ===\n")
+        for alloc in allocations:
+            f.write(f"{alloc['size_kib']:>10.1f} KiB  {alloc['blocks']:>8} blocks  {alloc['location']}\n")
+
+
+async def async_profile_refresh(hass, coordinator, mode: str, path: str, top: int = DEFAULT_TOP) -> Dict[str, Any]:
+    """Run one refresh under cProfile and tracemalloc; write the report to `path`.
+
+    mode "full" forces a full refresh; "partial" asks for a partial one, which
+    the coordinator still promotes to full when the scan interval has elapsed.
+    The refresh goes through the coordinator lock like any other refresh, and
+    the type that actually ran is reported.
+    """
+    if mode not in ("full", "partial"):
+        raise ValueError(f"Unknown refresh mode: {mode}")
+
+    counts_before = {
+        name: h.count for name, h in coordinator._refresh_latency.histograms.items()
+    }
+    coordinator._full_refresh_needed = mode == "full"
+
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    profiler = cProfile.Profile()
+    start = time.perf_counter()
+    profiler.enable()
+    try:
+        await coordinator.async_refresh()
+    finally:
+        profiler.disable()
+        duration = time.perf_counter() - start
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        if not was_tracing:
+            tracemalloc.stop()
+
+    ran = [
+        name for name, h in coordinator._refresh_latency.histograms.items()
+        if h.count > counts_before.get(name, 0)
+    ]
+    stream = io.StringIO()
+    stats = pstats.Stats(profiler, stream=stream)
+    stats.sort_stats("cumulative").print_stats(top)
+    allocations = _top_allocations(snapshot, top)
+
+    header = {
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "requested_mode": mode,
+        "refresh_type": ran[0] if ran else "unknown",
+        "duration_s": round(duration, 3),
+        "peak_traced_kib": round(peak / 1024, 1),
+        "peripherals": len(coordinator.data or {}),
+        "last_update_success": coordinator.last_update_success,
+    }
+    await hass.async_add_executor_job(_write_report, path, header, stream.getvalue(), allocations)
+    _LOGGER.info("⏱️ Refresh profile written to %s (%.3fs)", path, duration)
+
+    return {
+        **header,
+        "path": path,
+        "top_functions": _top_functions(stats, SUMMARY_TOP),
+        "top_allocations": allocations[:SUMMARY_TOP],
+    }
@@ -0,0 +1,173 @@
+"""Prometheus text exposition of the eedomus integration metrics.
+
+Served by an authenticated view (a long-lived access token is required), so
+the API and refresh figures can be scraped instead of being recorded as
+sensors every cycle.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+
+from aiohttp import web
+from homeassistant.components.http import HomeAssistantView
+
+from .const import COORDINATOR, DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _number(value) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Writer:
+    """Accumulate metric families; HELP/TYPE are written once per family."""
+
+    def __init__(self):
+        self.lines = []
+        self._families = set()
+
+    def _declare(self, name: str, metric_type: str, help_text: str) -> None:
+        if name not in self._families:
+            self._families.add(name)
+            self.lines.append(f"# HELP {name} {help_text}")
+            self.lines.append(f"# TYPE {name} {metric_type}")
+
+    def sample(self, name: str, metric_type: str, help_text: str, value, **labels) -> None:
+        self._declare(name, metric_type, help_text)
+        suffix = "_total" if metric_type == "counter" else ""
+        self.lines.append(f"{name}{suffix}{_labels(labels)} {_number(value)}")
+
+    def histogram(self, name: str, help_text: str, histogram, **labels) -> None:
+        self._declare(name, "histogram", help_text)
+        for bound, count in histogram.cumulative_buckets():
+            le = "+Inf" if bound == math.inf else f"{bound:.6g}"
+            self.lines.append(f"{name}_bucket{_labels({**labels, 'le': le})} {count}")
+        self.lines.append(f"{name}_sum{_labels(labels)} {histogram.sum!r}")
+        self.lines.append(f"{name}_count{_labels(labels)} {histogram.count}")
+
+    def render(self) -> str:
+        return "\n".join(self.lines) + "\n"
+
+
+def render_metrics(coordinators: dict) -> str:
+    """Render the metrics of {entry_id: coordinator} in Prometheus text format."""
+    out = _Writer()
+    # Families must be contiguous: iterate metrics first, then entries
+    items = sorted(coordinators.items())
+
+    for entry_id, coordinator in items:
+        client = coordinator.client
+        for action, count in sorted(getattr(client, "call_counts", {}).items()):
+            out.sample("eedomus_api_calls", "counter", "API requests sent, by action.",
+                       count, entry_id=entry_id, action=action)
+    for entry_id, coordinator in items:
+        for action, size in sorted(getattr(coordinator.client, "bytes_received", {}).items()):
+            out.sample("eedomus_api_response_bytes", "counter", "API response bytes received, by action.",
+                       size, entry_id=entry_id, action=action)
+    for entry_id, coordinator in items:
+        for (action, error), count in sorted(getattr(coordinator.client, "error_counts", {}).items()):
+            out.sample("eedomus_api_errors", "counter",
+                       "API errors, by action and eedomus error code (or http_<status>, timeout...).",
+                       count, entry_id=entry_id, action=action, error=error)
+    circuits = [
+        (entry_id, coordinator.client.circuit)
+        for entry_id, coordinator in items
+        if getattr(coordinator.client, "circuit", None) is not None
+    ]
+    for entry_id, circuit in circuits:
+        out.sample("eedomus_box_circuit_open", "gauge",
+                   "1 while requests to the box fail fast (box unreachable).",
+                   0 if circuit.is_closed else 1, entry_id=entry_id)
+    for entry_id, circuit in circuits:
+        out.sample("eedomus_box_circuit_opened", "counter",
+                   "Times the box was detected unreachable.", circuit.open_count, entry_id=entry_id)
+    lanes = [
+        (entry_id, lane, stats)
+        for entry_id, coordinator in items
+        for lane, stats in sorted(getattr(getattr(coordinator.client, "scheduler", None), "stats", {}).items())
+    ]
+    for entry_id, lane, stats in lanes:
+        out.sample("eedomus_request_lane_requests", "counter",
+                   "Requests sent, by priority lane.", stats["requests"], entry_id=entry_id, lane=lane)
+    for entry_id, lane, stats in lanes:
+        out.sample("eedomus_request_lane_wait_seconds", "counter",
+                   "Time requests waited for a slot, by priority lane.",
+                   stats["wait"], entry_id=entry_id, lane=lane)
+    for entry_id, coordinator in items:
+        for endpoint, size in sorted(coordinator._endpoint_data_sizes.items()):
+            out.sample("eedomus_endpoint_last_response_bytes", "gauge",
+                       "Size of the last response of each refresh endpoint.",
+                       size, entry_id=entry_id, endpoint=endpoint)
+    for entry_id, coordinator in items:
+        for name, count in sorted(coordinator._set_value_counts.items()):
+            out.sample(f"eedomus_set_value_{name}", "counter",
+                       f"Set value {name.replace('_', ' ')} count.", count, entry_id=entry_id)
+    for entry_id, coordinator in items:
+        out.sample("eedomus_entity_updates", "counter", "Entity state updates triggered by the coordinator.",
+                   coordinator._entity_update_count, entry_id=entry_id)
+    for entry_id, coordinator in items:
+        out.sample("eedomus_peripherals", "gauge", "Known peripherals.",
+                   len(coordinator.data or {}), entry_id=entry_id)
+    for entry_id, coordinator in items:
+        for endpoint, histogram in sorted(coordinator._endpoint_latency.histograms.items()):
+            out.histogram("eedomus_endpoint_latency_seconds", "API endpoint latency.",
+                          histogram, entry_id=entry_id, endpoint=endpoint)
+    for entry_id, coordinator in items:
+        for refresh_type, histogram in sorted(coordinator._refresh_latency.histograms.items()):
+            out.histogram("eedomus_refresh_duration_seconds", "Duration by refresh type (full, partial, set, history).",
+                          histogram, entry_id=entry_id, type=refresh_type)
+    for entry_id, coordinator in items:
+        out.histogram("eedomus_mapping_duration_seconds", "Duration of the device mapping phase.",
+                      coordinator._mapping_latency, entry_id=entry_id)
+    # Event loop lag monitor (opt-in, absent for most entries)
+    monitored = [(entry_id, c._loop_monitor) for entry_id, c in items if c._loop_monitor is not None]
+    for entry_id, monitor in monitored:
+        for phase, stats in sorted(monitor.stats.items()):
+            out.sample("eedomus_loop_stalls", "counter", "Event loop stalls, by eedomus phase.",
+                       stats["stalls"], entry_id=entry_id, phase=phase)
+    for entry_id, monitor in monitored:
+        for phase, stats in sorted(monitor.stats.items()):
+            out.sample("eedomus_loop_stall_seconds", "counter", "Event loop stall time, by eedomus phase.",
+                       stats["total"], entry_id=entry_id, phase=phase)
+    for entry_id, monitor in monitored:
+        for phase, stats in sorted(monitor.stats.items()):
+            out.sample("eedomus_loop_stall_max_seconds", "gauge", "Longest event loop stall, by eedomus phase.",
+                       stats["max"], entry_id=entry_id, phase=phase)
+    return out.render()
+
+
+class EedomusMetricsView(HomeAssistantView):
+    """Expose the metrics of every eedomus entry (Home Assistant auth required)."""
+
+    requires_auth = True
+    url = "/api/eedomus/metrics"
+    name = "api:eedomus:metrics"
+
+    async def get(self, request):
+        hass = request.app["hass"]
+        coordinators = {
+            entry_id: entry_data[COORDINATOR]
+            for entry_id, entry_data in hass.data.get(DOMAIN, {}).items()
+            if isinstance(entry_data, dict) and entry_data.get(COORDINATOR) is not None
+        }
+        return web.Response(
+            body=render_metrics(coordinators).encode("utf-8"),
+            headers={"Content-Type": CONTENT_TYPE},
+        )
@@ -85,6 +85,17 @@ class EedomusRefreshTimingSensor(CoordinatorEntity, SensorEntity):
             "sensor_type": self._sensor_type
         }
 
+def _latency_attributes(tracker, name: str, prefix: str = "") -> dict:
+    """p50/p95/p99 of a rolling latency histogram as flat attributes."""
+    snapshot = tracker.snapshot(name) if tracker is not None else {}
+    return {
+        f"{prefix}p50": snapshot.get("p50"),
+        f"{prefix}p95": snapshot.get("p95"),
+        f"{prefix}p99": snapshot.get("p99"),
+        f"{prefix}samples": snapshot.get("recent_count", 0),
+    }
+
+
 class EedomusAPITimeSensor(EedomusRefreshTimingSensor):
     """Sensor for tracking API response time."""
 
@@ -152,6 +163,10 @@ class EedomusTotalRefreshTimeSensor(EedomusRefreshTimingSensor):
             "component": "total",
             "unit": "seconds"
         })
+        # Rolling percentiles per refresh type (full_p95, set_p99, ...)
+        tracker = getattr(self.coordinator, "_refresh_latency", None)
+        for refresh_type in ("full", "partial", "set", "history"):
+            attrs.update(_latency_attributes(tracker, refresh_type, f"{refresh_type}_"))
         return attrs
 
 class EedomusProcessedDevicesSensor(EedomusRefreshTimingSensor):
@@ -179,6 +194,39 @@ class EedomusProcessedDevicesSensor(EedomusRefreshTimingSensor):
         return attrs
 
 
+class EedomusStartupDurationSensor(EedomusRefreshTimingSensor):
+    """Sensor for the integration setup duration, with its per-phase timeline."""
+
+    def __init__(self, coordinator):
+        """Initialize the startup duration sensor."""
+        super().__init__(coordinator, "Startup Duration", "s", "mdi:rocket-launch")
+
+    @property
+    def native_value(self):
+        """Return the setup duration once the setup is complete."""
+        timeline = getattr(self.coordinator, "_startup_timeline", None)
+        if timeline is None or not timeline.finished:
+            return None
+        return round(timeline.total, 3)
+
+    @property
+    def extra_state_attributes(self):
+        """Return the duration (and entity count) of each setup phase."""
+        attrs = super().extra_state_attributes
+        attrs.update({
+            "description": "Time taken by the integration setup, by phase",
+            "component": "startup",
+            "unit": "seconds"
+        })
+        timeline = getattr(self.coordinator, "_startup_timeline", None)
+        if timeline is not None:
+            for phase in timeline.as_dict()["phases"]:
+                attrs[phase["phase"]] = phase["duration"]
+                if "entities" in phase:
+                    attrs[f"{phase['phase']}_entities"] = phase["entities"]
+        return attrs
+
+
 class EedomusEndpointTimingSensor(EedomusRefreshTimingSensor):
     """Base class for endpoint-specific timing sensors."""
 
@@ -186,6 +234,8 @@ class EedomusEndpointTimingSensor(EedomusRefreshTimingSensor):
         """Initialize the endpoint timing sensor."""
         super().__init__(coordinator, f"{endpoint_name} Time", "s", icon)
         self._endpoint_name = endpoint_name
+        # Histogram holding this sensor's latencies: (coordinator attribute, key)
+        self._latency_source = ("_endpoint_latency", endpoint_name)
 
     @property
     def native_value(self):
@@ -204,6 +254,8 @@ class EedomusEndpointTimingSensor(EedomusRefreshTimingSensor):
             "unit": "seconds",
             "call_count": self.coordinator._endpoint_call_counts.get(self._endpoint_name, 0) if hasattr(self.coordinator, '_endpoint_call_counts') else 0
         })
+        attribute, key = self._latency_source
+        attrs.update(_latency_attributes(getattr(self.coordinator, attribute, None), key))
         return attrs
 
 
@@ -237,6 +289,7 @@ class EedomusPartialRefreshSensor(EedomusEndpointTimingSensor):
     def __init__(self, coordinator):
         """Initialize the partial refresh timing sensor."""
         super().__init__(coordinator, "partial_refresh", "mdi:refresh")
+        self._latency_source = ("_refresh_latency", "partial")
 
 async def async_setup_refresh_timing_sensors(hass: HomeAssistant, coordinator, device_registry):
     """Set up refresh timing sensors and attach them to the eedomus box device."""
@@ -266,6 +319,7 @@ async def async_setup_refresh_timing_sensors(hass: HomeAssistant, coordinator, d
         EedomusProcessingTimeSensor(coordinator),
         EedomusTotalRefreshTimeSensor(coordinator),
         EedomusProcessedDevicesSensor(coordinator),
+        EedomusStartupDurationSensor(coordinator),
         # Endpoint-specific sensors
         EedomusGetPeriphListSensor(coordinator),
         EedomusGetPeriphValueListSensor(coordinator),
@@ -0,0 +1,95 @@
+"""Priority lanes for the requests sent by the client.
+
+User commands, polls and history fetches used to start as soon as they
+were issued, so a light toggle could queue on the box behind a slow
+``periph.caract all``. Each request now waits for a slot in its lane:
+
+- interactive: commands (``periph.value`` set, PHP fallback)
+- polling: refresh requests
+- background: history fetches
+
+A lane only starts a request when no higher-priority request is waiting
+or running (preemption of the lower lanes: requests already sent are not
+cancelled, new ones wait), and within its own concurrency limit.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional
+
+INTERACTIVE = "interactive"
+POLLING = "polling"
+BACKGROUND = "background"
+# Highest priority first
+LANES = (INTERACTIVE, POLLING, BACKGROUND)
+
+LANE_LIMITS = {INTERACTIVE: 4, POLLING: 2, BACKGROUND: 1}
+
+
+class RequestScheduler:
+    """Admit requests lane by lane, higher lanes first."""
+
+    def __init__(self, limits: Optional[Dict[str, int]] = None, clock=time.monotonic):
+        """Initialize the scheduler (limits: max concurrent requests per lane)."""
+        self.limits = dict(LANE_LIMITS, **(limits or {}))
+        self._clock = clock
+        self._condition = asyncio.Condition()
+        self._running = dict.fromkeys(LANES, 0)
+        self._waiting = dict.fromkeys(LANES, 0)
+        # Per lane: requests, cumulated and longest wait for a slot (seconds)
+        self.stats: Dict[str, Dict[str, float]] = {
+            lane: {"requests": 0, "wait": 0.0, "max_wait": 0.0} for lane in LANES
+        }
+
+    def _can_start(self, lane: str) -> bool:
+        if self._running[lane] >= self.limits[lane]:
+            return False
+        for higher in LANES[:LANES.index(lane)]:
+            if self._waiting[higher] or self._running[higher]:
+                return False
+        return True
+
+    @asynccontextmanager
+    async def slot(self, lane: str):
+        """Hold a slot of `lane` for the enclosed request."""
+        start = self._clock()
+        async with self._condition:
+            self._waiting[lane] += 1
+            try:
+                await self._condition.wait_for(lambda: self._can_start(lane))
+            finally:
+                self._waiting[lane] -= 1
+                # A waiting higher-priority request may have been cancelled
+                self._condition.notify_all()
+            self._running[lane] += 1
+        self._record_wait(lane, self._clock() - start)
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self._running[lane] -= 1
+                self._condition.notify_all()
+
+    def _record_wait(self, lane: str, wait: float) -> None:
+        stats = self.stats[lane]
+        stats["requests"] += 1
+        stats["wait"] += wait
+        stats["max_wait"] = max(stats["max_wait"], wait)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Snapshot for the diagnostics."""
+        return {
+            lane: {
+                "limit": self.limits[lane],
+                "running": self._running[lane],
+                "waiting": self._waiting[lane],
+                "requests": int(self.stats[lane]["requests"]),
+                "mean_wait": round(self.stats[lane]["wait"] / self.stats[lane]["requests"], 4)
+                if self.stats[lane]["requests"] else 0.0,
+                "max_wait": round(self.stats[lane]["max_wait"], 4),
+            }
+            for lane in LANES
+        }
@@ -0,0 +1,163 @@
+"""Time-ordered retry scheduler for failed history peripherals.
+
+Failed peripherals are kept in a heap ordered by their next retry time, so
+the next due peripheral is found in O(log n) and the coordinator can arm a
+single timer for it instead of checking every peripheral on every poll.
+Each failure doubles the delay (exponential backoff) up to a maximum, with
+random jitter so peripherals that failed together don't retry together.
+"""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import logging
+import random
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+_LOGGER = logging.getLogger(__name__)
+
+# Stale heap entries tolerated before compaction, on top of 2x the live ones
+COMPACT_SLACK = 64
+
+
+class HistoryRetryScheduler:
+    """Backoff scheduler keeping failed peripherals in a heap by due time.
+
+    Entries superseded by a newer failure or a success are not removed from
+    the heap, they are skipped when they reach the top (lazy deletion).
+    The ``{periph_id: info}`` view (``in``, ``len``, ``items``) used by the
+    error sensors is kept from the former ``_retry_queue`` dict.
+    """
+
+    def __init__(
+        self,
+        base_delay: float,
+        max_delay: float,
+        jitter: float = 0.2,
+        rng: Optional[Callable[[float, float], float]] = None,
+    ):
+        """Initialize the scheduler (delays in seconds)."""
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self._uniform = rng or random.uniform
+        self._heap: List[Tuple[float, int, str]] = []
+        self._entries: Dict[str, dict] = {}
+        self._counter = itertools.count()
+        # Bumped on every change, lets observers skip unchanged snapshots
+        self.version = 0
+
+    def __contains__(self, periph_id: str) -> bool:
+        return periph_id in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def items(self) -> Iterator[Tuple[str, dict]]:
+        """Iterate over ``(periph_id, info)`` of peripherals in error."""
+        return iter(self._entries.items())
+
+    def get(self, periph_id: str) -> Optional[dict]:
+        """Return the retry info of a peripheral, if in error."""
+        return self._entries.get(periph_id)
+
+    def backoff_delay(self, attempts: int) -> float:
+        """Return the jittered delay before retry number ``attempts``."""
+        delay = min(self.base_delay * (2 ** max(attempts - 1, 0)), self.max_delay)
+        return delay * self._uniform(1 - self.jitter, 1 + self.jitter)
+
+    def record_failure(self, periph_id: str, error_message: str, now: Optional[float] = None) -> dict:
+        """Schedule the next retry of a failed peripheral."""
+        now = time.time() if now is None else now
+        previous = self._entries.get(periph_id)
+        attempts = previous["attempts"] + 1 if previous else 1
+        info = {
+            "error_time": now,
+            "retry_after": now + self.backoff_delay(attempts),
+            "error_message": error_message,
+            "attempts": attempts,
+            "seq": next(self._counter),
+        }
+        self._entries[periph_id] = info
+        self.version += 1
+        heapq.heappush(self._heap, (info["retry_after"], info["seq"], periph_id))
+        self._compact()
+        return info
+
+    def record_success(self, periph_id: str) -> bool:
+        """Forget a peripheral after a successful fetch; True if it was in error."""
+        if self._entries.pop(periph_id, None) is None:
+            return False
+        self.version += 1
+        return True
+
+    def requeue(self, periph_id: str, now: Optional[float] = None) -> bool:
+        """Schedule again a peripheral returned by ``pop_due`` without a verdict.
+
+        A fetch may end with neither a success nor a failure (window split
+        after a timeout): the peripheral is still in error but no longer in
+        the heap. It gets a new slot at its current backoff, without counting
+        an extra attempt. Returns False if it is not in error.
+        """
+        info = self._entries.get(periph_id)
+        if info is None:
+            return False
+        now = time.time() if now is None else now
+        info["retry_after"] = now + self.backoff_delay(info["attempts"])
+        info["seq"] = next(self._counter)
+        self.version += 1
+        heapq.heappush(self._heap, (info["retry_after"], info["seq"], periph_id))
+        self._compact()
+        return True
+
+    def is_waiting(self, periph_id: str, now: Optional[float] = None) -> bool:
+        """Return True while a failed peripheral must not be retried yet."""
+        info = self._entries.get(periph_id)
+        if info is None:
+            return False
+        return (time.time() if now is None else now) < info["retry_after"]
+
+    def _compact(self) -> None:
+        """Rebuild the heap once superseded entries outnumber the live ones.
+
+        Lazy deletion only drops stale entries when they reach the top, so a
+        peripheral failing repeatedly would otherwise grow the heap forever.
+        """
+        if len(self._heap) <= 2 * len(self._entries) + COMPACT_SLACK:
+            return
+        self._heap = [
+            item for item in self._heap
+            if self._entries.get(item[2], {}).get("seq") == item[1]
+        ]
+        heapq.heapify(self._heap)
+
+    def _prune(self) -> None:
+        """Drop stale heap tops (superseded or resolved entries)."""
+        while self._heap:
+            _, seq, periph_id = self._heap[0]
+            info = self._entries.get(periph_id)
+            if info is not None and info["seq"] == seq:
+                return
+            heapq.heappop(self._heap)
+
+    def next_due(self) -> Optional[float]:
+        """Return the timestamp of the next scheduled retry, if any."""
+        self._prune()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, limit: int, now: Optional[float] = None) -> List[str]:
+        """Return up to ``limit`` peripherals whose retry time has come.
+
+        They stay in error until ``record_success`` or a new ``record_failure``;
+        use ``requeue`` when the retry ended with neither.
+        """
+        now = time.time() if now is None else now
+        due: List[str] = []
+        while len(due) < limit:
+            self._prune()
+            if not self._heap or self._heap[0][0] > now:
+                break
+            due.append(heapq.heappop(self._heap)[2])
+        return due
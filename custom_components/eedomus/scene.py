@@ -9,7 +9,7 @@ from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 
 from .const import DOMAIN, COORDINATOR
-from .entity import EedomusEntity, map_device_to_ha_entity
+from .entity import EedomusEntity
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -21,24 +21,7 @@ async def async_setup_entry(
     coordinator = hass.data[DOMAIN][entry.entry_id][COORDINATOR]
     scenes = []
 
-    all_peripherals = coordinator.get_all_peripherals()
-
-    # First pass: ensure all peripherals have proper mapping
-    for periph_id, periph in all_peripherals.items():
-        if "ha_entity" not in coordinator.data[periph_id]:
-            eedomus_mapping = map_device_to_ha_entity(periph, coordinator.data, coordinator=coordinator)
-            coordinator.data[periph_id].update(eedomus_mapping)
-            # S'assurer que le mapping est enregistré dans le registre global
-            from .entity import _register_device_mapping
-            _register_device_mapping(eedomus_mapping, periph["name"], periph_id, periph)
-
-    # Second pass: create scene entities
-    for periph_id, periph in all_peripherals.items():
-        ha_entity = coordinator.data[periph_id].get("ha_entity")
-
-        if ha_entity != "scene":
-            continue
-
+    for periph_id, periph, _children in coordinator.platform_peripherals("scene"):
         _LOGGER.debug("Creating scene entity for %s (%s)", periph["name"], periph_id)
         scenes.append(EedomusScene(coordinator, periph_id))
 
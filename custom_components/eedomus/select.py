@@ -9,51 +9,41 @@ from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 
 from .const import DOMAIN, COORDINATOR
-from .entity import EedomusEntity, map_device_to_ha_entity
+from .entity import EedomusEntity
+from .metrics import timed_platform_setup
+from .platform_entities import build_entities, tracked_platform_setup
 
 _LOGGER = logging.getLogger(__name__)
 
 
-async def async_setup_entry(
-    hass: HomeAssistant, entry: ConfigEntry, async_add_entities
-):
-    """Set up eedomus select entities."""
-    coordinator = hass.data[DOMAIN][entry.entry_id][COORDINATOR]
-    selects = []
+def _select_entities(coordinator, periph_id, periph, children):
+    """Create the select entity of a peripheral."""
+    # Check if this device has values (required for select entities)
+    # Note: eedomus uses "values" field, not "value_list"
+    values_data = periph.get("values", [])
+    if not values_data:
+        _LOGGER.warning(
+            "Device %s (%s) mapped to select but has no values, skipping",
+            periph["name"],
+            periph_id,
+        )
+        return []
 
-    all_peripherals = coordinator.get_all_peripherals()
+    _LOGGER.debug("Creating select entity for %s (%s)", periph["name"], periph_id)
+    return [EedomusSelect(coordinator, periph_id)]
 
-    # First pass: ensure all peripherals have proper mapping
-    for periph_id, periph in all_peripherals.items():
-        if "ha_entity" not in coordinator.data[periph_id]:
-            eedomus_mapping = map_device_to_ha_entity(periph, coordinator.data, coordinator=coordinator)
-            coordinator.data[periph_id].update(eedomus_mapping)
-            # S'assurer que le mapping est enregistré dans le registre global
-            from .entity import _register_device_mapping
-            _register_device_mapping(eedomus_mapping, periph["name"], periph_id, periph)
 
-    # Second pass: create select entities
-    for periph_id, periph in all_peripherals.items():
-        ha_entity = coordinator.data[periph_id].get("ha_entity")
+ENTITY_FACTORIES = {"select": _select_entities}
 
-        if ha_entity != "select":
-            continue
 
-        # Check if this device has values (required for select entities)
-        # Note: eedomus uses "values" field, not "value_list"
-        values_data = periph.get("values", [])
-        if not values_data:
-            _LOGGER.warning(
-                "Device %s (%s) mapped to select but has no values, skipping",
-                periph["name"],
-                periph_id,
-            )
-            continue
-
-        _LOGGER.debug("Creating select entity for %s (%s)", periph["name"], periph_id)
-        selects.append(EedomusSelect(coordinator, periph_id))
-
-    async_add_entities(selects, True)
+@timed_platform_setup("select")
+@tracked_platform_setup("select", ENTITY_FACTORIES)
+async def async_setup_entry(
+    hass: HomeAssistant, entry: ConfigEntry, async_add_entities
+):
+    """Set up eedomus select entities."""
+    coordinator = hass.data[DOMAIN][entry.entry_id][COORDINATOR]
+    async_add_entities(build_entities(coordinator, ENTITY_FACTORIES), True)
 
 
 class EedomusSelect(EedomusEntity, SelectEntity):
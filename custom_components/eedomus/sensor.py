@@ -9,8 +9,11 @@ from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity import DeviceInfo
 
+from .aggregation import BATTERY_BUCKET
 from .const import DOMAIN, SENSOR_DEVICE_CLASSES, COORDINATOR
-from .entity import EedomusEntity, map_device_to_ha_entity
+from .entity import EedomusEntity
+from .metrics import timed_platform_setup
+from .platform_entities import build_entities, tracked_platform_setup
 from .text_sensor import EedomusTextSensor
 
 _LOGGER = logging.getLogger(__name__)
@@ -27,6 +30,66 @@ DEVICE_CLASS_UNITS = {
 }
 
 
+def _sensor_entities(coordinator, periph_id, periph, children):
+    """Create the sensor entity of a peripheral."""
+    _LOGGER.debug(
+        "Creating sensor entity for %s (periph_id=%s) mapping=%s",
+        periph["name"],
+        periph_id,
+        periph,
+    )
+
+    # Check if this is a text sensor with dynamic value mapping
+    entity_specifics = periph.get("entity_specifics", {})
+    if entity_specifics.get("value_mapping") == "dynamic_from_values":
+        _LOGGER.info("🆕 Creating dynamic text sensor for %s (%s)", 
+                    periph["name"], periph_id)
+        return [EedomusTextSensor(coordinator, periph_id)]
+
+    # Check if this sensor has children that should be aggregated
+    if children:
+        # Create aggregated sensor entity (similar to RGBW light)
+        return [EedomusAggregatedSensor(coordinator, periph_id, children)]
+    # Create regular sensor entity
+    return [EedomusSensor(coordinator, periph_id)]
+
+
+def _battery_entities(coordinator, periph_id, periph, children):
+    """Create the battery sensor of a device reporting its battery level."""
+    battery_level = periph.get("battery")
+    _LOGGER.debug(
+        "🔋 Battery info found for %s (%s): %s",
+        periph.get("name", "unknown"),
+        periph_id,
+        battery_level,
+    )
+
+    # Check if device has valid battery information
+    if str(battery_level).strip():
+        try:
+            battery_value = int(battery_level)
+            if 0 <= battery_value <= 100:
+                _LOGGER.debug(
+                    "Created battery sensor for %s (%s%%)",
+                    periph.get("name", "unknown"),
+                    battery_value,
+                )
+                return [EedomusBatterySensor(coordinator, periph_id)]
+        except ValueError:
+            _LOGGER.warning(
+                "Invalid battery level for %s: %s",
+                periph.get("name", "unknown"),
+                battery_level,
+            )
+    return []
+
+
+# Energy meters (usage_id=26) are already mapped as sensor:energy by the coordinator
+ENTITY_FACTORIES = {"sensor": _sensor_entities, BATTERY_BUCKET: _battery_entities}
+
+
+@timed_platform_setup("sensor")
+@tracked_platform_setup("sensor", ENTITY_FACTORIES)
 async def async_setup_entry(
     hass: HomeAssistant, entry: ConfigEntry, async_add_entities
 ):
@@ -42,127 +105,7 @@ async def async_setup_entry(
         _LOGGER.error("Coordinator not found for entry %s", entry.entry_id)
         return False
     
-    entities = []
-
-    # Get all peripherals and build parent-to-children mapping similar to light.py
-    all_peripherals = coordinator.get_all_peripherals()
-    parent_to_children = {}
-
-    for periph_id, periph in all_peripherals.items():
-        if periph.get("parent_periph_id"):
-            parent_id = periph["parent_periph_id"]
-            if parent_id not in parent_to_children:
-                parent_to_children[parent_id] = []
-            parent_to_children[parent_id].append(periph)
-        if not "ha_entity" in coordinator.data[periph_id]:
-            eedomus_mapping = map_device_to_ha_entity(periph, coordinator.data, coordinator=coordinator)
-            coordinator.data[periph_id].update(eedomus_mapping)
-            # S'assurer que le mapping est enregistré dans le registre global
-            from .entity import _register_device_mapping
-            _register_device_mapping(eedomus_mapping, periph["name"], periph_id, periph)
-
-    # Handle parent-child relationships for sensors similar to light.py
-    for periph_id, periph in all_peripherals.items():
-        ha_entity = None
-        if "ha_entity" in coordinator.data[periph_id]:
-            ha_entity = coordinator.data[periph_id]["ha_entity"]
-
-        parent_id = periph.get("parent_periph_id", None)
-        if parent_id:
-            # Children are managed by parent... similar to light logic
-            eedomus_mapping = None
-            if periph.get("usage_id") == "26":  # Energy meter like in light.py
-                # Create energy sensor for consumption monitoring
-                eedomus_mapping = {
-                    "ha_entity": "sensor",
-                    "ha_subtype": "energy",
-                    "justification": "Energy consumption meter (usage_id=26)",
-                }
-            # Removed usage_id=82 mapping as it's now handled by the main mapping system as "select"
-            if not eedomus_mapping is None:
-                coordinator.data[periph_id].update(eedomus_mapping)
-                _LOGGER.debug(
-                    "Created energy sensor for %s (%s) - consumption monitoring",
-                    periph["name"],
-                    periph_id,
-                )
-
-    # Create sensor entities
-    for periph_id, periph in all_peripherals.items():
-        ha_entity = None
-        if "ha_entity" in coordinator.data[periph_id]:
-            ha_entity = coordinator.data[periph_id]["ha_entity"]
-
-        if ha_entity is None or not ha_entity == "sensor":
-            continue
-
-        _LOGGER.debug(
-            "Creating sensor entity for %s (periph_id=%s) mapping=%s",
-            periph["name"],
-            periph_id,
-            coordinator.data[periph_id],
-        )
-
-        # Check if this is a text sensor with dynamic value mapping
-        entity_specifics = coordinator.data[periph_id].get("entity_specifics", {})
-        if entity_specifics.get("value_mapping") == "dynamic_from_values":
-            _LOGGER.info("🆕 Creating dynamic text sensor for %s (%s)", 
-                        periph["name"], periph_id)
-            entities.append(EedomusTextSensor(coordinator, periph_id))
-            continue
-
-        # Check if this sensor has children that should be aggregated
-        if periph_id in parent_to_children and len(parent_to_children[periph_id]) > 0:
-            # Create aggregated sensor entity (similar to RGBW light)
-            entities.append(
-                EedomusAggregatedSensor(
-                    coordinator,
-                    periph_id,
-                    parent_to_children[periph_id],
-                )
-            )
-        else:
-            # Create regular sensor entity
-            entities.append(EedomusSensor(coordinator, periph_id))
-
-    # Create battery sensor entities for devices with battery information
-    # EXCEPT for children that should be mapped as other sensor types
-    for periph_id, periph in all_peripherals.items():
-        battery_level = periph.get("battery")
-
-        # Debug: Log all devices with battery info
-        if battery_level:
-            _LOGGER.debug(
-                "🔋 Battery info found for %s (%s): %s",
-                periph.get("name", "unknown"),
-                periph_id,
-                battery_level,
-            )
-
-        # Check if device has valid battery information
-        if battery_level and str(battery_level).strip():
-            try:
-                battery_value = int(battery_level)
-                if 0 <= battery_value <= 100:
-                    # Skip if this device should be mapped as a different sensor type
-                    # based on usage_id (children of motion sensors, etc.)
-                    ha_entity = coordinator.data[periph_id].get("ha_entity")
-                    usage_id = periph.get("usage_id")
-
-                    # Create battery sensor entity
-                    battery_entity = EedomusBatterySensor(coordinator, periph_id)
-                    entities.append(battery_entity)
-                    _LOGGER.debug(
-                        "Created battery sensor for %s (%s%%)",
-                        periph.get("name", "unknown"),
-                        battery_value,
-                    )
-            except ValueError:
-                _LOGGER.warning(
-                    "Invalid battery level for %s: %s",
-                    periph.get("name", "unknown"),
-                    battery_level,
-                )
+    entities = build_entities(coordinator, ENTITY_FACTORIES)
 
     # Add timing sensors if they exist in the coordinator
     if hasattr(coordinator, '_timing_sensors') and coordinator._timing_sensors:
@@ -179,6 +122,11 @@ async def async_setup_entry(
                        hasattr(coordinator, '_volume_sensors'), 
                        getattr(coordinator, '_volume_sensors', 'N/A'))
     
+    # Add history diagnostic sensors if history retrieval is enabled
+    if getattr(coordinator, '_history_diagnostic_sensors', None):
+        entities.extend(coordinator._history_diagnostic_sensors)
+        _LOGGER.info("📊 Added %d history diagnostic sensors", len(coordinator._history_diagnostic_sensors))
+
     async_add_entities(entities)
 
 
@@ -223,13 +171,9 @@ class EedomusSensor(EedomusEntity, SensorEntity):
         )
 
         # Check if this is a system sensor and should be attached to eedomus box
-        # Get the mapping for this device to check internal_box_eedomus parameter
-        from .entity import map_device_to_ha_entity
-        periph_data = self._get_periph_data()
-        all_devices = self.coordinator._all_peripherals if hasattr(self.coordinator, '_all_peripherals') else {}
-        device_mapping = map_device_to_ha_entity(periph_data, all_devices, coordinator=self.coordinator) if periph_data else {}
-        
-        if is_system_sensor(periph_data, device_mapping):
+        # The coordinator merged the device mapping (ha_subtype, internal_box_eedomus...)
+        # into the peripheral data: no need to map the device again
+        if is_system_sensor(periph_info, periph_info):
             self._attr_device_info = DeviceInfo(
                 identifiers={(DOMAIN, "eedomus_box_main")},
                 name="Box eedomus",
@@ -240,13 +184,7 @@ class EedomusSensor(EedomusEntity, SensorEntity):
             _LOGGER.info("🔗 Attached system sensor %s to Box eedomus", periph_info.get("name", "unknown"))
 
         # Set sensor-specific attributes based on ha_subtype
-        # Use ha_subtype from device_mapping if available (to apply specific mappings)
-        if device_mapping and periph_id == "1061604":  # Debug for Espace libre Box
-            _LOGGER.debug("DEBUG: device_mapping for 1061604: %s", device_mapping)
-        periph_type = device_mapping.get("ha_subtype") if device_mapping and "ha_subtype" in device_mapping else periph_info.get("ha_subtype")
-        if periph_id == "1061604":  # Debug for Espace libre Box
-            _LOGGER.debug("DEBUG: periph_type for 1061604: %s (from device_mapping: %s, from periph_info: %s)", 
-                        periph_type, device_mapping.get("ha_subtype") if device_mapping else "None", periph_info.get("ha_subtype"))
+        periph_type = periph_info.get("ha_subtype")
 
         # Set default device class for all sensors
         self._attr_device_class = None
@@ -431,6 +369,7 @@ class EedomusSensor(EedomusEntity, SensorEntity):
 
         if "value_list" in periph_data:
             attrs["value_list"] = periph_data["value_list"]
+        attrs.update(self._data_age_attributes())
 
         return attrs
 
@@ -516,7 +455,7 @@ class EedomusHistoryProgressSensor(EedomusEntity, SensorEntity):
     @property
     def native_value(self):
         """Retourne le pourcentage de progression."""
-        progress = self.coordinator._history_progress.get(self._device_id, {})
+        progress = self.coordinator._history_progress.get(self._periph_id, {})
         if progress.get("completed"):
             return 100
         return 0  # To be improved with real estimation
@@ -524,7 +463,7 @@ class EedomusHistoryProgressSensor(EedomusEntity, SensorEntity):
     @property
     def extra_state_attributes(self):
         """Retourne des détails sur la progression."""
-        progress = self.coordinator._history_progress.get(self._device_id, {})
+        progress = self.coordinator._history_progress.get(self._periph_id, {})
         return {
             "last_timestamp": progress.get("last_timestamp", 0),
             "completed": progress.get("completed", False),
@@ -533,6 +472,7 @@ class EedomusHistoryProgressSensor(EedomusEntity, SensorEntity):
                 if progress.get("last_timestamp")
                 else "Not started"
             ),
+            **self._data_age_attributes(),
         }
 
 
@@ -615,6 +555,7 @@ class EedomusBatterySensor(EedomusEntity, SensorEntity):
             "device_type": periph_data.get("usage_name", ""),
             "battery_status": battery_status,
             "parent_device": periph_data.get("name", ""),
+            **self._data_age_attributes(),
         }
 
     async def async_update(self) -> None:
@@ -6,10 +6,11 @@ import logging
 from datetime import datetime
 from typing import Any
 
-from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.core import HomeAssistant, ServiceCall, SupportsResponse
 from homeassistant.helpers import config_entry_flow
 
-from .const import DOMAIN
+from .const import CONF_RELOAD_MAPPING, DOMAIN
+from .profiling import DEFAULT_TOP, async_profile_refresh
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -373,6 +374,37 @@ async def async_setup_services(hass: HomeAssistant, coordinator) -> None:
                 "error": str(err)
             }
 
+    async def handle_record_api(call: ServiceCall) -> dict:
+        """Start or stop recording the eedomus API responses into a fixture file."""
+        action = call.data.get("action", "start")
+        client = coordinator.client
+        if action == "start":
+            filename = call.data.get("filename") or f"eedomus_recording_{datetime.now():%Y%m%d_%H%M%S}.json"
+            recorder = client.start_recording(hass.config.path(filename))
+            return {"success": True, "path": recorder.path}
+        if action == "stop":
+            recorder = client.stop_recording()
+            if recorder is None:
+                _LOGGER.warning("⚠️ API recording was not started")
+                return {"success": False, "error": "Recording not started"}
+            path = await hass.async_add_executor_job(recorder.save)
+            return {"success": True, "path": path, "entries": len(recorder.entries)}
+        raise ValueError(f"Unknown record_api action: {action}")
+
+    async def handle_profile_refresh(call: ServiceCall) -> dict:
+        """Profile one refresh cycle (cProfile + tracemalloc) into a report file."""
+        mode = call.data.get("mode", "full")
+        filename = call.data.get("filename") or f"eedomus_profile_{datetime.now():%Y%m%d_%H%M%S}.txt"
+        _LOGGER.info("⏱️ Profiling a %s refresh", mode)
+        return await async_profile_refresh(
+            hass, coordinator, mode, hass.config.path(filename), int(call.data.get("top", DEFAULT_TOP))
+        )
+
+    async def handle_reload_mapping(call: ServiceCall) -> dict:
+        """Apply edited mapping YAML files without reloading the integration."""
+        _LOGGER.info("🗺️ Mapping reload requested via service call")
+        return await coordinator.async_reload_mappings()
+
     # Register services
     try:
         hass.services.async_register("eedomus", "refresh", handle_refresh)
@@ -381,7 +413,16 @@ async def async_setup_services(hass: HomeAssistant, coordinator) -> None:
         hass.services.async_register("eedomus", "set_climate_temperature", handle_set_climate_temperature)
         hass.services.async_register("eedomus", "cleanup_unused_entities", handle_cleanup_unused_entities)
         hass.services.async_register("eedomus", "cleanup_unused_devices", handle_cleanup_unused_devices)
-        _LOGGER.info("🛠️  Eedomus services registered: refresh, set_value, reload, set_climate_temperature, cleanup_unused_entities, cleanup_unused_devices")
+        hass.services.async_register("eedomus", "record_api", handle_record_api)
+        hass.services.async_register(
+            "eedomus", "profile_refresh", handle_profile_refresh,
+            supports_response=SupportsResponse.OPTIONAL,
+        )
+        hass.services.async_register(
+            "eedomus", CONF_RELOAD_MAPPING, handle_reload_mapping,
+            supports_response=SupportsResponse.OPTIONAL,
+        )
+        _LOGGER.info("🛠️  Eedomus services registered: refresh, set_value, reload, set_climate_temperature, cleanup_unused_entities, cleanup_unused_devices, record_api, profile_refresh, reload_mapping")
     except Exception as err:
         _LOGGER.error("❌ Failed to register eedomus services: %s", err)
         raise err
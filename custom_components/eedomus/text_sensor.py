@@ -93,17 +93,18 @@ class EedomusTextSensor(EedomusEntity, SensorEntity):
     def extra_state_attributes(self) -> dict[str, Any] | None:
         """Return extra state attributes for the sensor."""
         periph_data = self._get_periph_data()
+        attrs = self._data_age_attributes()
         if not periph_data or not self._dynamic_value_mapping:
-            return None
+            return attrs or None
             
         # Return the available values as attributes
         values = periph_data.get("values", [])
         if values:
-            return {
+            attrs.update({
                 "available_values": {item.get("value"): item.get("description") for item in values},
                 "current_raw_value": periph_data.get("last_value")
-            }
-        return None
+            })
+        return attrs or None
 
     @property
     def icon(self) -> str | None:
@@ -162,11 +163,9 @@ async def async_setup_entry(
         return False
 
     entities = []
-    all_peripherals = coordinator.get_all_peripherals()
-
-    for periph_id, periph in all_peripherals.items():
+    for periph_id, periph, _children in coordinator.platform_peripherals("sensor"):
         # Check if this device should be a text sensor
-        if periph.get("ha_entity") == "sensor" and periph.get("ha_subtype") == "text":
+        if periph.get("ha_subtype") == "text":
             # Check if it has dynamic value mapping
             entity_specifics = periph.get("entity_specifics", {})
             if entity_specifics.get("value_mapping") == "dynamic_from_values":
@@ -1,5 +1,6 @@
 import json
 import logging
+from datetime import datetime
 
 from aiohttp import web
 from homeassistant.components.http import HomeAssistantView
@@ -51,6 +52,7 @@ class EedomusWebhookView(HomeAssistantView):
                 data.get("action") != "refresh"
                 and data.get("action") != "partial_refresh"
                 and data.get("action") != "reload"
+                and data.get("action") != "push"
             ):
                 return web.Response(text="Unrecognized action", status=400)
 
@@ -63,12 +65,16 @@ class EedomusWebhookView(HomeAssistantView):
                 _LOGGER.error("Coordinator not found for entry_id: %s", self.entry_id)
                 return web.Response(text="Coordinator not available", status=500)
 
-            # 3. Execute refresh or reload
+            # 3. Push: apply the value directly, no API round-trip
+            if data.get("action") == "push":
+                return self._handle_push(coordinator, data)
+
+            # 4. Execute refresh or reload
             _LOGGER.info("Triggering eedomus %s", data.get("action"))
-            if data.get("action") == "refresh":
-                await coordinator._async_full_refresh()
-            if data.get("action") == "partial_refresh":
-                await coordinator._async_partial_refresh()
+            if data.get("action") in ("refresh", "partial_refresh"):
+                # Queued and coalesced: a burst of webhooks runs a single refresh
+                coordinator.async_request_webhook_refresh(full=data.get("action") == "refresh")
+                return web.Response(text="Accepted", status=202)
             if data.get("action") == "reload":
                 _LOGGER.info("Reloading eedomus integration")
                 # Get the config entry
@@ -92,3 +98,28 @@ class EedomusWebhookView(HomeAssistantView):
         except Exception as e:
             _LOGGER.error("Webhook error: %s", str(e), exc_info=True)
             return web.Response(text="Internal error", status=500)
+
+    def _handle_push(self, coordinator, data):
+        """Apply a {periph_id, value, timestamp} payload sent by an eedomus rule."""
+        periph_id = data.get("periph_id")
+        if periph_id is None or "value" not in data:
+            return web.Response(text="Missing periph_id or value", status=400)
+
+        timestamp = None
+        if data.get("timestamp") not in (None, ""):
+            try:
+                timestamp = _parse_push_timestamp(data["timestamp"])
+            except (TypeError, ValueError):
+                return web.Response(text="Invalid timestamp", status=400)
+
+        if not coordinator.async_apply_push(str(periph_id), data["value"], timestamp):
+            _LOGGER.warning("Push received for unknown peripheral %s", periph_id)
+            return web.Response(text="Unknown peripheral", status=404)
+        return web.Response(text="OK")
+
+
+def _parse_push_timestamp(value):
+    """Parse an epoch or a "YYYY-MM-DD HH:MM:SS" (eedomus) / ISO timestamp."""
+    if isinstance(value, (int, float)) or str(value).isdigit():
+        return datetime.fromtimestamp(float(value))
+    return datetime.fromisoformat(str(value))
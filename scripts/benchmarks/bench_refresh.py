@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+
+"""
+Offline benchmarks of the eedomus coordinator refresh cycle.
+
+Measures the wall time and the peak memory (tracemalloc) of each stage over
+synthetic installations built by the local simulator (RGBW lamps with their
+channels, smart plugs with power/energy meters, fil pilote heaters, sensors):
+
+- first_refresh:   async_config_entry_first_refresh (aggregation + mapping)
+- full_refresh:    _async_full_refresh
+- partial_refresh: _async_partial_refresh (dynamic peripherals only)
+- mapping:         map_device_to_ha_entity over every peripheral
+
+No network access is needed: the API responses are served in-process.
+With --replay, the responses come from a fixture recorded on a real box with
+the eedomus.record_api service, with their original latency (see
+--replay-speed, 0 disables the delays).
+
+Usage:
+    python3 bench_refresh.py [--sizes 100,1000,10000] [--repeat 3] [--json results.json]
+    python3 bench_refresh.py --replay eedomus_recording.json [--replay-speed 0]
+
+Compare two runs by saving them with --json before and after a change.
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from unittest.mock import MagicMock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from homeassistant.core import CoreState  # noqa: E402
+
+from custom_components.eedomus.api_recording import ReplaySession, load_recording  # noqa: E402
+from custom_components.eedomus.circuit_breaker import CircuitBreaker  # noqa: E402
+from custom_components.eedomus.coordinator import EedomusDataUpdateCoordinator  # noqa: E402
+from custom_components.eedomus.eedomus_client import EedomusClient  # noqa: E402
+from custom_components.eedomus.entity import map_device_to_ha_entity  # noqa: E402
+from eedomus_simulator import EedomusSimulator  # noqa: E402
+
+DEFAULT_SIZES = (100, 1000, 10000)
+STAGES = ("first_refresh", "full_refresh", "partial_refresh", "mapping")
+# Simulated time between two refreshes, used to apply value changes
+REFRESH_INTERVAL = 30
+CONFIG_DIR = tempfile.mkdtemp(prefix="eedomus_bench_")
+
+
+class OfflineClient:
+    """Stand-in for EedomusClient answering from a simulator, without HTTP."""
+
+    def __init__(self, simulator):
+        self.simulator = simulator
+        self.config_entry = MagicMock()
+        self.config_entry.data = {}
+        self.config_entry.options = {}
+        # The simulator always answers: closed unless a test opens it
+        self.circuit = CircuitBreaker(slow_call_threshold=float("inf"))
+
+    async def async_box_available(self):
+        return self.circuit.is_closed
+
+    def _selected(self, periph_id):
+        peripherals = self.simulator.peripherals
+        if periph_id == "all":
+            return list(peripherals.values())
+        return [peripherals[p] for p in periph_id.split(",") if p in peripherals]
+
+    async def get_periph_list(self):
+        return {"success": 1, "body": [p.list_entry() for p in self.simulator.peripherals.values()]}
+
+    async def get_periph_value_list(self, periph_id):
+        return {
+            "success": 1,
+            "body": [
+                {"periph_id": p.periph_id,
+                 "values": [{"value": v, "description": d} for v, d in p.values]}
+                for p in self._selected(periph_id) if p.values is not None
+            ],
+        }
+
+    async def get_periph_caract(self, periph_id, show_config=False):
+        self.simulator.advance(seconds=REFRESH_INTERVAL)
+        return {"success": 1, "body": [p.caract_entry(show_config) for p in self._selected(periph_id)]}
+
+
+class _States:
+    """Dict-backed stand-in for hass.states (a MagicMock would keep every call)."""
+
+    def __init__(self):
+        self._states = {}
+
+    def async_set(self, entity_id, state, attributes=None, *args, **kwargs):
+        self._states[entity_id] = (state, attributes)
+
+    def async_remove(self, entity_id, *args, **kwargs):
+        return self._states.pop(entity_id, None) is not None
+
+    def async_all(self, *args, **kwargs):
+        return []
+
+    def __len__(self):
+        return len(self._states)
+
+
+class _Hass:
+    """The few HomeAssistant services the coordinator uses.
+
+    A MagicMock would record every call (even truth tests) and look like a
+    leak in long runs.
+    """
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.data = {}
+        self.states = _States()
+        self.state = CoreState.running
+        self.bus = MagicMock()
+        self.bus.async_listen_once = lambda *args, **kwargs: (lambda: None)
+        self.config = MagicMock()
+        # Empty config dir: the history gap store starts empty, as on a fresh install
+        self.config.path = lambda *parts: os.path.join(CONFIG_DIR, *parts)
+
+    def async_add_executor_job(self, func, *args):
+        return self.loop.run_in_executor(None, func, *args)
+
+    def async_create_task(self, coro, *args, **kwargs):
+        return self.loop.create_task(coro)
+
+    def async_create_background_task(self, coro, *args, **kwargs):
+        return self.loop.create_task(coro)
+
+
+def replay_client(recording, speed=1.0):
+    """EedomusClient whose session answers from a recorded fixture."""
+    entry = MagicMock()
+    entry.data = {"api_user": "replay", "api_secret": "replay", "api_host": "replay"}
+    entry.options = {}
+    return EedomusClient(ReplaySession(recording, speed), entry)
+
+
+def make_coordinator(size, seed=1, replay=None, client=None):
+    """Build a coordinator wired to a synthetic installation of `size` peripherals.
+
+    With replay=(recording, speed), the recorded installation is used instead.
+    A given client is used as is (e.g. to share a simulator across reloads).
+    """
+    if client is None and replay is not None:
+        client = replay_client(*replay)
+    elif client is None:
+        client = OfflineClient(EedomusSimulator(peripherals=size, change_rate=0.01, seed=seed))
+    return EedomusDataUpdateCoordinator(_Hass(asyncio.get_running_loop()), client, REFRESH_INTERVAL)
+
+
+async def _run_stage(stage, coordinator):
+    if stage == "first_refresh":
+        await coordinator.async_config_entry_first_refresh()
+    elif stage == "full_refresh":
+        await coordinator._async_full_refresh()
+    elif stage == "partial_refresh":
+        await coordinator._async_partial_refresh()
+    elif stage == "mapping":
+        data = coordinator.data
+        for device in data.values():
+            map_device_to_ha_entity(device, data, coordinator=coordinator)
+
+
+async def _prepared(stage, size, replay=None):
+    """Coordinator in the state expected by the stage."""
+    coordinator = make_coordinator(size, replay=replay)
+    if stage != "first_refresh":
+        await coordinator.async_config_entry_first_refresh()
+    return coordinator
+
+
+async def measure(stage, size, repeat=3, replay=None):
+    """Return {"time": best seconds, "peak_kib": peak traced memory} for a stage."""
+    best = None
+    for _ in range(repeat):
+        coordinator = await _prepared(stage, size, replay)
+        gc.collect()
+        start = time.perf_counter()
+        await _run_stage(stage, coordinator)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    # Separate run for memory: tracing slows the code down and would skew timings
+    coordinator = await _prepared(stage, size, replay)
+    gc.collect()
+    tracemalloc.start()
+    await _run_stage(stage, coordinator)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"time": best, "peak_kib": peak / 1024}
+
+
+async def run(sizes=DEFAULT_SIZES, stages=STAGES, repeat=3, replay=None):
+    results = {}
+    if replay is not None:
+        # The size is the one of the recorded installation
+        sizes = ["replay"]
+    for size in sizes:
+        for stage in stages:
+            results[f"{stage}[{size}]"] = await measure(stage, size, repeat, replay)
+            result = results[f"{stage}[{size}]"]
+            print(f"  {stage:<16} {size:>6} peripherals  "
+                  f"{result['time'] * 1000:>10.1f} ms  {result['peak_kib']:>10.0f} KiB peak")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmarks of the eedomus refresh cycle")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES),
+                        help="Comma separated installation sizes")
+    parser.add_argument("--stages", default=",".join(STAGES), help="Comma separated stages")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per stage (best is kept)")
+    parser.add_argument("--json", help="Write the results to this file")
+    parser.add_argument("--replay", help="Replay a fixture recorded with eedomus.record_api")
+    parser.add_argument("--replay-speed", type=float, default=1.0,
+                        help="Divide the recorded latencies by this factor (0 = no delay)")
+    args = parser.parse_args()
+
+    # The coordinator logs every peripheral at startup; keep the output readable
+    logging.basicConfig(level=logging.ERROR)
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    stages = [s for s in args.stages.split(",") if s]
+    print("📊 eedomus refresh benchmarks")
+    replay = (load_recording(args.replay), args.replay_speed) if args.replay else None
+    results = asyncio.run(run(sizes, stages, args.repeat, replay))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
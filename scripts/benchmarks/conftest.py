@@ -0,0 +1,42 @@
+"""Fallback `benchmark` fixture when pytest-benchmark is not installed."""
+
+import time
+
+import pytest
+
+try:
+    import pytest_benchmark  # noqa: F401
+
+    HAS_PYTEST_BENCHMARK = True
+except ImportError:
+    HAS_PYTEST_BENCHMARK = False
+
+
+class _SimpleBenchmark:
+    """Subset of the pytest-benchmark fixture API used by these benchmarks."""
+
+    def __init__(self, name):
+        self.name = name
+        self.timings = []
+
+    def pedantic(self, target, setup=None, rounds=1):
+        result = None
+        for _ in range(rounds):
+            args, kwargs = setup() if setup else ((), {})
+            start = time.perf_counter()
+            result = target(*args, **kwargs)
+            self.timings.append(time.perf_counter() - start)
+        return result
+
+    def __call__(self, target, *args, **kwargs):
+        return self.pedantic(lambda: target(*args, **kwargs))
+
+
+if not HAS_PYTEST_BENCHMARK:
+
+    @pytest.fixture
+    def benchmark(request):
+        bench = _SimpleBenchmark(request.node.name)
+        yield bench
+        if bench.timings:
+            print(f"\n{bench.name}: min {min(bench.timings) * 1000:.1f} ms over {len(bench.timings)} rounds")
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+
+"""
+Soak test of the eedomus coordinator: does memory stay bounded over time?
+
+Runs thousands of simulated refresh cycles against the in-process simulator:
+partial refreshes, periodic full refreshes, history failures, topology changes
+(a device removed and another one added) and integration reloads (a new
+coordinator on the same box). tracemalloc and the number of live objects are
+sampled along the way; the run fails if the memory used after the warm-up
+keeps growing beyond the tolerance.
+
+Usage:
+    python3 soak_refresh.py [--peripherals 500] [--cycles 5000] [--tolerance 0.1]
+
+The exit code is 1 when unbounded growth is detected.
+"""
+
+import argparse
+import asyncio
+import gc
+import logging
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from bench_refresh import OfflineClient, make_coordinator  # noqa: E402
+from eedomus_simulator import EedomusSimulator  # noqa: E402
+
+from custom_components.eedomus.mapping_registry import get_mapping_registry  # noqa: E402
+
+# Absolute growth always accepted (allocator noise, caches warming up)
+MIN_GROWTH_KIB = 256
+
+
+async def _new_coordinator(client):
+    coordinator = make_coordinator(0, client=client)
+    await coordinator.async_config_entry_first_refresh()
+    return coordinator
+
+
+def _structure_sizes(coordinator):
+    """Sizes of the coordinator structures that used to grow."""
+    return {
+        "data": len(coordinator.data),
+        "history_progress": len(coordinator._history_progress),
+        "retry_queue": len(coordinator._retry_queue),
+        "periph_listeners": len(coordinator._periph_listeners),
+        "mapping_registry": len(get_mapping_registry()),
+    }
+
+
+async def soak(
+    peripherals=500,
+    cycles=5000,
+    full_every=10,
+    topology_every=100,
+    reload_every=1000,
+    sample_every=100,
+    seed=1,
+):
+    """Run the soak loop; return the list of samples (cycle, KiB, objects, sizes)."""
+    simulator = EedomusSimulator(peripherals=peripherals, change_rate=0.01, seed=seed)
+    client = OfflineClient(simulator)
+    rng = simulator.rng
+    coordinator = await _new_coordinator(client)
+    samples = []
+    tracemalloc.start()
+    try:
+        for cycle in range(1, cycles + 1):
+            if cycle % reload_every == 0:
+                await coordinator.async_shutdown()
+                coordinator = await _new_coordinator(client)
+
+            if cycle % topology_every == 0:
+                # A device is replaced: same size, new periph_ids
+                victim = rng.choice([p for p in simulator.peripherals.values() if not p.parent_periph_id])
+                simulator.remove_device(victim.periph_id)
+                simulator.add_device("switch", victim.room_name)
+
+            # History errors on random peripherals, as on a flaky cloud API
+            periph_id = rng.choice(list(simulator.peripherals))
+            coordinator._retry_queue.record_failure(periph_id, "timeout")
+            coordinator._history_progress.setdefault(periph_id, {"last_timestamp": 0, "completed": False})
+
+            if cycle % full_every == 0:
+                await coordinator._async_full_refresh()
+            else:
+                await coordinator._async_partial_refresh()
+
+            if cycle % sample_every == 0:
+                gc.collect()
+                current, _ = tracemalloc.get_traced_memory()
+                samples.append((cycle, current / 1024, len(gc.get_objects()), _structure_sizes(coordinator)))
+    finally:
+        tracemalloc.stop()
+    return samples
+
+
+def check_growth(samples, tolerance=0.1):
+    """Return (ok, growth_kib): compare the end of the run with the warm-up peak."""
+    if len(samples) < 4:
+        return True, 0.0
+    quarter = max(1, len(samples) // 4)
+    baseline = max(kib for _, kib, _, _ in samples[:quarter])
+    final = min(kib for _, kib, _, _ in samples[-quarter:])
+    growth = final - baseline
+    return growth <= max(baseline * tolerance, MIN_GROWTH_KIB), growth
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Soak test of the eedomus coordinator")
+    parser.add_argument("--peripherals", type=int, default=500)
+    parser.add_argument("--cycles", type=int, default=5000)
+    parser.add_argument("--full-every", type=int, default=10, help="Full refresh every N cycles")
+    parser.add_argument("--topology-every", type=int, default=100, help="Replace a device every N cycles")
+    parser.add_argument("--reload-every", type=int, default=1000, help="Reload every N cycles")
+    parser.add_argument("--sample-every", type=int, default=100)
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="Accepted growth after warm-up, as a fraction of the warm-up memory")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    samples = asyncio.run(soak(
+        args.peripherals, args.cycles, args.full_every, args.topology_every,
+        args.reload_every, args.sample_every,
+    ))
+    for cycle, kib, objects, sizes in samples:
+        print(f"  cycle {cycle:>6}  {kib:>10.0f} KiB  {objects:>8} objects  {sizes}")
+    ok, growth = check_growth(samples, args.tolerance)
+    print(f"{'✅' if ok else '❌'} memory growth after warm-up: {growth:.0f} KiB")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
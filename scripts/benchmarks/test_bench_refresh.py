@@ -0,0 +1,36 @@
+"""pytest-benchmark entry points for the refresh benchmarks.
+
+Sizes default to 100 peripherals to keep the run short; set
+EEDOMUS_BENCH_SIZES=100,1000,10000 for the full matrix.
+"""
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from bench_refresh import STAGES, _prepared, _run_stage  # noqa: E402
+
+SIZES = [int(s) for s in os.environ.get("EEDOMUS_BENCH_SIZES", "100").split(",") if s]
+
+
+@pytest.mark.parametrize("size", SIZES)
+@pytest.mark.parametrize("stage", STAGES)
+def test_refresh_stage(benchmark, stage, size):
+    """Time one stage on a freshly prepared coordinator per round."""
+    loop = asyncio.new_event_loop()
+    try:
+        def setup():
+            return (loop.run_until_complete(_prepared(stage, size)),), {}
+
+        def target(coordinator):
+            loop.run_until_complete(_run_stage(stage, coordinator))
+            return coordinator
+
+        coordinator = benchmark.pedantic(target, setup=setup, rounds=3)
+    finally:
+        loop.close()
+    assert len(coordinator.data) >= size
@@ -0,0 +1,29 @@
+"""Short soak run: memory must stay bounded over refresh cycles and reloads.
+
+Set EEDOMUS_SOAK_CYCLES to run longer (e.g. 20000).
+"""
+
+import asyncio
+import logging
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from soak_refresh import check_growth, soak  # noqa: E402
+
+CYCLES = int(os.environ.get("EEDOMUS_SOAK_CYCLES", "800"))
+
+
+def test_memory_stays_bounded():
+    logging.getLogger("custom_components.eedomus").setLevel(logging.ERROR)
+    samples = asyncio.run(soak(
+        peripherals=150, cycles=CYCLES, topology_every=50, reload_every=CYCLES // 2,
+        sample_every=max(1, CYCLES // 16),
+    ))
+    ok, growth = check_growth(samples)
+    assert ok, f"memory grew by {growth:.0f} KiB after warm-up"
+    # Per-peripheral structures never exceed the installation size
+    sizes = samples[-1][3]
+    assert sizes["retry_queue"] <= sizes["data"]
+    assert sizes["history_progress"] <= sizes["data"]
@@ -0,0 +1,474 @@
+#!/usr/bin/env python3
+
+"""
+Local eedomus box simulator for offline testing and load generation.
+
+The simulator implements the parts of the eedomus API used by the integration:
+
+- ``/api/get``: ``periph.list``, ``periph.value_list``, ``periph.caract``,
+  ``periph.value`` and ``auth.test``
+- ``/api/set``: ``periph.value``
+- ``/get?action=periph.history`` (history, normally served by api.eedomus.com)
+- ``/script/?exec=<name>`` (PHP fallback script)
+
+Peripherals are synthetic (RGBW lamps with their channels, switches, shutters,
+heaters, temperature/motion/smoke sensors, power and energy meters). Values
+change at a configurable rate, and latency and errors can be injected.
+
+Usage:
+    python3 eedomus_simulator.py [--peripherals N] [--change-rate R] [--latency S]
+                                 [--error-rate P] [--host HOST] [--port PORT]
+
+Examples:
+    # A box with 5000 peripherals, 2% of them changing every second
+    python3 eedomus_simulator.py --peripherals 5000 --change-rate 0.02
+
+    # A slow and flaky box
+    python3 eedomus_simulator.py --latency 0.5 --latency-jitter 0.5 --error-rate 0.1
+
+Then configure the integration with api_host ``<host>:<port>`` and the
+credentials given with --api-user/--api-secret. In tests, point
+``EedomusClient.base_url_history`` to ``simulator.history_url``.
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime
+
+from aiohttp import web
+
+DEFAULT_API_USER = "simulator"
+DEFAULT_API_SECRET = "secret"
+# Maximum number of points returned by a single history request
+HISTORY_MAX_POINTS = 10000
+
+# Accepted (value, description) pairs of the list peripherals
+SWITCH_VALUES = [("0", "Off"), ("100", "On")]
+SHUTTER_VALUES = [("0", "Fermé"), ("50", "Mi-hauteur"), ("100", "Ouvert")]
+HEATER_VALUES = [("0", "Off"), ("1", "Hors gel"), ("2", "Eco"), ("3", "Confort")]
+DETECTOR_VALUES = [("0", "Rien"), ("100", "Détection")]
+DIMMER_VALUES = [("0", "Off"), ("100", "On")]
+ROOMS = ["Salon", "Cuisine", "Chambre", "Bureau", "Garage", "Jardin"]
+
+
+def _device_templates():
+    """Return the synthetic device kinds with their relative weight."""
+    return [
+        # kind, weight
+        ("rgbw", 1),
+        ("switch", 3),
+        ("shutter", 2),
+        ("heater", 1),
+        ("temperature", 3),
+        ("motion", 2),
+        ("smoke", 1),
+        ("meter", 2),
+    ]
+
+
+class SimulatedPeripheral:
+    """A synthetic eedomus peripheral."""
+
+    def __init__(self, periph_id, name, usage_id, usage_name, value_type, value,
+                 values=None, parent_periph_id=None, room_name="Salon", value_range=None):
+        self.periph_id = str(periph_id)
+        self.name = name
+        self.usage_id = str(usage_id)
+        self.usage_name = usage_name
+        self.value_type = value_type
+        self.value = str(value)
+        self.values = values
+        self.parent_periph_id = str(parent_periph_id) if parent_periph_id else ""
+        self.room_name = room_name
+        self.value_range = value_range
+        self.last_value_change = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    def list_entry(self):
+        """Entry of the periph.list response."""
+        return {
+            "periph_id": self.periph_id,
+            "parent_periph_id": self.parent_periph_id,
+            "name": self.name,
+            "value_type": self.value_type,
+            "room_id": str(ROOMS.index(self.room_name) + 1) if self.room_name in ROOMS else "0",
+            "room_name": self.room_name,
+            "usage_id": self.usage_id,
+            "usage_name": self.usage_name,
+            "creation_date": "2020-01-01 00:00:00",
+        }
+
+    def caract_entry(self, show_config=False):
+        """Entry of the periph.caract response."""
+        entry = {
+            "periph_id": self.periph_id,
+            "last_value": self.value,
+            "last_value_text": self._value_text(),
+            "last_value_change": self.last_value_change,
+        }
+        if show_config:
+            entry["name"] = self.name
+            entry["usage_id"] = self.usage_id
+            entry["value_type"] = self.value_type
+        return entry
+
+    def _value_text(self):
+        for value, description in self.values or []:
+            if value == self.value:
+                return description
+        return ""
+
+    def accepts(self, value):
+        """Return True if the value can be set on this peripheral."""
+        if self.values is None:
+            return True
+        return str(value) in {v for v, _ in self.values}
+
+    def set_value(self, value, when=None):
+        self.value = str(value)
+        self.last_value_change = (when or datetime.now()).strftime("%Y-%m-%d %H:%M:%S")
+
+    def random_value(self, rng):
+        """Pick a new plausible value."""
+        if self.values is not None:
+            return rng.choice(self.values)[0]
+        low, high = self.value_range or (0, 100)
+        current = float(self.value)
+        step = (high - low) * 0.02
+        return f"{min(high, max(low, current + rng.uniform(-step, step))):.1f}"
+
+
+class EedomusSimulator:
+    """In-process aiohttp server emulating an eedomus box."""
+
+    def __init__(
+        self,
+        peripherals=100,
+        change_rate=0.01,
+        latency=0.0,
+        latency_jitter=0.0,
+        error_rate=0.0,
+        history_interval=600,
+        api_user=DEFAULT_API_USER,
+        api_secret=DEFAULT_API_SECRET,
+        seed=None,
+    ):
+        """
+        Args:
+            peripherals: approximate number of synthetic peripherals.
+            change_rate: fraction of the peripherals changing value per second.
+            latency: delay added to every response, in seconds.
+            latency_jitter: random extra delay (0..latency_jitter) per response.
+            error_rate: probability for a request to fail (HTTP 500 or eedomus error).
+            history_interval: seconds between two synthetic history points.
+        """
+        self.change_rate = change_rate
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.history_interval = max(1, int(history_interval))
+        self.api_user = api_user
+        self.api_secret = api_secret
+        self.rng = random.Random(seed)
+        self.peripherals = {}
+        self.requests = {}
+        self._next_id = 1000
+        self._pending_changes = 0.0
+        self._last_tick = time.monotonic()
+        self._runner = None
+        self.host = None
+        self.port = None
+        self._build_topology(peripherals)
+
+    # ------------------------------------------------------------------ topology
+
+    def _add(self, periph):
+        self.peripherals[periph.periph_id] = periph
+        return periph
+
+    def _build_topology(self, count):
+        """Create about `count` peripherals spread over the device kinds."""
+        kinds = [kind for kind, weight in _device_templates() for _ in range(weight)]
+        index = 0
+        while len(self.peripherals) < count:
+            kind = kinds[index % len(kinds)]
+            room = ROOMS[index % len(ROOMS)]
+            index += 1
+            self._next_id = self._add_device(kind, self._next_id, f"{kind.capitalize()} {index}", room)
+
+    def add_device(self, kind="switch", room="Salon"):
+        """Add a device (with its children) to the running box; return the new ids."""
+        before = set(self.peripherals)
+        self._next_id = self._add_device(kind, self._next_id, f"{kind.capitalize()} {self._next_id}", room)
+        return sorted(set(self.peripherals) - before)
+
+    def remove_device(self, periph_id):
+        """Remove a peripheral and its children from the box; return the removed ids."""
+        removed = [periph_id] + [
+            p.periph_id for p in self.peripherals.values() if p.parent_periph_id == periph_id
+        ]
+        for removed_id in removed:
+            self.peripherals.pop(removed_id, None)
+        return removed
+
+    def _add_device(self, kind, next_id, name, room):
+        """Add one device (and its children); return the next free id."""
+        if kind == "rgbw":
+            parent = self._add(SimulatedPeripheral(
+                next_id, name, 1, "Lampe", "list", "0", DIMMER_VALUES, room_name=room))
+            for offset, channel in enumerate(("Rouge", "Vert", "Bleu", "Blanc"), start=1):
+                self._add(SimulatedPeripheral(
+                    next_id + offset, f"{name} {channel}", 1, "Lampe", "list", "0",
+                    DIMMER_VALUES, parent_periph_id=parent.periph_id, room_name=room))
+            return next_id + 5
+        if kind == "switch":
+            self._add(SimulatedPeripheral(next_id, name, 2, "Interrupteur", "list", "0",
+                                          SWITCH_VALUES, room_name=room))
+        elif kind == "shutter":
+            self._add(SimulatedPeripheral(next_id, name, 48, "Volet", "list", "100",
+                                          SHUTTER_VALUES, room_name=room))
+        elif kind == "heater":
+            self._add(SimulatedPeripheral(next_id, name, 38, "Chauffage fil pilote", "list",
+                                          "2", HEATER_VALUES, room_name=room))
+        elif kind == "temperature":
+            self._add(SimulatedPeripheral(next_id, name, 7, "Température", "float", "20.0",
+                                          room_name=room, value_range=(5, 35)))
+        elif kind == "motion":
+            self._add(SimulatedPeripheral(next_id, name, 37, "Détecteur de mouvement", "list",
+                                          "0", DETECTOR_VALUES, room_name=room))
+        elif kind == "smoke":
+            self._add(SimulatedPeripheral(next_id, name, 27, "Détecteur de fumée", "list",
+                                          "0", DETECTOR_VALUES, room_name=room))
+        elif kind == "meter":
+            switch = self._add(SimulatedPeripheral(next_id, name, 2, "Prise", "list", "100",
+                                                   SWITCH_VALUES, room_name=room))
+            self._add(SimulatedPeripheral(next_id + 1, f"{name} Puissance", 28, "Consomètre",
+                                          "float", "50.0", parent_periph_id=switch.periph_id,
+                                          room_name=room, value_range=(0, 3000)))
+            self._add(SimulatedPeripheral(next_id + 2, f"{name} Énergie", 29, "Compteur",
+                                          "float", "1000.0", parent_periph_id=switch.periph_id,
+                                          room_name=room, value_range=(0, 100000)))
+            return next_id + 3
+        return next_id + 1
+
+    # ---------------------------------------------------------------- simulation
+
+    def advance(self, seconds=None):
+        """Apply the value changes due since the last call (or over `seconds`)."""
+        now = time.monotonic()
+        if seconds is None:
+            seconds = now - self._last_tick
+        self._last_tick = now
+        self._pending_changes += self.change_rate * len(self.peripherals) * seconds
+        changes = int(self._pending_changes)
+        self._pending_changes -= changes
+        if not changes:
+            return []
+        changed = self.rng.sample(list(self.peripherals.values()), min(changes, len(self.peripherals)))
+        for periph in changed:
+            periph.set_value(periph.random_value(self.rng))
+        return [periph.periph_id for periph in changed]
+
+    def history(self, periph_id, start, end):
+        """Synthetic history: one point every history_interval seconds, oldest first."""
+        periph = self.peripherals[periph_id]
+        end = int(end or time.time())
+        # Without a start, the box returns the most recent points
+        start = int(start) if start else end - HISTORY_MAX_POINTS * self.history_interval
+        first = start - start % self.history_interval + self.history_interval
+        points = []
+        ts = first
+        while ts <= end and len(points) < HISTORY_MAX_POINTS:
+            points.append([self._history_value(periph, ts),
+                           datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S")])
+            ts += self.history_interval
+        return points
+
+    def _history_value(self, periph, ts):
+        # Deterministic per (peripheral, timestamp) so that repeated requests agree
+        rng = random.Random(f"{periph.periph_id}:{ts}")
+        return periph.random_value(rng) if periph.values is not None else \
+            f"{rng.uniform(*(periph.value_range or (0, 100))):.1f}"
+
+    # ---------------------------------------------------------------- HTTP layer
+
+    def make_app(self):
+        app = web.Application()
+        app.router.add_get("/api/get", self._handle_get)
+        app.router.add_get("/api/set", self._handle_set)
+        app.router.add_get("/get", self._handle_history)
+        app.router.add_get("/script/", self._handle_script)
+        return app
+
+    async def start(self, host="127.0.0.1", port=0):
+        """Start the server; port 0 picks a free port."""
+        self._runner = web.AppRunner(self.make_app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        self.host = host
+        self.port = site._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+    @property
+    def api_host(self):
+        """Value to use as the integration api_host."""
+        return f"{self.host}:{self.port}"
+
+    @property
+    def history_url(self):
+        return f"http://{self.api_host}/get"
+
+    @staticmethod
+    def _ok(body):
+        return web.json_response({"success": 1, "body": body})
+
+    @staticmethod
+    def _error(code, message):
+        return web.json_response({"success": 0, "body": {"error_code": str(code), "error_msg": message}})
+
+    async def _prepare(self, request, action):
+        """Count, delay, authenticate and maybe fail a request.
+
+        Returns an error response, or None if the request must be served.
+        """
+        self.requests[action] = self.requests.get(action, 0) + 1
+        delay = self.latency + (self.rng.uniform(0, self.latency_jitter) if self.latency_jitter else 0)
+        if delay:
+            await asyncio.sleep(delay)
+        if request.query.get("api_user") != self.api_user or request.query.get("api_secret") != self.api_secret:
+            return self._error(1, "Invalid API credentials")
+        if self.error_rate and self.rng.random() < self.error_rate:
+            if self.rng.random() < 0.5:
+                return web.Response(text="Internal Server Error", status=500)
+            return self._error(8, "Database error")
+        self.advance()
+        return None
+
+    def _selected(self, request):
+        """Peripherals designated by periph_id ("all" or a comma separated list)."""
+        periph_id = request.query.get("periph_id", "all")
+        if periph_id == "all":
+            return list(self.peripherals.values())
+        return [self.peripherals[p] for p in periph_id.split(",") if p in self.peripherals]
+
+    async def _handle_get(self, request):
+        # The client may send "action" both in the URL and in the parameters
+        action = request.query.getall("action", [""])[0]
+        if (error := await self._prepare(request, action)) is not None:
+            return error
+        if action == "auth.test":
+            return self._ok({"result": "OK"})
+        if action == "periph.list":
+            return self._ok([p.list_entry() for p in self.peripherals.values()])
+        if action == "periph.value_list":
+            return self._ok([
+                {"periph_id": p.periph_id,
+                 "values": [{"value": v, "description": d} for v, d in p.values]}
+                for p in self._selected(request) if p.values is not None
+            ])
+        if action == "periph.caract":
+            show_config = request.query.get("show_config") == "1"
+            return self._ok([p.caract_entry(show_config) for p in self._selected(request)])
+        if action == "periph.value":
+            periph = self.peripherals.get(request.query.get("periph_id", ""))
+            if periph is None:
+                return self._error(5, "Unknown peripheral")
+            return self._ok({"value": periph.value})
+        return self._error(2, "Invalid action")
+
+    async def _handle_set(self, request):
+        action = request.query.getall("action", [""])[0]
+        if (error := await self._prepare(request, f"set:{action}")) is not None:
+            return error
+        if action != "periph.value":
+            return self._error(2, "Invalid action")
+        periph = self.peripherals.get(request.query.get("periph_id", ""))
+        if periph is None:
+            return self._error(5, "Unknown peripheral")
+        value = request.query.get("value", "")
+        if not periph.accepts(value):
+            return self._error(6, "Unknown peripheral value")
+        periph.set_value(value)
+        return self._ok({"result": "[OK]"})
+
+    async def _handle_history(self, request):
+        if (error := await self._prepare(request, "periph.history")) is not None:
+            return error
+        periph_id = request.query.get("periph_id", "")
+        if periph_id not in self.peripherals:
+            return self._error(5, "Unknown peripheral")
+        history = self.history(periph_id, request.query.get("start"), request.query.get("end"))
+        return self._ok({"history": history})
+
+    async def _handle_script(self, request):
+        """PHP fallback: set the closest accepted value instead of the rejected one."""
+        self.requests["script"] = self.requests.get("script", 0) + 1
+        started = time.monotonic()
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        periph = self.peripherals.get(request.query.get("device_id", ""))
+        if periph is None:
+            return web.json_response({"success": 0, "error": "Unknown peripheral"})
+        value = request.query.get("value", "")
+        if not periph.accepts(value):
+            try:
+                wanted = float(value)
+                value = min(periph.values, key=lambda item: abs(float(item[0]) - wanted))[0]
+            except ValueError:
+                return web.json_response({"success": 0, "error": f"Cannot map value {value}"})
+        periph.set_value(value)
+        return web.json_response({
+            "success": 1,
+            "value": value,
+            "duration": round(time.monotonic() - started, 3),
+        })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local eedomus box simulator")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--peripherals", type=int, default=100, help="Number of synthetic peripherals")
+    parser.add_argument("--change-rate", type=float, default=0.01,
+                        help="Fraction of the peripherals changing per second")
+    parser.add_argument("--latency", type=float, default=0.0, help="Response delay in seconds")
+    parser.add_argument("--latency-jitter", type=float, default=0.0, help="Random extra delay in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probability of a failed request")
+    parser.add_argument("--history-interval", type=int, default=600,
+                        help="Seconds between two history points")
+    parser.add_argument("--api-user", default=DEFAULT_API_USER)
+    parser.add_argument("--api-secret", default=DEFAULT_API_SECRET)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    simulator = EedomusSimulator(
+        peripherals=args.peripherals,
+        change_rate=args.change_rate,
+        latency=args.latency,
+        latency_jitter=args.latency_jitter,
+        error_rate=args.error_rate,
+        history_interval=args.history_interval,
+        api_user=args.api_user,
+        api_secret=args.api_secret,
+        seed=args.seed,
+    )
+    print(f"🏠 Simulated eedomus box with {len(simulator.peripherals)} peripherals "
+          f"on http://{args.host}:{args.port}")
+    web.run_app(simulator.make_app(), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
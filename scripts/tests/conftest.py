@@ -0,0 +1,25 @@
+"""Shared fixtures for the eedomus tests."""
+
+from unittest.mock import MagicMock
+
+import pytest
+
+
+@pytest.fixture
+def coordinator_factory():
+    """Build coordinators around a mocked Home Assistant and client.
+
+    Call it with the client, the coordinator data and the hass object to use
+    instead of the mocks.
+    """
+    from custom_components.eedomus.coordinator import EedomusDataUpdateCoordinator
+
+    def _make(client=None, data=None, hass=None):
+        coordinator = EedomusDataUpdateCoordinator(
+            MagicMock() if hass is None else hass, MagicMock() if client is None else client, 30
+        )
+        if data is not None:
+            coordinator.data = data
+        return coordinator
+
+    return _make
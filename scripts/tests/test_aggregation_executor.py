@@ -0,0 +1,83 @@
+"""Tests for the aggregation and mapping run off the event loop."""
+
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "benchmarks")))
+
+from bench_refresh import make_coordinator
+from custom_components.eedomus import aggregation
+from custom_components.eedomus.mapping_registry import clear_mapping_registry, get_mapping_registry
+
+
+def _mapping_fields(data):
+    return {
+        periph_id: (device.get("ha_entity"), device.get("ha_subtype"))
+        for periph_id, device in data.items()
+    }
+
+
+@pytest.mark.asyncio
+async def test_first_refresh_maps_outside_the_event_loop(monkeypatch):
+    coordinator = make_coordinator(50)
+    threads = set()
+    map_device = aggregation.map_device_to_ha_entity
+
+    def recording_map(*args, **kwargs):
+        threads.add(threading.get_ident())
+        return map_device(*args, **kwargs)
+
+    monkeypatch.setattr(aggregation, "map_device_to_ha_entity", recording_map)
+    await coordinator.async_config_entry_first_refresh()
+
+    assert threads and threading.get_ident() not in threads
+    assert all("ha_entity" in device for device in coordinator.data.values())
+    assert coordinator._dynamic_peripherals
+
+
+@pytest.mark.asyncio
+async def test_sliced_mapping_matches_single_pass():
+    """Mapping in slices (process pool path) gives the same result as one pass."""
+    coordinator = make_coordinator(200)
+    await coordinator.async_config_entry_first_refresh()
+    expected = _mapping_fields(coordinator.data)
+
+    coordinator = make_coordinator(200)
+    coordinator._mapping_process_pool_threshold = 1
+    # Same interface as the spawn process pool, without starting processes
+    coordinator._mapping_process_pool = ThreadPoolExecutor(max_workers=3)
+    clear_mapping_registry()
+    await coordinator.async_config_entry_first_refresh()
+
+    assert _mapping_fields(coordinator.data) == expected
+    assert get_mapping_registry()
+    await coordinator.async_shutdown()
+    assert coordinator._mapping_process_pool is None
+
+
+@pytest.mark.asyncio
+async def test_broken_process_pool_falls_back_to_thread():
+    coordinator = make_coordinator(30)
+    coordinator._mapping_process_pool_threshold = 1
+    pool = ThreadPoolExecutor(max_workers=1)
+    pool.shutdown()  # submitting now raises, like a broken process pool
+    coordinator._mapping_process_pool = pool
+
+    await coordinator.async_config_entry_first_refresh()
+
+    assert all("ha_entity" in device for device in coordinator.data.values())
+    assert coordinator._mapping_process_pool is None
+    assert coordinator._mapping_process_pool_threshold == 0
+
+
+def test_index_caract_flattens_nested_lists():
+    index, nested = aggregation.index_caract(
+        [{"periph_id": 1, "last_value": "1"}, [{"periph_id": "2"}, "junk"], "junk"]
+    )
+    assert set(index) == {"1", "2"}
+    assert nested == 1
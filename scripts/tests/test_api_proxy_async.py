@@ -0,0 +1,86 @@
+"""Tests for the API proxy async dispatch mode and allowlist."""
+
+import asyncio
+import json
+import os
+import sys
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from custom_components.eedomus.api_proxy import EedomusApiProxyView, compile_allowlist
+
+
+def _request(body, hass):
+    request = MagicMock()
+    request.remote = "192.168.1.2"
+    request.json = AsyncMock(return_value=body)
+    request.app = {"hass": hass}
+    return request
+
+
+def _hass():
+    hass = MagicMock()
+    loop = asyncio.get_running_loop()
+    hass.async_create_background_task = lambda coro, name: loop.create_task(coro)
+    return hass
+
+
+def test_compile_allowlist():
+    """Wildcards, exact services and "*" are compiled once."""
+    assert compile_allowlist("*")[0] is True
+    allow_all, domains, services = compile_allowlist("light.*, cover.close_cover,")
+    assert not allow_all
+    assert domains == {"light"}
+    assert services == {"cover.close_cover"}
+
+
+@pytest.mark.asyncio
+async def test_allowlist_rejects_other_services():
+    """Services outside the allowlist get a 403 without being called."""
+    hass = _hass()
+    hass.services.async_call = AsyncMock()
+    view = EedomusApiProxyView(
+        "entry", allowed_ips=["192.168.1.2"], allowlist="light.*, cover.close_cover"
+    )
+
+    response = await view.post(_request({}, hass), "services/lock/unlock")
+    assert response.status == 403
+    hass.services.async_call.assert_not_called()
+
+    response = await view.post(_request({}, hass), "services/cover/close_cover")
+    assert response.status == 200
+    assert view.metrics["rejected"] == 1
+
+
+@pytest.mark.asyncio
+async def test_async_mode_answers_202_before_service_completes():
+    """The box gets 202 right away, the slow service runs in a worker."""
+    hass = _hass()
+    release = asyncio.Event()
+    calls = []
+
+    async def slow_call(domain, service, data, blocking=False):
+        await release.wait()
+        calls.append((domain, service))
+
+    hass.services.async_call = slow_call
+    view = EedomusApiProxyView("entry", allowed_ips=["192.168.1.2"], async_mode=True)
+
+    response = await view.post(_request({"entity_id": "cover.salon"}, hass), "services/cover/close_cover")
+    assert response.status == 202
+    assert view.metrics["queue_depth_max"] == 1
+    assert calls == []
+
+    release.set()
+    await view._queue.join()
+    assert calls == [("cover", "close_cover")]
+    assert view.metrics["processed"] == 1
+    assert view.metrics["avg_latency"] > 0
+
+    metrics = await view.get(_request(None, hass), "metrics")
+    assert json.loads(metrics.body)["queue_depth"] == 0
+    for worker in view._workers:
+        worker.cancel()
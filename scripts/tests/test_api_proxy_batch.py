@@ -0,0 +1,69 @@
+"""Tests for the API proxy batch endpoint."""
+
+import asyncio
+import json
+import os
+import sys
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from custom_components.eedomus.api_proxy import EedomusApiProxyView
+
+
+def _request(body, hass):
+    request = MagicMock()
+    request.remote = "192.168.1.2"
+    request.json = AsyncMock(return_value=body)
+    request.app = {"hass": hass}
+    return request
+
+
+@pytest.mark.asyncio
+async def test_batch_runs_calls_with_bounded_concurrency():
+    """Calls run concurrently, never more than max_concurrency at once."""
+    running = 0
+    max_running = 0
+
+    async def async_call(domain, service, data, blocking=False):
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        # Without blocking=True, Home Assistant does not report the service errors
+        if service == "boom" and blocking:
+            raise ValueError("service failed")
+
+    hass = MagicMock()
+    hass.services.async_call = async_call
+    view = EedomusApiProxyView("entry", allowed_ips=["192.168.1.2"], max_concurrency=2)
+    calls = [
+        {"domain": "light", "service": "turn_on", "data": {"entity_id": f"light.l{i}"}}
+        for i in range(5)
+    ]
+    calls.append({"domain": "light", "service": "boom"})
+    calls.append({"service": "turn_on"})
+
+    response = await view.post(_request(calls, hass), "batch")
+
+    assert response.status == 200
+    results = json.loads(response.body)["results"]
+    assert [r["index"] for r in results] == list(range(7))
+    assert all(r["success"] for r in results[:5])
+    assert results[5] == {
+        "index": 5, "domain": "light", "service": "boom", "success": False, "error": "service failed",
+    }
+    assert results[6]["success"] is False
+    assert max_running == 2
+
+
+@pytest.mark.asyncio
+async def test_batch_requires_an_array():
+    """A non-array body is rejected."""
+    view = EedomusApiProxyView("entry", allowed_ips=["192.168.1.2"])
+    response = await view.post(_request({"domain": "light"}, MagicMock()), "batch")
+    assert response.status == 400
+
@@ -0,0 +1,125 @@
+"""Tests for recording eedomus API responses and replaying them offline."""
+
+import asyncio
+import json
+import os
+import sys
+import time
+from unittest.mock import MagicMock
+
+import aiohttp
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from custom_components.eedomus.api_recording import ReplaySession, load_recording
+from custom_components.eedomus.eedomus_client import EedomusClient
+from eedomus_simulator import EedomusSimulator
+
+
+def _client(session, api_host, api_user="user", api_secret="topsecret"):
+    entry = MagicMock()
+    entry.data = {"api_user": api_user, "api_secret": api_secret, "api_host": api_host}
+    entry.options = {}
+    return EedomusClient(session, entry)
+
+
+async def _record(tmp_path):
+    path = str(tmp_path / "recording.json")
+    async with EedomusSimulator(peripherals=30, change_rate=0, api_secret="topsecret",
+                                api_user="user", seed=1) as simulator:
+        async with aiohttp.ClientSession() as session:
+            client = _client(session, simulator.api_host)
+            client.base_url_history = simulator.history_url
+            client.start_recording(path)
+            await client.get_periph_list()
+            await client.get_periph_value_list("all")
+            await client.get_periph_caract("all", True)
+            await client.get_device_history(next(iter(simulator.peripherals)), 0)
+            client.stop_recording().save()
+    return path, simulator
+
+
+@pytest.mark.asyncio
+async def test_recording_redacts_credentials(tmp_path):
+    """The fixture holds the responses but never the credentials."""
+    path, _ = await _record(tmp_path)
+
+    with open(path, encoding="utf-8") as f:
+        raw = f.read()
+    assert "topsecret" not in raw
+    recording = load_recording(path)
+    assert [e["endpoint"] for e in recording["entries"]] == [
+        "periph.list", "periph.value_list", "periph.caract", "periph.history",
+    ]
+    assert recording["entries"][0]["params"]["api_secret"] == "***redacted***"
+    assert recording["entries"][0]["path"] == "/api/get"
+
+
+
+class _SlowSession:
+    """Answers each periph_id after `delays[periph_id]` seconds."""
+
+    def __init__(self, delays):
+        self.delays = delays
+
+    def get(self, url, params=None):
+        session = self
+
+        class _Response:
+            status = 200
+
+            async def read(self):
+                await asyncio.sleep(session.delays[params["periph_id"]])
+                return b'{"success": 1, "body": {}}'
+
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *exc):
+                return False
+
+        return _Response()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_record_their_own_params(tmp_path):
+    """A slow request records its own parameters, not those of a later one."""
+    client = _client(_SlowSession({"1": 0.05, "2": 0}), "box")
+    recorder = client.start_recording(str(tmp_path / "recording.json"))
+
+    await asyncio.gather(client.get_periph_caract("1"), client.get_periph_caract("2"))
+
+    assert [e["params"]["periph_id"] for e in recorder.entries] == ["2", "1"]
+
+@pytest.mark.asyncio
+async def test_replay_feeds_the_coordinator(tmp_path, coordinator_factory):
+    """A replayed recording gives the coordinator the recorded installation."""
+    path, simulator = await _record(tmp_path)
+    client = _client(ReplaySession.from_file(path, speed=0), "replay-host", "other", "other")
+    coordinator = coordinator_factory(client)
+
+    peripherals, value_list, caract = await coordinator._async_full_data_retreive()
+
+    assert {p["periph_id"] for p in peripherals} == set(simulator.peripherals)
+    assert len(caract) == len(simulator.peripherals)
+    assert value_list
+    # Requests beyond the recording reuse the last matching response
+    again = await client.get_periph_caract("all", True)
+    assert len(again["body"]) == len(caract)
+
+
+@pytest.mark.asyncio
+async def test_replay_keeps_original_latency():
+    """Recorded latencies are reproduced, scaled by speed."""
+    entry = {"endpoint": "auth.test", "path": "/api/get", "params": {}, "status": 200,
+             "offset": 0, "elapsed": 0.2, "body": json.dumps({"success": 1, "body": {}})}
+    recording = {"version": 1, "entries": [entry]}
+
+    for speed, expected in ((1.0, 0.2), (4.0, 0.05)):
+        client = _client(ReplaySession(recording, speed=speed), "replay-host")
+        start = time.monotonic()
+        assert (await client.auth_test())["success"] == 1
+        elapsed = time.monotonic() - start
+        assert expected * 0.9 <= elapsed < expected + 0.1
@@ -0,0 +1,174 @@
+"""Tests for the circuit breaker around the box and the stale data serving."""
+
+import asyncio
+import os
+import sys
+from unittest.mock import MagicMock
+
+import aiohttp
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "benchmarks")))
+
+from bench_refresh import make_coordinator
+from custom_components.eedomus.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from custom_components.eedomus.cover import EedomusAggregatedCover
+from custom_components.eedomus.eedomus_client import EedomusClient
+from custom_components.eedomus.sensor import EedomusAggregatedSensor, EedomusHistoryProgressSensor
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_opens_after_consecutive_failures_and_backs_off():
+    clock = _Clock()
+    breaker = CircuitBreaker(slow_call_threshold=5, failure_threshold=3, open_delay=10, max_open_delay=25, clock=clock)
+
+    breaker.record_failure("timeout")
+    breaker.record_success(0.1)  # Not consecutive
+    breaker.record_failure("timeout")
+    breaker.record_failure("timeout")
+    assert breaker.state == CLOSED
+    breaker.record_success(6)  # Slow answer
+    assert breaker.state == OPEN
+    assert not breaker.probe_due()
+
+    clock.now = 10
+    assert breaker.probe_due()
+    breaker.start_probe()
+    assert breaker.state == HALF_OPEN
+    breaker.record_failure("probe timeout")
+    clock.now = 29
+    assert not breaker.probe_due()  # Delay doubled
+    clock.now = 30
+    breaker.start_probe()
+    breaker.record_failure("probe timeout")
+    assert breaker.as_dict()["next_probe_in"] == 25  # Capped
+
+    clock.now = 55
+    breaker.start_probe()
+    breaker.record_success(0.1)
+    assert breaker.state == CLOSED
+    assert breaker.as_dict()["open_count"] == 1
+
+
+class _Response:
+    def __init__(self, status, body):
+        self.status = status
+        self._body = body
+
+    async def read(self):
+        return self._body
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class _Session:
+    """Box down until `up` is set; records the requested actions."""
+
+    def __init__(self):
+        self.up = False
+        self.actions = []
+
+    def get(self, url, params=None):
+        self.actions.append(url.split("action=", 1)[-1])
+        if not self.up:
+            raise aiohttp.ClientConnectionError("box rebooting")
+        return _Response(200, b'{"success": 1, "body": []}')
+
+
+@pytest.mark.asyncio
+async def test_client_fails_fast_and_probes_with_auth_test():
+    entry = MagicMock()
+    entry.data = {"api_user": "user", "api_secret": "secret", "api_host": "box"}
+    entry.options = {}
+    session = _Session()
+    client = EedomusClient(session, entry)
+    clock = _Clock()
+    client.circuit = CircuitBreaker(slow_call_threshold=8, open_delay=10, clock=clock)
+
+    for _ in range(3):
+        assert (await client.get_periph_list())["success"] == 0
+    assert client.circuit.state == OPEN
+
+    # Open: no request at all
+    result = await client.set_periph_value("1", "100")
+    assert result["circuit_open"] and len(session.actions) == 3
+
+    # Probe due: one auth.test, then the request goes through
+    clock.now = 10
+    session.up = True
+    assert (await client.get_periph_list())["success"] == 1
+    assert session.actions[3:] == ["auth.test", "periph.list"]
+    assert client.circuit.state == CLOSED
+
+
+
+class _FailingSession:
+    def __init__(self, error):
+        self.error = error
+
+    def get(self, url, params=None):
+        raise self.error
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("error", [asyncio.CancelledError(), ValueError("bad answer")])
+async def test_interrupted_probe_reopens_the_circuit(error):
+    entry = MagicMock()
+    entry.data = {"api_user": "user", "api_secret": "secret", "api_host": "box"}
+    entry.options = {}
+    client = EedomusClient(_FailingSession(error), entry)
+    clock = _Clock()
+    client.circuit = CircuitBreaker(slow_call_threshold=8, open_delay=10, clock=clock)
+    for _ in range(3):
+        client.circuit.record_failure("timeout")
+    clock.now = 10
+
+    if isinstance(error, asyncio.CancelledError):
+        with pytest.raises(asyncio.CancelledError):
+            await client.async_box_available()
+    else:
+        assert not await client.async_box_available()
+    assert client.circuit.state == OPEN
+    assert client.circuit.as_dict()["next_probe_in"] == 20  # Backed off
+
+@pytest.mark.asyncio
+async def test_stale_data_served_with_data_age_attributes():
+    coordinator = make_coordinator(40)
+    await coordinator.async_config_entry_first_refresh()
+    periph_id = next(iter(coordinator.data))
+    entities = [
+        EedomusAggregatedCover(coordinator, periph_id, []),
+        EedomusAggregatedSensor(coordinator, periph_id, []),
+        EedomusHistoryProgressSensor(coordinator, {"periph_id": periph_id, "name": "History"}),
+    ]
+    # Fresh data: no attribute changing on every poll
+    assert coordinator.data_age_attributes(periph_id) == {}
+    for entity in entities:
+        assert "stale" not in (entity.extra_state_attributes or {})
+
+    for _ in range(3):
+        coordinator.client.circuit.record_failure("timeout")
+    data = coordinator.data
+    assert await coordinator._async_refresh_data() is data
+    attributes = coordinator.data_age_attributes(periph_id)
+    assert attributes["stale"] is True and "data_updated_at" in attributes
+    for entity in entities:
+        assert entity.extra_state_attributes["stale"] is True
+
+    coordinator.client.circuit.record_success(0.1)
+    coordinator._full_refresh_needed = True
+    await coordinator._async_refresh_data()
+    assert coordinator.stale_since is None
+    assert coordinator.data_age_attributes(periph_id) == {}
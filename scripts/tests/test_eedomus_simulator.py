@@ -0,0 +1,105 @@
+"""Tests running EedomusClient against the local eedomus box simulator."""
+
+import os
+import sys
+import time
+from unittest.mock import MagicMock
+
+import aiohttp
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from custom_components.eedomus.eedomus_client import EedomusClient
+from eedomus_simulator import HISTORY_MAX_POINTS, EedomusSimulator
+
+
+def _client(session, simulator, **options):
+    entry = MagicMock()
+    entry.data = {
+        "api_user": simulator.api_user,
+        "api_secret": simulator.api_secret,
+        "api_host": simulator.api_host,
+        "php_fallback_enabled": True,
+        "php_fallback_script_name": "eedomus_fallback",
+    }
+    entry.options = options
+    client = EedomusClient(session, entry)
+    client.base_url_history = simulator.history_url
+    return client
+
+
+@pytest.mark.asyncio
+async def test_read_endpoints():
+    """periph.list, value_list and caract describe the same peripherals."""
+    async with EedomusSimulator(peripherals=50, change_rate=0, seed=1) as simulator:
+        async with aiohttp.ClientSession() as session:
+            client = _client(session, simulator)
+
+            assert (await client.auth_test())["success"] == 1
+            periphs = (await client.get_periph_list())["body"]
+            caract = (await client.get_periph_caract("all", True))["body"]
+            value_list = (await client.get_periph_value_list("all"))["body"]
+
+    assert len(periphs) == len(simulator.peripherals) >= 50
+    assert {p["periph_id"] for p in caract} == set(simulator.peripherals)
+    assert all(item["values"] for item in value_list)
+    # RGBW lamps come with their four channels
+    parents = [p for p in periphs if p["parent_periph_id"]]
+    assert parents
+
+
+@pytest.mark.asyncio
+async def test_set_value_and_php_fallback():
+    """Rejected values fail on the API and are mapped by the fallback script."""
+    async with EedomusSimulator(peripherals=20, change_rate=0, seed=1) as simulator:
+        shutter = next(p for p in simulator.peripherals.values() if p.usage_id == "48")
+        async with aiohttp.ClientSession() as session:
+            client = _client(session, simulator)
+
+            assert (await client.set_periph_value(shutter.periph_id, "0"))["success"] == 1
+            rejected = await client.set_periph_value(shutter.periph_id, "42")
+            assert rejected["success"] == 0
+            assert rejected["error_code"] == "6"
+
+            fallback = await client.php_fallback_set_value(shutter.periph_id, "42")
+            assert fallback["success"] == 1
+            assert shutter.value == "50"
+
+
+@pytest.mark.asyncio
+async def test_history_is_truncated_to_max_points():
+    """History requests return at most HISTORY_MAX_POINTS points, oldest first."""
+    async with EedomusSimulator(peripherals=5, history_interval=60, seed=1) as simulator:
+        periph_id = next(iter(simulator.peripherals))
+        now = int(time.time())
+        async with aiohttp.ClientSession() as session:
+            client = _client(session, simulator)
+            day = await client.get_device_history(periph_id, now - 86400, now)
+            year = await client.get_device_history(periph_id, now - 365 * 86400, now)
+
+    assert len(day) == 24 * 60
+    assert len(year) == HISTORY_MAX_POINTS
+    assert year[0]["timestamp"] < year[-1]["timestamp"]
+
+
+@pytest.mark.asyncio
+async def test_error_injection_and_credentials():
+    """Injected errors and bad credentials come back as failed responses."""
+    async with EedomusSimulator(peripherals=5, error_rate=1.0, seed=1) as simulator:
+        async with aiohttp.ClientSession() as session:
+            assert (await _client(session, simulator).get_periph_list())["success"] == 0
+            simulator.error_rate = 0
+            client = _client(session, simulator)
+            simulator.api_secret = "other"
+            result = await client.auth_test()
+            assert result["success"] == 0
+            assert result["error_code"] == "1"
+
+
+def test_change_rate():
+    """advance() changes change_rate * peripherals values per second."""
+    simulator = EedomusSimulator(peripherals=1000, change_rate=0.01, seed=1)
+    assert len(simulator.advance(seconds=1)) == int(0.01 * len(simulator.peripherals))
+    assert simulator.advance(seconds=0) == []
@@ -0,0 +1,61 @@
+"""Tests for change-driven history diagnostic sensors."""
+
+import os
+import sys
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from custom_components.eedomus.history_sensor import (
+    EedomusHistoryCompletedSensor,
+    EedomusHistoryDiagnosticSensor,
+    EedomusHistoryErrorsSensor,
+)
+
+
+@pytest.fixture
+def coordinator(coordinator_factory):
+    return coordinator_factory(data={"101": {"name": "Salon"}})
+
+
+def test_signal_only_sent_on_change(coordinator):
+    """Refreshes without counter changes don't signal the sensors."""
+    with patch("custom_components.eedomus.coordinator.async_dispatcher_send") as send:
+        coordinator._notify_history_diagnostics()
+        coordinator._notify_history_diagnostics()
+        assert send.call_count == 1
+
+        coordinator._retry_queue.record_failure("101", "timeout")
+        coordinator._notify_history_diagnostics()
+        coordinator._notify_history_diagnostics()
+        assert send.call_count == 2
+
+
+def test_sensor_writes_state_only_when_value_changes(coordinator):
+    """The sensor skips async_write_ha_state for identical snapshots."""
+    sensor = EedomusHistoryErrorsSensor(coordinator)
+    sensor.async_write_ha_state = MagicMock()
+    sensor._last_written = sensor._snapshot()
+
+    sensor._async_handle_change()
+    sensor.async_write_ha_state.assert_not_called()
+
+    coordinator._retry_queue.record_failure("101", "timeout")
+    sensor._async_handle_change()
+    sensor.async_write_ha_state.assert_called_once()
+    assert sensor.native_value == 1
+    assert sensor.extra_state_attributes["errors"]["101"]["periph_name"] == "Salon"
+
+
+def test_completed_sensor_reads_incremental_counter(coordinator):
+    """The completed sensor exposes the coordinator counter without scanning."""
+    coordinator._history_completed_count = 4
+    assert EedomusHistoryCompletedSensor(coordinator).native_value == 4
+
+
+def test_diagnostic_sensor_requires_a_snapshot(coordinator):
+    """Subclasses must define what they expose."""
+    with pytest.raises(TypeError):
+        EedomusHistoryDiagnosticSensor(coordinator)
@@ -0,0 +1,125 @@
+"""Tests for history gap detection and targeted range repair."""
+
+import os
+import sys
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from custom_components.eedomus.history_gaps import (
+    HistoryGapTracker,
+    estimate_sampling_interval,
+    find_history_gaps,
+    merge_windows,
+)
+
+
+def _entry(ts, value="20.5"):
+    return {"value": value, "timestamp": datetime.fromtimestamp(ts).isoformat(sep=" ")}
+
+
+def test_estimate_and_find_gaps():
+    """A two-hour hole in a 5 minute cadence is reported as one window."""
+    base = 1_700_000_000
+    timestamps = [base + i * 300 for i in range(12)]
+    timestamps += [timestamps[-1] + 7200 + i * 300 for i in range(12)]
+
+    interval = estimate_sampling_interval(timestamps)
+    assert interval == 300
+
+    gaps = find_history_gaps(timestamps, interval)
+    assert gaps == [(base + 11 * 300, base + 11 * 300 + 7200)]
+
+
+def test_merge_windows():
+    """Overlapping windows are merged, disjoint ones kept."""
+    assert merge_windows([(10, 20), (15, 30), (40, 50)]) == [(10, 30), (40, 50)]
+
+
+def test_tracker_detects_downtime_and_round_trips():
+    """Coverage older than the cadence produces a gap that survives storage."""
+    tracker = HistoryGapTracker()
+    base = 1_700_000_000
+    tracker.record_chunk("101", [_entry(base + i * 300) for i in range(10)])
+    assert tracker.gaps("101") == []
+
+    # Home Assistant was down for three hours
+    restart = base + 9 * 300 + 3 * 3600
+    tracker.record_live_update("101", restart)
+    assert tracker.gaps("101") == [(base + 9 * 300, restart)]
+
+    restored = HistoryGapTracker.from_dict(tracker.as_dict())
+    assert restored.gaps("101") == [(base + 9 * 300, restart)]
+    assert restored.covered_until("101") == restart
+
+
+def test_tracker_gives_up_after_repeated_failures():
+    """A window failing repeatedly is dropped instead of retried forever."""
+    tracker = HistoryGapTracker()
+    tracker.add_gap("101", 100, 5000)
+    assert tracker.record_failure("101", 100, 5000) is False
+    assert tracker.record_failure("101", 100, 5000) is False
+    assert tracker.record_failure("101", 100, 5000) is True
+    assert tracker.pending_count() == 0
+
+
+@pytest.mark.asyncio
+async def test_repair_requests_only_missing_window(coordinator_factory):
+    """Repair calls get_device_history with the gap bounds only."""
+    client = MagicMock()
+    client.get_device_history = AsyncMock(return_value=[_entry(1_700_001_000)])
+    coordinator = coordinator_factory(client, data={"101": {"periph_id": "101", "name": "Temp"}})
+    coordinator.async_import_history_chunk = AsyncMock()
+
+    coordinator._history_gaps.add_gap("101", 1_700_000_000, 1_700_007_200)
+    repaired = await coordinator.async_repair_history_gaps(limit=5)
+
+    assert repaired == 1
+    client.get_device_history.assert_awaited_once_with(
+        "101", start_timestamp=1_700_000_000, end_timestamp=1_700_007_200
+    )
+    coordinator.async_import_history_chunk.assert_awaited_once()
+    assert coordinator._history_gaps.pending_count() == 0
+
+
+@pytest.mark.asyncio
+async def test_repair_keeps_window_on_api_failure(coordinator_factory):
+    """A failed history request leaves the window pending for the next scan."""
+    client = MagicMock()
+    client.get_device_history = AsyncMock(return_value=None)
+    coordinator = coordinator_factory(client, data={})
+
+    coordinator._history_gaps.add_gap("101", 100, 5000)
+    assert await coordinator.async_repair_history_gaps(limit=1) == 0
+    assert coordinator._history_gaps.gaps("101") == [(100, 5000)]
+
+
+@pytest.mark.asyncio
+async def test_partial_refresh_during_backfill_queues_no_gap(coordinator_factory):
+    """Live updates interleaved with backfill chunks do not report the unfetched past as a gap."""
+    start = int(datetime.now().timestamp()) - 400 * 86400
+    client = MagicMock()
+    client.http_request_timeout = 10
+    client.last_history_response_size = None
+    client.get_device_history = AsyncMock(
+        side_effect=lambda periph_id, start_timestamp, end_timestamp: [
+            _entry(start_timestamp + i * 3600) for i in range(100)
+        ]
+    )
+    coordinator = coordinator_factory(client, data={})
+    coordinator._save_history_progress = AsyncMock()
+    coordinator._history_progress["101"] = {"last_timestamp": start, "completed": False}
+
+    for _ in range(2):
+        await coordinator.async_fetch_history_chunk("101")
+        coordinator._record_history_coverage(["101"])
+        assert coordinator._history_gaps.pending_count() == 0
+
+    # Once the backfill is complete, live updates extend the coverage again
+    coordinator._history_progress["101"]["completed"] = True
+    coordinator._history_gaps.mark_covered("101", int(datetime.now().timestamp()))
+    coordinator._record_history_coverage(["101"])
+    assert coordinator._history_gaps.pending_count() == 0
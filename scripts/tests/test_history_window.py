@@ -0,0 +1,101 @@
+"""Tests for adaptive history window sizing."""
+
+import os
+import sys
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from custom_components.eedomus.history_window import (
+    HISTORY_MAX_POINTS,
+    INITIAL_WINDOW_SECONDS,
+    MIN_WINDOW_SECONDS,
+    HistoryWindowSizer,
+)
+
+
+def _entries(start, count, step):
+    return [
+        {"value": "1", "timestamp": datetime.fromtimestamp(start + i * step).isoformat(sep=" ")}
+        for i in range(count)
+    ]
+
+
+def test_window_targets_density():
+    """A 60s cadence sensor gets a window holding about 80% of the row limit."""
+    sizer = HistoryWindowSizer(http_timeout=10)
+    window = sizer.record_success("101", 0, 86400, 1440, elapsed=0.1)
+    assert window == pytest.approx(HISTORY_MAX_POINTS * 0.8 * 60)
+
+
+def test_window_limited_by_response_time():
+    """Slow responses shrink the window so a request stays under the timeout."""
+    sizer = HistoryWindowSizer(http_timeout=10)
+    # 1440 points took 4s: 5s budget allows 1800 points
+    window = sizer.record_success("101", 0, 86400, 1440, elapsed=4.0)
+    assert window == pytest.approx(1800 * 60)
+
+
+def test_sparse_window_is_widened_and_timeout_split():
+    """Few points widen the window, a timeout halves it down to the minimum."""
+    sizer = HistoryWindowSizer(http_timeout=10)
+    assert sizer.record_success("101", 0, 86400, 3, elapsed=0.1) == 8 * 86400
+    assert sizer.record_success("102", 0, 86400, 0, elapsed=0.1) == 2 * 86400
+
+    assert sizer.record_timeout("101", 0, 8 * 3600) is True
+    assert sizer.window_seconds("101") == 4 * 3600
+    assert sizer.record_timeout("101", 0, MIN_WINDOW_SECONDS) is False
+
+
+def test_bootstrap_request_is_open_ended():
+    """The first request of a peripheral still asks from the beginning."""
+    sizer = HistoryWindowSizer(http_timeout=10)
+    assert sizer.next_window("101", 0, 1_700_000_000) == (0, None)
+    assert sizer.next_window("101", 1_600_000_000, 1_700_000_000) == (
+        1_600_000_000,
+        1_600_000_000 + INITIAL_WINDOW_SECONDS,
+    )
+
+
+def _coordinator(coordinator_factory, history):
+    client = MagicMock()
+    client.http_request_timeout = 10
+    client.last_history_response_size = None
+    client.get_device_history = AsyncMock(side_effect=history)
+    coordinator = coordinator_factory(client, data={})
+    coordinator._save_history_progress = AsyncMock()
+    return coordinator, client
+
+
+@pytest.mark.asyncio
+async def test_fetch_walks_history_by_windows(coordinator_factory):
+    """A full window moves the cursor to its end without completing history."""
+    start = int(datetime.now().timestamp()) - 400 * 86400
+    coordinator, client = _coordinator(coordinator_factory, [_entries(start, 100, 3600)])
+    coordinator._history_progress["101"] = {"last_timestamp": start, "completed": False}
+
+    chunk = await coordinator.async_fetch_history_chunk("101")
+
+    assert len(chunk) == 100
+    client.get_device_history.assert_awaited_once_with(
+        "101", start_timestamp=start, end_timestamp=start + INITIAL_WINDOW_SECONDS
+    )
+    progress = coordinator._history_progress["101"]
+    assert progress["last_timestamp"] == start + INITIAL_WINDOW_SECONDS
+    assert progress["completed"] is False
+
+
+@pytest.mark.asyncio
+async def test_fetch_timeout_splits_without_retry_delay(coordinator_factory):
+    """A timed-out window is retried smaller instead of entering the retry queue."""
+    start = int(datetime.now().timestamp()) - 400 * 86400
+    coordinator, client = _coordinator(coordinator_factory, [None])
+    client.last_history_error = {"success": 0, "error": "Request timed out", "http_status": 408}
+    coordinator._history_progress["101"] = {"last_timestamp": start, "completed": False}
+
+    assert await coordinator.async_fetch_history_chunk("101") == []
+    assert "101" not in coordinator._retry_queue
+    assert coordinator._history_windows.window_seconds("101") == INITIAL_WINDOW_SECONDS / 2
@@ -0,0 +1,72 @@
+"""Tests for the rolling latency histograms."""
+
+import os
+import sys
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from custom_components.eedomus.metrics import BUCKET_BOUNDS, LatencyHistogram
+from custom_components.eedomus.refresh_timing_sensor import EedomusTotalRefreshTimeSensor
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_percentiles_within_bucket_resolution():
+    """p50/p95/p99 land within one bucket (~19%) of the exact value."""
+    histogram = LatencyHistogram()
+    for i in range(1, 1001):
+        histogram.observe(i / 1000)  # 1 ms .. 1 s, uniform
+    snapshot = histogram.snapshot()
+    for pct, exact in ((50, 0.5), (95, 0.95), (99, 0.99)):
+        assert exact <= snapshot[f"p{pct}"] <= exact * 1.2
+    assert snapshot["count"] == 1000
+    assert snapshot["max"] == 1.0
+    # Memory does not depend on the number of samples
+    assert len(histogram._current) == len(BUCKET_BOUNDS) + 1
+
+
+def test_window_rotation_forgets_old_samples():
+    """Percentiles only describe the last one or two windows; lifetime totals stay."""
+    clock = _Clock()
+    histogram = LatencyHistogram(window_seconds=60, clock=clock)
+    for _ in range(100):
+        histogram.observe(5.0)
+    clock.now = 61
+    histogram.observe(0.01)
+    # Previous window still counted
+    assert histogram.percentile(99) >= 5.0
+    clock.now = 122
+    histogram.observe(0.01)
+    assert histogram.percentile(99) <= 0.012
+    clock.now = 1000
+    assert histogram.percentile(50) is None
+    assert histogram.count == 102
+    assert sum(histogram.lifetime_counts) == 102
+
+
+@pytest.mark.asyncio
+async def test_set_value_latency_recorded_and_exposed(coordinator_factory):
+    """A set_value call feeds the endpoint and the refresh type histograms."""
+    client = MagicMock()
+    client.set_periph_value = AsyncMock(return_value={"success": 1})
+    coordinator = coordinator_factory(client, data={"101": {"name": "Prise", "last_value": "0"}})
+    coordinator.config_entry = MagicMock()
+    coordinator.config_entry.data = {}
+
+    await coordinator.async_set_periph_value("101", "100")
+
+    assert coordinator._endpoint_latency.snapshot("set_periph_value")["count"] == 1
+    assert coordinator._refresh_latency.snapshot("set")["count"] == 1
+    attrs = EedomusTotalRefreshTimeSensor(coordinator).extra_state_attributes
+    assert attrs["set_samples"] == 1
+    assert attrs["set_p95"] is not None
+    assert attrs["full_p95"] is None
@@ -0,0 +1,94 @@
+"""Tests for the event loop lag monitor."""
+
+import asyncio
+import os
+import sys
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "benchmarks")))
+
+from bench_refresh import make_coordinator
+from custom_components.eedomus.const import COORDINATOR, DOMAIN
+from custom_components.eedomus.diagnostics import async_get_config_entry_diagnostics
+from custom_components.eedomus.loop_monitor import OUTSIDE_PHASE, LoopLagMonitor
+from custom_components.eedomus.prometheus import render_metrics
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_stall_attributed_to_innermost_phase():
+    clock = _Clock()
+    monitor = LoopLagMonitor(interval=0.05, threshold=0.02, clock=clock)
+    with monitor.phase("full_refresh"):
+        clock.now += 0.01
+        # Mapping measured by the caller, nested in the refresh
+        monitor.record("first_refresh.mapping", clock.now, clock.now + 0.3)
+        clock.now += 0.3
+    assert monitor.sample(100.05, clock.now) == "first_refresh.mapping"
+    # Small lateness is scheduling noise
+    assert monitor.sample(clock.now, clock.now + 0.01) is None
+
+    snapshot = monitor.snapshot()
+    assert snapshot["samples"] == 2
+    assert snapshot["phases"]["first_refresh.mapping"]["stalls"] == 1
+    assert snapshot["phases"]["first_refresh.mapping"]["max"] == pytest.approx(0.26)
+
+
+def test_stall_outside_phases():
+    clock = _Clock()
+    monitor = LoopLagMonitor(clock=clock)
+    with monitor.phase("partial_refresh"):
+        clock.now += 0.01
+    clock.now += 1.0
+    assert monitor.sample(100.05, clock.now) == OUTSIDE_PHASE
+
+
+@pytest.mark.asyncio
+async def test_blocking_code_detected_on_real_loop():
+    monitor = LoopLagMonitor(interval=0.01, threshold=0.05)
+    monitor.start()
+    await asyncio.sleep(0.03)
+    with monitor.phase("blocking"):
+        # Busy wait: HA patches time.sleep to refuse running in the loop
+        deadline = time.monotonic() + 0.2
+        while time.monotonic() < deadline:
+            pass
+    await asyncio.sleep(0.03)
+    await monitor.stop()
+
+    assert not monitor.running
+    stats = monitor.snapshot()["phases"]["blocking"]
+    assert stats["stalls"] == 1
+    assert stats["max"] >= 0.1
+
+
+@pytest.mark.asyncio
+async def test_coordinator_phases_reported():
+    """Enabled monitor sees the refresh phases; diagnostics and metrics expose it."""
+    coordinator = make_coordinator(20)
+    monitor = coordinator.enable_loop_lag_monitor()
+    await coordinator.async_config_entry_first_refresh()
+    names = {interval[0] for interval in monitor._intervals}
+    assert {"first_refresh.api_fetch", "first_refresh.mapping"} <= names
+
+    monitor.sample(time.monotonic() - 0.1, time.monotonic())
+    hass = MagicMock()
+    hass.data = {DOMAIN: {"entry1": {COORDINATOR: coordinator}}}
+    entry = MagicMock(entry_id="entry1", data={}, options={})
+    diagnostics = await async_get_config_entry_diagnostics(hass, entry)
+    assert diagnostics["loop_lag"]["running"] is True
+    assert diagnostics["loop_lag"]["phases"]
+    assert "eedomus_loop_stalls_total{" in render_metrics({"entry1": coordinator})
+
+    await coordinator.async_shutdown()
+    assert not monitor.running
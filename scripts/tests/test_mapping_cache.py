@@ -0,0 +1,92 @@
+"""Tests for the compiled YAML mappings and the I/O-free import."""
+
+import os
+import shutil
+import subprocess
+import sys
+import textwrap
+
+import pytest
+import yaml
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.insert(0, ROOT)
+
+from custom_components.eedomus import device_mapping
+from custom_components.eedomus.device_mapping import load_compiled_mappings
+
+MAPPING_DIR = os.path.join(ROOT, "custom_components", "eedomus", "config")
+
+
+@pytest.fixture
+def base_path(tmp_path, monkeypatch):
+    """Copy of the mapping files, with an empty in-memory cache."""
+    config = tmp_path / "config"
+    config.mkdir()
+    shutil.copy(os.path.join(MAPPING_DIR, "device_mapping.yaml"), config / "device_mapping.yaml")
+    monkeypatch.setattr(device_mapping, "_COMPILED_MAPPINGS", None)
+    return str(tmp_path)
+
+
+def test_compiled_mappings_reused_until_files_change(base_path, monkeypatch):
+    merged = load_compiled_mappings(base_path)
+    assert merged["usage_id_mappings"]
+
+    # Files unchanged: same compiled object, no parsing
+    monkeypatch.setattr(device_mapping, "_parse_mapping", lambda *args: pytest.fail("parsed"))
+    assert load_compiled_mappings(base_path) is merged
+
+    # A custom mapping changes the digest: parsed again
+    monkeypatch.undo()
+    with open(os.path.join(base_path, "config", "custom_mapping.yaml"), "w", encoding="utf-8") as f:
+        f.write(textwrap.dedent("""\
+            custom_usage_id_mappings:
+              '999':
+                ha_entity: sensor
+                ha_subtype: test
+                justification: test
+            """))
+    updated = load_compiled_mappings(base_path)
+    assert updated["usage_id_mappings"]["999"]["ha_subtype"] == "test"
+
+
+def test_c_loader_used_when_available():
+    if getattr(yaml, "__with_libyaml__", False):
+        assert device_mapping.YAML_LOADER is yaml.CSafeLoader
+    else:
+        assert device_mapping.YAML_LOADER is yaml.SafeLoader
+
+
+def test_import_does_no_file_io():
+    """Importing the integration and its platforms opens no integration file."""
+    script = textwrap.dedent(f"""\
+        import builtins, importlib, sys
+        sys.path.insert(0, {ROOT!r})
+        opened = []
+        real_open = builtins.open
+        def spy(file, *args, **kwargs):
+            opened.append(str(file))
+            return real_open(file, *args, **kwargs)
+        builtins.open = spy
+        for module in ("", ".light", ".sensor", ".switch", ".cover", ".climate", ".select", ".binary_sensor"):
+            importlib.import_module("custom_components.eedomus" + module)
+        print([path for path in opened if "eedomus" in path])
+        """)
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True)
+    assert result.stdout.strip().splitlines()[-1] == "[]"
+
+
+def test_proxy_only_mode_imports_no_entity_machinery():
+    """The integration module imports neither the coordinator nor the mapping."""
+    script = textwrap.dedent(f"""\
+        import importlib, sys
+        sys.path.insert(0, {ROOT!r})
+        importlib.import_module("custom_components.eedomus")
+        print(sorted(
+            name for name in sys.modules
+            if name.rsplit(".", 1)[-1] in ("coordinator", "entity", "device_mapping", "aggregation", "sensor")
+            and name.startswith("custom_components.eedomus")
+        ))
+        """)
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True)
+    assert result.stdout.strip().splitlines()[-1] == "[]"
@@ -0,0 +1,134 @@
+"""Tests for the mapping hot reload (no integration reload)."""
+
+import copy
+import os
+import sys
+from unittest.mock import MagicMock
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "benchmarks")))
+
+from bench_refresh import make_coordinator
+from custom_components.eedomus import (
+    _only_mapping_options_changed,
+    async_save_custom_mapping,
+    coordinator as coordinator_module,
+)
+from custom_components.eedomus.const import CONF_SCAN_INTERVAL, CONF_YAML_CONTENT
+from custom_components.eedomus.platform_entities import build_entities
+
+
+class _Entity:
+    def __init__(self, periph_id, platform):
+        self._periph_id = periph_id
+        self.unique_id = periph_id
+        self.platform = platform
+        self.hass = None
+        self.registry_entry = None
+        self.removed = False
+
+    async def async_remove(self, *, force_remove=False):
+        self.removed = True
+        self.hass = None
+
+
+async def _setup_platforms(coordinator, constructed=None):
+    """Fake platforms creating one entity per peripheral of their bucket.
+
+    The periph_ids of the constructed entities are appended to `constructed`.
+    """
+    added = []
+    constructed = [] if constructed is None else constructed
+
+    def add_entities(entities, update_before_add=False):
+        for entity in entities:
+            entity.hass = object()
+            added.append(entity)
+
+    for platform in ("sensor", "switch", "light", "binary_sensor", "select"):
+        def factory(coordinator, periph_id, periph, children, platform=platform):
+            constructed.append(periph_id)
+            return [_Entity(periph_id, platform)]
+
+        factories = {platform: factory}
+        coordinator._platform_entities.track(platform, factories, add_entities)(
+            build_entities(coordinator, factories)
+        )
+    return added
+
+
+def _standalone_sensor(coordinator):
+    parents = {device.get("parent_periph_id") for device in coordinator.data.values()}
+    return next(
+        periph_id for periph_id, device in coordinator.data.items()
+        if device.get("ha_entity") == "sensor"
+        and not device.get("parent_periph_id")
+        and periph_id not in parents
+    )
+
+
+@pytest.mark.asyncio
+async def test_only_changed_peripherals_are_rebuilt(monkeypatch):
+    coordinator = make_coordinator(40)
+    await coordinator.async_config_entry_first_refresh()
+    constructed = []
+    entities = await _setup_platforms(coordinator, constructed)
+    periph_id = _standalone_sensor(coordinator)
+
+    # Files unchanged: same compiled object, nothing to do
+    result = await coordinator.async_reload_mappings()
+    assert result == {"changed": 0, "added": 0, "removed": 0}
+
+    updated = copy.deepcopy(coordinator._yaml_config_cache)
+    updated.setdefault("specific_device_mappings", {})[periph_id] = {
+        "ha_entity": "switch", "ha_subtype": "relay", "justification": "hot reload test",
+    }
+    monkeypatch.setattr(coordinator_module, "load_compiled_mappings", lambda *args: updated)
+    before = len(entities)
+    del constructed[:]
+
+    result = await coordinator.async_reload_mappings()
+
+    assert result == {"changed": 1, "added": 1, "removed": 1}
+    assert coordinator.data[periph_id]["ha_entity"] == "switch"
+    assert coordinator.data[periph_id]["justification"] == "hot reload test"
+    assert [entity for entity in entities if entity.removed] == [
+        entity for entity in entities[:before] if entity._periph_id == periph_id
+    ]
+    assert [(entity._periph_id, entity.platform) for entity in entities[before:]] == [(periph_id, "switch")]
+    # Only the entity of the remapped peripheral was constructed again
+    assert constructed == [periph_id]
+    assert coordinator._platform_entities.entities_of(periph_id)[0][0] == "switch"
+    assert periph_id in coordinator._dynamic_peripherals
+
+
+
+@pytest.mark.asyncio
+async def test_custom_mapping_saved_in_config_dir_is_reloaded(tmp_path):
+    """The options save to the config dir (kept on upgrade) and the hot reload reads it."""
+    coordinator = make_coordinator(40)
+    coordinator.hass.config.path = lambda *parts: os.path.join(str(tmp_path), *parts)
+    await coordinator.async_config_entry_first_refresh()
+    await _setup_platforms(coordinator)
+    periph_id = _standalone_sensor(coordinator)
+    usage_id = coordinator.data[periph_id]["usage_id"]
+
+    assert await async_save_custom_mapping(coordinator.hass, str(tmp_path), {
+        "custom_usage_id_mappings": {
+            usage_id: {"ha_entity": "switch", "ha_subtype": "relay", "justification": "saved from options"},
+        },
+    })
+    assert os.path.exists(tmp_path / "custom_mapping.yaml")
+
+    result = await coordinator.async_reload_mappings()
+
+    assert result["changed"] >= 1
+    assert coordinator.data[periph_id]["ha_entity"] == "switch"
+
+def test_only_mapping_options_changed():
+    entry = MagicMock(data={CONF_SCAN_INTERVAL: 300}, options={CONF_YAML_CONTENT: "b", CONF_SCAN_INTERVAL: 300})
+    assert _only_mapping_options_changed(entry, {CONF_YAML_CONTENT: "a"})
+    entry.options = {CONF_YAML_CONTENT: "b", CONF_SCAN_INTERVAL: 60}
+    assert not _only_mapping_options_changed(entry, {CONF_YAML_CONTENT: "a"})
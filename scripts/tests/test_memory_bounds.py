@@ -0,0 +1,48 @@
+"""Tests for the structures that used to grow without bound."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from custom_components.eedomus.mapping_registry import (
+    clear_mapping_registry,
+    get_mapping_registry,
+    register_device_mapping,
+)
+from custom_components.eedomus.retry_scheduler import HistoryRetryScheduler
+
+
+def test_mapping_registry_keeps_one_entry_per_peripheral():
+    """Re-mapping a peripheral (refresh, reload) replaces its entry."""
+    clear_mapping_registry()
+    mapping = {"ha_entity": "switch", "ha_subtype": ""}
+    for _ in range(3):
+        register_device_mapping(mapping, "Prise", "101", {"parent_periph_id": None})
+    register_device_mapping({"ha_entity": "light", "ha_subtype": "dimmable"}, "Lampe", "102")
+    registry = get_mapping_registry()
+    assert len(registry) == 2
+    clear_mapping_registry()
+
+
+def test_retry_heap_is_compacted():
+    """Repeated failures of the same peripherals don't grow the heap forever."""
+    scheduler = HistoryRetryScheduler(900, 86400)
+    for i in range(5000):
+        scheduler.record_failure(str(i % 10), "timeout", now=float(i))
+    assert len(scheduler) == 10
+    assert len(scheduler._heap) <= 2 * 10 + 64
+    assert scheduler.next_due() is not None
+
+
+def test_removed_peripherals_are_forgotten(coordinator_factory):
+    """History state of peripherals gone from the box is dropped."""
+    coordinator = coordinator_factory()
+    for periph_id in ("101", "102"):
+        coordinator._history_progress[periph_id] = {"last_timestamp": 0, "completed": False}
+        coordinator._retry_queue.record_failure(periph_id, "timeout")
+
+    assert coordinator._forget_removed_peripherals({"101"}) == 1
+    assert set(coordinator._history_progress) == {"101"}
+    assert "102" not in coordinator._retry_queue
+    coordinator.hass.states.async_remove.assert_called_once_with("eedomus.history_progress_102")
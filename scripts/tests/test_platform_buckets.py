@@ -0,0 +1,134 @@
+"""Tests for the per-platform peripheral buckets built by the coordinator."""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "benchmarks")))
+
+from bench_refresh import make_coordinator
+from custom_components.eedomus import coordinator as coordinator_module
+from custom_components.eedomus.aggregation import (
+    BATTERY_BUCKET,
+    apply_platform_overrides,
+    build_platform_buckets,
+    children_by_parent,
+)
+
+
+def _device(periph_id, name, ha_entity, usage_id="0", parent="", **extra):
+    return {
+        "periph_id": periph_id,
+        "name": name,
+        "usage_id": usage_id,
+        "parent_periph_id": parent,
+        "ha_entity": ha_entity,
+        "ha_subtype": "",
+        **extra,
+    }
+
+
+def test_overrides_and_buckets():
+    data = {
+        "1": _device("1", "Lampe salon", "light"),
+        "2": _device("2", "Lampe salon rouge", "switch", usage_id="1", parent="1"),
+        "3": _device("3", "Lampe salon conso", "switch", usage_id="26", parent="1"),
+        "4": _device("4", "Volet", "cover"),
+        "5": _device("5", "Volet lames", "sensor", usage_id="48", parent="4"),
+        "6": _device("6", "Consommation cuisine", "switch"),
+        "7": _device("7", "Prise sapin", "switch", battery="80"),
+    }
+    children = children_by_parent(data)
+
+    assert apply_platform_overrides(data, children) == 4
+    assert (data["2"]["ha_entity"], data["2"]["ha_subtype"]) == ("light", "brightness")
+    assert (data["3"]["ha_entity"], data["3"]["ha_subtype"]) == ("sensor", "energy")
+    assert (data["5"]["ha_entity"], data["5"]["ha_subtype"]) == ("cover", "shutter")
+    assert data["6"]["ha_entity"] == "sensor"
+    assert data["7"]["ha_entity"] == "switch"
+
+    buckets = build_platform_buckets(data, children)
+    assert [item[0] for item in buckets["light"]] == ["1", "2"]
+    assert [child["periph_id"] for child in buckets["light"][0][2]] == ["2", "3"]
+    assert [item[0] for item in buckets["sensor"]] == ["3", "6"]
+    assert [item[0] for item in buckets[BATTERY_BUCKET]] == ["7"]
+
+
+@pytest.mark.asyncio
+async def test_buckets_built_once_per_topology_version(monkeypatch):
+    coordinator = make_coordinator(40)
+    await coordinator.async_config_entry_first_refresh()
+    builds = []
+    real_build = coordinator_module.build_platform_buckets
+    monkeypatch.setattr(
+        coordinator_module,
+        "build_platform_buckets",
+        lambda *args: builds.append(1) or real_build(*args),
+    )
+
+    counts = {
+        platform: len(coordinator.platform_peripherals(platform))
+        for platform in ("light", "sensor", "switch", "cover", "climate", "select", "binary_sensor", "scene")
+    }
+    assert len(builds) == 1
+    assert sum(counts.values()) == sum(
+        1 for device in coordinator.data.values() if device.get("ha_entity") in counts
+    )
+
+    coordinator.client.simulator.add_device("meter")
+    await coordinator._async_full_refresh()
+    coordinator.platform_peripherals("sensor")
+    assert len(builds) == 2
+
+
+class _ConfigEntries:
+    def __init__(self):
+        self.forwarded = []
+
+    async def async_forward_entry_setups(self, entry, platforms):
+        self.forwarded.append(("setup", list(platforms)))
+
+    async def async_late_forward_entry_setups(self, entry, platforms):
+        self.forwarded.append(("late", list(platforms)))
+
+
+@pytest.mark.asyncio
+async def test_only_platforms_with_devices_are_forwarded():
+    coordinator = make_coordinator(40)
+    simulator = coordinator.client.simulator
+    for periph in list(simulator.peripherals.values()):
+        if periph.usage_id == "48":
+            simulator.remove_device(periph.periph_id)
+    await coordinator.async_config_entry_first_refresh()
+    coordinator.hass.config_entries = _ConfigEntries()
+
+    platforms = await coordinator.async_forward_platforms()
+    assert "sensor" in platforms and "cover" not in platforms
+    assert coordinator.hass.config_entries.forwarded == [("setup", platforms)]
+
+    # Nothing new: no forward
+    await coordinator._async_full_refresh()
+    assert len(coordinator.hass.config_entries.forwarded) == 1
+
+    # First shutter on the box: the cover platform is set up
+    simulator.add_device("shutter")
+    await coordinator._async_full_refresh()
+    assert coordinator.hass.config_entries.forwarded[1] == ("late", ["cover"])
+    assert coordinator.loaded_platforms == platforms + ["cover"]
+
+
+@pytest.mark.asyncio
+async def test_sensor_entities_reuse_the_coordinator_mapping(monkeypatch):
+    coordinator = make_coordinator(40)
+    await coordinator.async_config_entry_first_refresh()
+    from custom_components.eedomus import entity as entity_module
+    from custom_components.eedomus.sensor import EedomusSensor
+
+    def _no_remap(*args, **kwargs):
+        raise AssertionError("sensor mapped again")
+
+    monkeypatch.setattr(entity_module, "map_device_to_ha_entity", _no_remap)
+    sensors = [EedomusSensor(coordinator, periph_id) for periph_id, _, _ in coordinator.platform_peripherals("sensor")]
+    assert sensors
@@ -0,0 +1,40 @@
+"""Tests for the on-demand refresh profiling."""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "benchmarks")))
+
+from bench_refresh import make_coordinator
+from custom_components.eedomus.profiling import async_profile_refresh
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("mode", ["full", "partial"])
+async def test_profile_refresh_writes_report(tmp_path, mode):
+    """The report holds the profile and the allocations; a summary is returned."""
+    coordinator = make_coordinator(50)
+    await coordinator.async_config_entry_first_refresh()
+    path = str(tmp_path / "profile.txt")
+
+    summary = await async_profile_refresh(coordinator.hass, coordinator, mode, path, top=10)
+
+    assert summary["refresh_type"] == mode
+    assert summary["path"] == path
+    assert summary["top_functions"]
+    assert summary["last_update_success"] is True
+    with open(path, encoding="utf-8") as f:
+        report = f.read()
+    assert "cumulative" in report
+    assert "_async_refresh_data" in report
+    assert "Top allocations" in report
+
+
+@pytest.mark.asyncio
+async def test_profile_refresh_rejects_unknown_mode(tmp_path):
+    coordinator = make_coordinator(5)
+    with pytest.raises(ValueError):
+        await async_profile_refresh(coordinator.hass, coordinator, "everything", str(tmp_path / "p.txt"))
@@ -0,0 +1,69 @@
+"""Tests for the Prometheus metrics export."""
+
+import json
+import os
+import sys
+from unittest.mock import MagicMock
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from custom_components.eedomus.api_recording import ReplaySession
+from custom_components.eedomus.eedomus_client import EedomusClient
+from custom_components.eedomus.prometheus import render_metrics
+
+
+def _entry(endpoint, body, status=200):
+    return {"endpoint": endpoint, "path": "/api/get", "params": {}, "status": status,
+            "offset": 0, "elapsed": 0, "body": json.dumps(body)}
+
+
+def _client(recording):
+    entry = MagicMock()
+    entry.data = {"api_user": "user", "api_secret": "secret", "api_host": "box"}
+    entry.options = {}
+    return EedomusClient(ReplaySession(recording, speed=0), entry)
+
+
+@pytest.mark.asyncio
+async def test_client_counts_calls_bytes_and_error_codes():
+    """Calls, bytes and eedomus error codes are counted per action."""
+    client = _client({"version": 1, "entries": [
+        _entry("auth.test", {"success": 1, "body": {}}),
+        _entry("periph.value", {"success": 0, "body": {"error_code": "6", "error_msg": "refused"}}),
+        _entry("periph.list", "unavailable", status=503),
+    ]})
+
+    await client.auth_test()
+    await client.set_periph_value("101", "12")
+    await client.get_periph_list()
+
+    assert client.call_counts == {"auth.test": 1, "periph.value": 1, "periph.list": 1}
+    assert client.bytes_received["auth.test"] == len(json.dumps({"success": 1, "body": {}}))
+    assert client.error_counts == {("periph.value", "6"): 1, ("periph.list", "http_503"): 1}
+
+
+def test_render_metrics_text_format(coordinator_factory):
+    """Counters and cumulative histograms follow the exposition format."""
+    client = MagicMock()
+    client.call_counts = {"periph.caract": 3}
+    client.bytes_received = {"periph.caract": 4096}
+    client.error_counts = {("periph.caract", "timeout"): 1}
+    coordinator = coordinator_factory(client, data={"101": {}})
+    for seconds in (0.05, 0.2, 3.0):
+        coordinator._endpoint_latency.observe("get_periph_caract", seconds)
+    coordinator._set_value_counts["php_fallback"] = 2
+
+    text = render_metrics({"entry1": coordinator})
+    lines = text.splitlines()
+
+    assert 'eedomus_api_calls_total{entry_id="entry1",action="periph.caract"} 3' in lines
+    assert 'eedomus_api_errors_total{entry_id="entry1",action="periph.caract",error="timeout"} 1' in lines
+    assert 'eedomus_set_value_php_fallback_total{entry_id="entry1"} 2' in lines
+    assert lines.count("# TYPE eedomus_endpoint_latency_seconds histogram") == 1
+    buckets = [line for line in lines if line.startswith("eedomus_endpoint_latency_seconds_bucket")]
+    counts = [int(line.rsplit(" ", 1)[1]) for line in buckets]
+    assert counts == sorted(counts)
+    assert buckets[-1].endswith('le="+Inf"} 3')
+    assert 'eedomus_endpoint_latency_seconds_count{entry_id="entry1",endpoint="get_periph_caract"} 3' in lines
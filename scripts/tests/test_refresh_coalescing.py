@@ -0,0 +1,81 @@
+"""Tests for coalesced, serialized webhook-triggered refreshes."""
+
+import asyncio
+import os
+import sys
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from custom_components.eedomus.const import COORDINATOR, DOMAIN
+from custom_components.eedomus.webhook import EedomusWebhookView
+
+
+def _coordinator(coordinator_factory):
+    hass = MagicMock()
+    hass.async_create_task = asyncio.get_running_loop().create_task
+    coordinator = coordinator_factory(hass=hass)
+    coordinator._full_refresh_needed = False
+    refreshes = []
+
+    async def fake_refresh():
+        refreshes.append(coordinator._full_refresh_needed)
+        coordinator._full_refresh_needed = False
+        await asyncio.sleep(0.01)
+
+    coordinator.async_refresh = fake_refresh
+    return coordinator, refreshes
+
+
+@pytest.mark.asyncio
+async def test_burst_is_merged_into_few_refreshes(coordinator_factory):
+    """Ten webhooks during a refresh lead to one follow-up refresh."""
+    coordinator, refreshes = _coordinator(coordinator_factory)
+
+    coordinator.async_request_webhook_refresh(full=False)
+    await asyncio.sleep(0)  # first refresh is now running
+    for _ in range(10):
+        coordinator.async_request_webhook_refresh(full=True)
+    await coordinator._refresh_drain_task
+
+    # One partial refresh, then a single full refresh for the whole burst
+    assert refreshes == [False, True]
+
+
+@pytest.mark.asyncio
+async def test_update_data_never_runs_concurrently(coordinator_factory):
+    """Concurrent triggers are serialized by the refresh lock."""
+    coordinator, _ = _coordinator(coordinator_factory)
+    running = 0
+    max_running = 0
+
+    async def fake_refresh_data():
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return {}
+
+    coordinator._async_refresh_data = fake_refresh_data
+    await asyncio.gather(*(coordinator._async_update_data() for _ in range(5)))
+    assert max_running == 1
+
+
+@pytest.mark.asyncio
+async def test_webhook_refresh_returns_202(coordinator_factory):
+    """The webhook answers before the refresh runs."""
+    coordinator, _ = _coordinator(coordinator_factory)
+    coordinator.async_request_webhook_refresh = MagicMock()
+    view = EedomusWebhookView("entry", allowed_ips=["192.168.1.2"])
+    request = MagicMock()
+    request.remote = "192.168.1.2"
+    request.json = AsyncMock(return_value={"action": "refresh"})
+    request.app = {"hass": MagicMock(data={DOMAIN: {"entry": {COORDINATOR: coordinator}}})}
+
+    response = await view.post(request)
+
+    assert response.status == 202
+    coordinator.async_request_webhook_refresh.assert_called_once_with(full=True)
@@ -0,0 +1,105 @@
+"""Tests for the priority lanes of the box requests."""
+
+import asyncio
+import os
+import sys
+from unittest.mock import MagicMock
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from custom_components.eedomus.eedomus_client import EedomusClient
+from custom_components.eedomus.request_scheduler import BACKGROUND, INTERACTIVE, POLLING, RequestScheduler
+
+
+async def _hold(scheduler, lane, started, release):
+    async with scheduler.slot(lane):
+        started.append(lane)
+        await release.wait()
+
+
+@pytest.mark.asyncio
+async def test_higher_lanes_start_first():
+    scheduler = RequestScheduler(limits={POLLING: 1})
+    started = []
+    release = {name: asyncio.Event() for name in ("poll", "second_poll", "background", "command")}
+
+    poll = asyncio.create_task(_hold(scheduler, POLLING, started, release["poll"]))
+    await asyncio.sleep(0)
+    background = asyncio.create_task(_hold(scheduler, BACKGROUND, started, release["background"]))
+    second_poll = asyncio.create_task(_hold(scheduler, POLLING, started, release["second_poll"]))
+    command = asyncio.create_task(_hold(scheduler, INTERACTIVE, started, release["command"]))
+    await asyncio.sleep(0)
+    # Commands never wait for polls; background waits for both
+    assert started == [POLLING, INTERACTIVE]
+
+    release["command"].set()
+    release["poll"].set()
+    await asyncio.sleep(0.01)
+    assert started == [POLLING, INTERACTIVE, POLLING]
+
+    release["second_poll"].set()
+    release["background"].set()
+    await asyncio.gather(poll, background, second_poll, command)
+    assert started[-1] == BACKGROUND
+    assert scheduler.as_dict()[BACKGROUND]["requests"] == 1
+
+
+class _Response:
+    def __init__(self, body):
+        self.status = 200
+        self._body = body
+
+    async def read(self):
+        return self._body
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class _Session:
+    """periph.caract answers once `caract_done` is set; the others at once."""
+
+    def __init__(self):
+        self.caract_done = asyncio.Event()
+        self.sent = []
+
+    def get(self, url, params=None):
+        action = url.split("action=", 1)[-1] if "action=" in url else params.get("action")
+        session = self
+
+        class _Request:
+            async def __aenter__(self):
+                session.sent.append(action)
+                if action == "periph.caract":
+                    await session.caract_done.wait()
+                return _Response(b'{"success": 1, "body": {"history": []}}')
+
+            async def __aexit__(self, *exc):
+                return False
+
+        return _Request()
+
+
+@pytest.mark.asyncio
+async def test_command_not_queued_behind_slow_poll():
+    entry = MagicMock()
+    entry.data = {"api_user": "user", "api_secret": "secret", "api_host": "box"}
+    entry.options = {}
+    session = _Session()
+    client = EedomusClient(session, entry)
+
+    poll = asyncio.create_task(client.get_periph_caract("all"))
+    await asyncio.sleep(0)
+    history = asyncio.create_task(client.get_device_history("1", 0, 10))
+    result = await asyncio.wait_for(client.set_periph_value("1", "100"), 1)
+
+    assert result["success"] == 1
+    assert session.sent == ["periph.caract", "periph.value"]  # History still waiting
+    session.caract_done.set()
+    await asyncio.gather(poll, history)
+    assert session.sent[-1] == "periph.history"
@@ -0,0 +1,140 @@
+"""Tests for the history retry scheduler."""
+
+import asyncio
+import os
+import sys
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from custom_components.eedomus.retry_scheduler import HistoryRetryScheduler
+
+
+def _scheduler():
+    # No jitter so delays are deterministic
+    return HistoryRetryScheduler(base_delay=60, max_delay=600, rng=lambda a, b: 1.0)
+
+
+def test_exponential_backoff_is_capped():
+    """Each failure doubles the delay until max_delay."""
+    scheduler = _scheduler()
+    delays = [
+        scheduler.record_failure("101", "boom", now=0)["retry_after"] for _ in range(6)
+    ]
+    assert delays == [60, 120, 240, 480, 600, 600]
+    assert scheduler.get("101")["attempts"] == 6
+
+
+def test_jitter_stays_within_bounds():
+    """Jitter spreads the delay around the backoff value."""
+    scheduler = HistoryRetryScheduler(base_delay=100, max_delay=1000, jitter=0.2)
+    for _ in range(50):
+        assert 80 <= scheduler.backoff_delay(1) <= 120
+
+
+def test_pop_due_orders_by_time_and_caps_per_cycle():
+    """Due peripherals come out oldest first, limited per cycle."""
+    scheduler = _scheduler()
+    scheduler.record_failure("a", "x", now=30)  # due at 90
+    scheduler.record_failure("b", "x", now=0)  # due at 60
+    scheduler.record_failure("c", "x", now=10)  # due at 70
+    scheduler.record_failure("d", "x", now=500)  # due at 560
+
+    assert scheduler.next_due() == 60
+    assert scheduler.pop_due(limit=2, now=100) == ["b", "c"]
+    assert scheduler.pop_due(limit=2, now=100) == ["a"]
+    assert scheduler.next_due() == 560
+    # Popped peripherals stay in error until they succeed
+    assert "a" in scheduler and not scheduler.is_waiting("a", now=100)
+
+
+def test_superseded_and_resolved_entries_are_skipped():
+    """Lazy deletion ignores stale heap entries."""
+    scheduler = _scheduler()
+    scheduler.record_failure("a", "x", now=0)  # due at 60
+    scheduler.record_failure("a", "x", now=0)  # now due at 120
+    scheduler.record_failure("b", "x", now=0)  # due at 60
+    assert scheduler.record_success("b") is True
+
+    assert scheduler.next_due() == 120
+    assert scheduler.pop_due(limit=5, now=100) == []
+    assert len(scheduler) == 1
+
+
+@pytest.mark.asyncio
+async def test_failure_arms_a_single_timer(coordinator_factory):
+    """A fetch error schedules one wake-up at the earliest retry time."""
+    client = MagicMock()
+    client.config_entry.options = {"history_retry_delay_hours": 1}
+    client.config_entry.data = {}
+    coordinator = coordinator_factory(client)
+    coordinator._retry_queue._uniform = lambda a, b: 1.0
+
+    with patch(
+        "custom_components.eedomus.coordinator.async_call_later", return_value=MagicMock()
+    ) as call_later:
+        coordinator._handle_fetch_error("101", "No data received")
+        coordinator._handle_fetch_error("102", "No data received")
+
+    assert coordinator._retry_queue.max_delay == 3600
+    assert len(coordinator._retry_queue) == 2
+    # The second failure is due after the first one: the timer is not re-armed
+    assert call_later.call_count == 1
+    assert coordinator._history_retry_due == coordinator._retry_queue.next_due()
+
+
+@pytest.mark.asyncio
+async def test_due_retry_fetches_and_rearms(coordinator_factory):
+    """When the timer fires, due peripherals are fetched again."""
+    coordinator = coordinator_factory()
+    coordinator._retry_queue = _scheduler()
+    coordinator._retry_queue.record_failure("101", "x", now=0)
+    coordinator._async_fetch_and_import_history = AsyncMock()
+
+    await coordinator._async_history_retry_due()
+
+    coordinator._async_fetch_and_import_history.assert_awaited_once_with("101")
+
+
+@pytest.mark.asyncio
+async def test_split_window_retry_stays_scheduled(coordinator_factory):
+    """A retry ending in a window split is neither lost nor counted as a failure."""
+    client = MagicMock()
+    client.http_request_timeout = 10
+    client.last_history_response_size = None
+    client.get_device_history = AsyncMock(return_value=None)
+    client.last_history_error = {"success": 0, "error": "Request timed out", "http_status": 408}
+    coordinator = coordinator_factory(client, data={})
+    coordinator._save_history_progress = AsyncMock()
+    coordinator._retry_queue = _scheduler()
+    start = int(time.time()) - 400 * 86400
+    coordinator._history_progress["101"] = {"last_timestamp": start, "completed": False}
+    coordinator._retry_queue.record_failure("101", "x", now=0)
+
+    with patch("custom_components.eedomus.coordinator.async_call_later", return_value=MagicMock()):
+        await coordinator._async_history_retry_due()
+
+    client.get_device_history.assert_awaited_once()
+    assert coordinator._retry_queue.get("101")["attempts"] == 1
+    assert coordinator._retry_queue.next_due() > time.time()
+    assert coordinator._history_retry_due == coordinator._retry_queue.next_due()
+
+
+@pytest.mark.asyncio
+async def test_due_retry_waits_for_running_refresh(coordinator_factory):
+    """The timer retry does not fetch history concurrently with a refresh."""
+    coordinator = coordinator_factory()
+    coordinator._retry_queue = _scheduler()
+    coordinator._retry_queue.record_failure("101", "x", now=0)
+    coordinator._async_fetch_and_import_history = AsyncMock()
+
+    async with coordinator._refresh_lock:
+        retry = asyncio.create_task(coordinator._async_history_retry_due())
+        await asyncio.sleep(0)
+        coordinator._async_fetch_and_import_history.assert_not_awaited()
+    await retry
+
+    coordinator._async_fetch_and_import_history.assert_awaited_once_with("101")
@@ -0,0 +1,71 @@
+"""Tests for the startup phase timeline."""
+
+import os
+import sys
+from unittest.mock import MagicMock
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "benchmarks")))
+
+from bench_refresh import make_coordinator
+from custom_components.eedomus.const import COORDINATOR, DOMAIN
+from custom_components.eedomus.diagnostics import async_get_config_entry_diagnostics
+from custom_components.eedomus.metrics import StartupTimeline, timed_platform_setup
+from custom_components.eedomus.refresh_timing_sensor import EedomusStartupDurationSensor
+
+
+@pytest.mark.asyncio
+async def test_first_refresh_phases_recorded():
+    """The first refresh records YAML load, API fetch, aggregation and mapping."""
+    coordinator = make_coordinator(30)
+    await coordinator.async_config_entry_first_refresh()
+
+    phases = {p["phase"]: p for p in coordinator._startup_timeline.as_dict()["phases"]}
+    for name in ("yaml_load", "history_state_load", "api_fetch", "aggregation", "mapping"):
+        assert f"first_refresh.{name}" in phases
+    assert phases["first_refresh.mapping"]["peripherals"] == len(coordinator.data)
+    assert all(p["duration"] >= 0 for p in phases.values())
+
+
+@pytest.mark.asyncio
+async def test_platform_setup_timed_with_entity_count():
+    """Decorated platform setups record their duration and added entities."""
+    coordinator = MagicMock()
+    coordinator._startup_timeline = StartupTimeline()
+    coordinator._loop_monitor = None
+    hass = MagicMock()
+    hass.data = {DOMAIN: {"entry1": {COORDINATOR: coordinator}}}
+    entry = MagicMock(entry_id="entry1")
+    added = []
+
+    @timed_platform_setup("switch")
+    async def async_setup_entry(hass, entry, async_add_entities):
+        async_add_entities((object() for _ in range(3)), True)
+
+    await async_setup_entry(hass, entry, lambda entities, update=False: added.extend(entities))
+
+    assert len(added) == 3
+    phase = coordinator._startup_timeline.phases[0]
+    assert phase["phase"] == "platform.switch"
+    assert phase["entities"] == 3
+
+
+@pytest.mark.asyncio
+async def test_startup_exposed_by_sensor_and_diagnostics():
+    coordinator = make_coordinator(10)
+    await coordinator.async_config_entry_first_refresh()
+    sensor = EedomusStartupDurationSensor(coordinator)
+    assert sensor.native_value is None  # setup not finished yet
+
+    coordinator._startup_timeline.finish()
+    assert sensor.native_value == round(coordinator._startup_timeline.total, 3)
+    assert "first_refresh.mapping" in sensor.extra_state_attributes
+
+    hass = MagicMock()
+    hass.data = {DOMAIN: {"entry1": {COORDINATOR: coordinator}}}
+    entry = MagicMock(entry_id="entry1", data={"api_secret": "secret"}, options={})
+    diagnostics = await async_get_config_entry_diagnostics(hass, entry)
+    assert diagnostics["startup"]["finished"] is True
+    assert diagnostics["entry"]["data"]["api_secret"] == "**REDACTED**"
@@ -0,0 +1,65 @@
+"""Tests for the peripherals added/removed on the box during a full refresh."""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "benchmarks")))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from bench_refresh import make_coordinator
+from custom_components.eedomus.aggregation import diff_topology
+from test_mapping_hot_reload import _setup_platforms, _standalone_sensor
+
+
+def test_diff_topology():
+    known = {"1": None, "2": "1", "3": ""}
+    listed = [
+        {"periph_id": "1", "parent_periph_id": ""},
+        {"periph_id": "2", "parent_periph_id": "4"},
+        {"periph_id": "4", "parent_periph_id": ""},
+    ]
+    assert diff_topology(known, listed) == ({"4"}, {"3"}, {"2"})
+    # A failed periph.list call removes nothing
+    assert diff_topology(known, []) == (set(), set(), set())
+
+
+@pytest.mark.asyncio
+async def test_full_refresh_adds_and_removes_only_changed_entities():
+    coordinator = make_coordinator(40)
+    await coordinator.async_config_entry_first_refresh()
+    entities = await _setup_platforms(coordinator)
+    simulator = coordinator.client.simulator
+
+    gone = _standalone_sensor(coordinator)
+    simulator.remove_device(gone)
+    new_ids = simulator.add_device("meter")
+    before = len(entities)
+
+    await coordinator._async_full_refresh()
+
+    assert gone not in coordinator.data
+    assert gone not in coordinator._peripheral_mappings
+    assert all(coordinator.data[periph_id].get("ha_entity") for periph_id in new_ids)
+    assert {entity._periph_id for entity in entities if entity.removed} == {gone}
+    assert {entity._periph_id for entity in entities[before:]} == set(new_ids)
+
+    # Same topology: nothing re-created
+    await coordinator._async_full_refresh()
+    assert len(entities) == before + len(new_ids)
+
+
+@pytest.mark.asyncio
+async def test_topology_change_constructs_only_new_entities():
+    coordinator = make_coordinator(40)
+    await coordinator.async_config_entry_first_refresh()
+    constructed = []
+    await _setup_platforms(coordinator, constructed)
+    del constructed[:]
+
+    new_ids = coordinator.client.simulator.add_device("meter")
+    await coordinator._async_full_refresh()
+
+    assert sorted(constructed) == sorted(new_ids)
@@ -0,0 +1,79 @@
+"""Tests for push updates received through the eedomus webhook."""
+
+import os
+import sys
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from custom_components.eedomus.const import COORDINATOR, DOMAIN
+from custom_components.eedomus.webhook import EedomusWebhookView
+
+
+def _coordinator(coordinator_factory):
+    client = MagicMock()
+    client.get_periph_caract = AsyncMock()
+    coordinator = coordinator_factory(client, data={
+        "101": {"periph_id": "101", "name": "Motion", "last_value": "0", "parent_periph_id": "100"},
+        "100": {"periph_id": "100", "name": "Parent", "last_value": "0"},
+        "102": {"periph_id": "102", "name": "Door", "last_value": "0"},
+    })
+    return coordinator, client
+
+
+def test_push_updates_data_and_only_its_listeners(coordinator_factory):
+    """A push writes the peripheral (and its parent) without touching others."""
+    coordinator, _ = _coordinator(coordinator_factory)
+    motion, parent, door = MagicMock(), MagicMock(), MagicMock()
+    coordinator.async_add_periph_listener("101", motion)
+    coordinator.async_add_periph_listener("100", parent)
+    coordinator.async_add_periph_listener("102", door)
+
+    assert coordinator.async_apply_push("101", 100, datetime(2024, 5, 1, 12, 0, 0))
+
+    assert coordinator.data["101"]["last_value"] == "100"
+    assert coordinator.data["101"]["last_value_change"] == "2024-05-01 12:00:00"
+    motion.assert_called_once()
+    parent.assert_called_once()
+    door.assert_not_called()
+
+
+def test_stale_push_is_ignored_and_listener_removable(coordinator_factory):
+    """Out-of-order pushes don't overwrite newer values."""
+    coordinator, _ = _coordinator(coordinator_factory)
+    listener = MagicMock()
+    remove = coordinator.async_add_periph_listener("102", listener)
+
+    coordinator.async_apply_push("102", "1", datetime(2024, 5, 1, 12, 0, 0))
+    coordinator.async_apply_push("102", "0", datetime(2024, 5, 1, 11, 0, 0))
+    assert coordinator.data["102"]["last_value"] == "1"
+
+    remove()
+    coordinator.async_apply_push("102", "0", datetime(2024, 5, 1, 13, 0, 0))
+    assert listener.call_count == 1
+    assert not coordinator.async_apply_push("999", "1")
+
+
+@pytest.mark.asyncio
+async def test_webhook_push_action_makes_no_api_call(coordinator_factory):
+    """The push action answers from the payload only."""
+    coordinator, client = _coordinator(coordinator_factory)
+    view = EedomusWebhookView("entry", allowed_ips=["192.168.1.2"])
+    request = MagicMock()
+    request.remote = "192.168.1.2"
+    request.json = AsyncMock(
+        return_value={"action": "push", "periph_id": 102, "value": "1", "timestamp": 1714564800}
+    )
+    request.app = {"hass": MagicMock(data={DOMAIN: {"entry": {COORDINATOR: coordinator}}})}
+
+    response = await view.post(request)
+
+    assert response.status == 200
+    assert coordinator.data["102"]["last_value"] == "1"
+    client.get_periph_caract.assert_not_called()
+
+    request.json = AsyncMock(return_value={"action": "push", "periph_id": "999", "value": "1"})
+    assert (await view.post(request)).status == 404